@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+YAML against JSON output, and the parsed-proxy dump against reparsing YAML.
+
+For each target built from ``clash.yaml`` (or ``--source``), reports the
+time to emit the document as YAML and as JSON, the file size, and the time
+a client needs to load it back (libyaml when available, ``json`` for JSON).
+Then compares getting the validated proxy list by reading and parsing the
+YAML source with loading a ``--dump-parsed`` pickle and a JSON dump of the
+same list. Timings are best of ``--repeat``.
+
+Example:
+    python benchmarks/bench_format.py --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import clash  # noqa: E402
+from clashcache import PARSER_VERSION  # noqa: E402
+from clashemit import dump_json  # noqa: E402
+from clashyaml import dump_yaml, load_yaml  # noqa: E402
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark output formats.")
+    parser.add_argument("--source", default=str(ROOT / "clash.yaml"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--yaml-backend", help="YAML backend (default: auto)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    source = Path(args.source)
+    backend = args.yaml_backend
+
+    def collect() -> tuple[Any, list[str]]:
+        config = clash.read_clash_config(source, backend)
+        return clash.collect_proxies(config["proxies"])
+
+    parse_time, (proxies, names) = best_of(args.repeat, collect)
+    documents = {
+        "SubZ": clash.build_subz_config(proxies),
+        "Sub-Win": clash.build_subwin_config(proxies, names),
+    }
+
+    print(f"{len(proxies)} proxies from {source.name}")
+    print(
+        f"{'target':<8} {'format':<6} {'emit ms':>9} {'bytes':>9} {'load ms':>9}"
+    )
+    for label, document in documents.items():
+        for fmt, dump, load in (
+            ("yaml", lambda doc: dump_yaml(doc, None, backend), load_yaml),
+            ("json", dump_json, json.loads),
+        ):
+            emit, text = best_of(args.repeat, lambda: dump(document))
+            loaded, data = best_of(args.repeat, lambda: load(text))
+            if data != load_yaml(text, backend):
+                raise SystemExit(f"{label} {fmt} does not load back as YAML.")
+            size = len(text.encode("utf-8"))
+            print(
+                f"{label:<8} {fmt:<6} {emit * 1000:>9.1f} {size:>9,} "
+                f"{loaded * 1000:>9.1f}"
+            )
+
+    payload = {"version": PARSER_VERSION, "proxies": proxies, "names": names}
+    pickled = pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)
+    dumped = json.dumps(payload, ensure_ascii=False)
+    pickle_time, _ = best_of(args.repeat, lambda: pickle.loads(pickled))
+    json_time, _ = best_of(args.repeat, lambda: json.loads(dumped))
+    print()
+    print(f"{'validated proxies from':<24} {'ms':>9} {'bytes':>11}")
+    print(
+        f"{'YAML source (reparse)':<24} {parse_time * 1000:>9.1f} "
+        f"{source.stat().st_size:>11,}"
+    )
+    print(f"{'pickle dump':<24} {pickle_time * 1000:>9.1f} {len(pickled):>11,}")
+    print(
+        f"{'JSON dump':<24} {json_time * 1000:>9.1f} "
+        f"{len(dumped.encode('utf-8')):>11,}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Speedup of the chunked parallel ``proxies`` parse against the core count.
+
+A synthetic subscription (or ``--source``) is parsed whole with
+``load_yaml``, with the streaming extractor, and with
+:func:`clashchunks.parse_proxies_parallel` for each worker count. Every
+result is checked against the whole parse; timings are best of ``--repeat``
+and include starting the process pool.
+
+Example:
+    python benchmarks/bench_parallel_parse.py --count 200000 --workers 1,2,4,8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from clashchunks import parse_proxies_parallel, split_proxies  # noqa: E402
+from clashstream import iter_proxies  # noqa: E402
+from clashyaml import load_yaml  # noqa: E402
+from gen_subscription import STYLES, generate  # noqa: E402
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def parse_args() -> argparse.Namespace:
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cores} if cores >= 4 else {1, cores})
+    parser = argparse.ArgumentParser(description="Benchmark parallel parsing.")
+    parser.add_argument(
+        "--source", help="Subscription to parse instead of a synthetic one"
+    )
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--style", choices=STYLES, default="block")
+    parser.add_argument(
+        "--workers",
+        default=",".join(map(str, default_workers)),
+        help="Comma-separated worker counts (default: %(default)s)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--yaml-backend", help="YAML backend (default: auto)")
+    parser.add_argument(
+        "--workdir",
+        default=str(Path(tempfile.gettempdir()) / "clash-bench"),
+        help="Where generated subscriptions are kept between runs",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.source:
+        path = Path(args.source)
+    else:
+        path = Path(args.workdir) / f"synthetic-{args.count}-{args.style}.yaml"
+        if not path.is_file():
+            generate(path, args.count, args.style)
+    raw = path.read_text(encoding="utf-8")
+    backend = args.yaml_backend
+    if split_proxies(raw) is None:
+        raise SystemExit(f"{path.name}: ambiguous proxy boundaries, nothing to do.")
+
+    whole, expected = best_of(
+        args.repeat, lambda: load_yaml(raw, backend)["proxies"]
+    )
+    stream, _ = best_of(args.repeat, lambda: list(iter_proxies(raw, backend)))
+    print(f"{len(expected):,} proxies from {path.name}, {os.cpu_count()} CPUs")
+    print(f"{'parse':<14} {'seconds':>9} {'speedup':>8} {'efficiency':>11}")
+    print(f"{'whole':<14} {whole:>9.3f} {1:>8.2f}x")
+    print(f"{'stream':<14} {stream:>9.3f} {whole / stream:>8.2f}x")
+    for workers in (int(value) for value in args.workers.split(",") if value):
+        elapsed, entries = best_of(
+            args.repeat, lambda: parse_proxies_parallel(raw, backend, workers)
+        )
+        if entries != expected:
+            raise SystemExit(f"Parallel parse with {workers} workers differs.")
+        speedup = whole / elapsed
+        print(
+            f"{f'{workers} worker(s)':<14} {elapsed:>9.3f} {speedup:>8.2f}x "
+            f"{speedup / workers:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Phase-level benchmark of the three entry points on synthetic subscriptions.
+
+For every size and style, ``clash.py``, ``clashmob.py`` and ``clashwin.py``
+are run phase by phase (parse, collect, build, dump) with the functions the
+scripts themselves use. Each phase is timed (best of ``--repeat``) and then
+re-run under tracemalloc to record its peak memory. Results are written as
+JSON; ``--compare`` prints the ratio against an earlier run and flags
+regressions.
+
+Example:
+    python benchmarks/bench_phases.py --sizes 1000,10000,100000 -o results.json
+    python benchmarks/bench_phases.py -o new.json --compare results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import yaml  # noqa: E402
+
+import clash  # noqa: E402
+import clashmob  # noqa: E402
+import clashwin  # noqa: E402
+from clashyaml import HAS_LIBYAML, dump_yaml, resolve_backend  # noqa: E402
+from gen_subscription import STYLES, generate  # noqa: E402
+
+PHASES = ("parse", "collect", "build", "dump")
+ENTRY_POINTS = ("clash", "clashmob", "clashwin")
+NOISE_FLOOR = 0.001  # phases faster than this are never flagged
+
+
+def _collect(module: Any, config: dict[str, Any]) -> tuple[list[Any], list[str]]:
+    collected = module.collect_proxies(config["proxies"])
+    if isinstance(collected, tuple):
+        return collected
+    return collected, [proxy["name"] for proxy in collected]
+
+
+def _build(entry: str, proxies: list[Any], names: list[str]) -> list[dict[str, Any]]:
+    if entry == "clash":
+        return [
+            clash.build_subz_config(proxies),
+            clash.build_subwin_config(proxies, names),
+        ]
+    if entry == "clashmob":
+        return [clashmob.build_mobile_config(proxies)]
+    return [clashwin.build_output(proxies, names)]
+
+
+def phase_steps(
+    entry: str, path: Path, backend: str | None
+) -> list[Callable[[Any], Any]]:
+    """One callable per phase; each receives the previous phase's result."""
+    module = {"clash": clash, "clashmob": clashmob, "clashwin": clashwin}[entry]
+    return [
+        lambda _: module.read_clash_config(path, backend),
+        lambda config: _collect(module, config),
+        lambda collected: _build(entry, *collected),
+        lambda documents: [dump_yaml(doc, None, backend) for doc in documents],
+    ]
+
+
+def run_phases(
+    entry: str, path: Path, backend: str | None, repeat: int, memory: bool
+) -> list[dict[str, Any]]:
+    steps = phase_steps(entry, path, backend)
+    results = []
+    value: Any = None
+    for phase, step in zip(PHASES, steps):
+        best = float("inf")
+        output: Any = None
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            output = step(value)
+            best = min(best, time.perf_counter() - started)
+        peak = None
+        if memory:
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            step(value)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            tracemalloc.stop()
+        results.append(
+            {"entry": entry, "phase": phase, "seconds": best, "peak_bytes": peak}
+        )
+        value = output
+    return results
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: dict[str, Any], new: dict[str, Any], threshold: float) -> int:
+    """Print new/old time ratios; returns the number of regressions."""
+
+    def key(item: dict[str, Any]) -> tuple[Any, ...]:
+        return item["entry"], item["size"], item["style"], item["phase"]
+
+    before = {key(item): item for item in old["results"]}
+    regressions = 0
+    print(f"\nvs {old['meta'].get('revision') or 'previous run'}:")
+    for item in new["results"]:
+        previous = before.get(key(item))
+        if previous is None or not previous["seconds"]:
+            continue
+        ratio = item["seconds"] / previous["seconds"]
+        flag = ""
+        if ratio > 1 + threshold and item["seconds"] >= NOISE_FLOOR:
+            flag = "  REGRESSION"
+            regressions += 1
+        entry, size, style, phase = key(item)
+        print(f"  {entry:<9} {size:>8} {style:<5} {phase:<8} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark parse/collect/build/dump."
+    )
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000",
+        help="Comma-separated proxy counts (default: 1000,10000,100000)",
+    )
+    parser.add_argument(
+        "--styles", default=",".join(STYLES), help="Comma-separated: block,flow"
+    )
+    parser.add_argument(
+        "--entries",
+        default=",".join(ENTRY_POINTS),
+        help="Comma-separated entry points (default: all three)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per phase")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc")
+    parser.add_argument(
+        "--yaml-backend", choices=("auto", "libyaml", "python"), default="auto"
+    )
+    parser.add_argument(
+        "--workdir",
+        default=str(Path(tempfile.gettempdir()) / "clash-bench"),
+        help="Where generated subscriptions are kept between runs",
+    )
+    parser.add_argument("-o", "--output", default="bench_phases.json")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Slowdown ratio flagged as a regression (default: 0.10)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    backend = args.yaml_backend
+    workdir = Path(args.workdir)
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        for style in args.styles.split(","):
+            path = workdir / f"synthetic-{size}-{style}.yaml"
+            if not path.is_file():
+                generate(path, size, style)
+            for entry in args.entries.split(","):
+                for item in run_phases(
+                    entry, path, backend, args.repeat, not args.no_memory
+                ):
+                    item.update(size=size, style=style)
+                    results.append(item)
+                    peak = item["peak_bytes"]
+                    memory = f"{peak / 2**20:9.1f} MiB" if peak is not None else ""
+                    print(
+                        f"{entry:<9} {size:>8} {style:<5} {item['phase']:<8} "
+                        f"{item['seconds'] * 1000:10.1f} ms {memory}"
+                    )
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pyyaml": yaml.__version__,
+            "libyaml": HAS_LIBYAML,
+            "backend": resolve_backend(backend),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    output = Path(args.output)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote {len(results)} results to {args.output}.")
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(old, report, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
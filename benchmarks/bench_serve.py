@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Load-test the in-memory subscription server on localhost.
+
+Opens ``--concurrency`` keep-alive connections that request a profile in a
+loop for ``--duration`` seconds and reports requests/s and latency
+percentiles. With ``--source`` a ``clash.py --serve`` process is started for
+the run; otherwise an already running server is targeted.
+
+Example:
+    python benchmarks/bench_serve.py --source clash.yaml --gzip --revalidate
+    python benchmarks/bench_serve.py --url http://127.0.0.1:8765/Sub-Win.yml
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark clash.py --serve.")
+    parser.add_argument("--url", help="Profile URL of a running server")
+    parser.add_argument(
+        "--source", help="Start 'clash.py SOURCE --serve' on a free port for the run"
+    )
+    parser.add_argument("--path", default="/Sub-Win.yml", help="Path with --source")
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="Seconds")
+    parser.add_argument("--gzip", action="store_true", help="Accept gzip responses")
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Send If-None-Match with the last ETag (exercises 304 responses)",
+    )
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple[int, str | None]:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length:
+        await reader.readexactly(length)
+    return status, headers.get("etag")
+
+
+async def client(
+    host: str,
+    port: int,
+    path: str,
+    args: argparse.Namespace,
+    deadline: float,
+    latencies: list[float],
+    statuses: dict[int, int],
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    etag = None
+    try:
+        while time.perf_counter() < deadline:
+            lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+            if args.gzip:
+                lines.append("Accept-Encoding: gzip")
+            if args.revalidate and etag:
+                lines.append(f"If-None-Match: {etag}")
+            started = time.perf_counter()
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            status, new_etag = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            etag = new_etag or etag
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, path: str, args: argparse.Namespace) -> None:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(
+        *(
+            client(host, port, path, args, deadline, latencies, statuses)
+            for _ in range(max(1, args.concurrency))
+        )
+    )
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(value: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * value))] * 1000
+
+    print(
+        f"{len(latencies):,} requests in {elapsed:.1f}s over {args.concurrency} "
+        f"connections: {len(latencies) / elapsed:,.0f} req/s"
+    )
+    print(
+        f"latency p50 {percentile(0.50):.2f} ms, p99 {percentile(0.99):.2f} ms, "
+        f"max {latencies[-1] * 1000:.2f} ms"
+    )
+    print("status counts: " + ", ".join(f"{k}: {v:,}" for k, v in sorted(statuses.items())))
+
+
+def wait_for_port(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"Server on {host}:{port} did not start.")
+
+
+def main() -> None:
+    args = parse_args()
+    server = None
+    if args.source:
+        host, port, path = "127.0.0.1", free_port(), args.path
+        out = Path(args.source).resolve().parent
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                str(ROOT / "clash.py"),
+                args.source,
+                "-z",
+                str(out / ".bench-SubZ.yml"),
+                "-w",
+                str(out / ".bench-Sub-Win.yml"),
+                "--serve",
+                f"{host}:{port}",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    elif args.url:
+        parts = urlsplit(args.url)
+        host, port, path = parts.hostname or "127.0.0.1", parts.port or 80, parts.path
+    else:
+        raise SystemExit("Pass --url or --source.")
+    try:
+        wait_for_port(host, port)
+        asyncio.run(run(host, port, path, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            for name in (".bench-SubZ.yml", ".bench-Sub-Win.yml"):
+                (out / name).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
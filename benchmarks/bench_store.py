@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Memory of the compact proxy store against the plain dict list.
+
+A synthetic subscription is streamed through the same validation as
+``collect_proxies`` twice: once into a list of PyYAML dicts (the default)
+and once into a :class:`clashstore.ProxyStore` (``--compact``). For each,
+tracemalloc reports the memory still held afterwards and the peak while
+loading; ``--serialize`` also times writing a SubZ document from both and
+checks that the bytes match.
+
+Example:
+    python benchmarks/bench_store.py --count 1000000 --style flow
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from clash import build_subz_config  # noqa: E402
+from clashemit import iter_block_document  # noqa: E402
+from clashschema import validate_proxies  # noqa: E402
+from clashstore import ProxyStore  # noqa: E402
+from clashstream import stream_proxies  # noqa: E402
+from clashyaml import dump_yaml  # noqa: E402
+from gen_subscription import STYLES, generate  # noqa: E402
+
+
+def measure(load: Callable[[], Any]) -> tuple[Any, int, int, float]:
+    """Run ``load`` under tracemalloc: (result, held bytes, peak bytes, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held, peak, elapsed
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the compact store.")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--style", choices=STYLES, default="block")
+    parser.add_argument(
+        "--workdir",
+        default=str(Path(tempfile.gettempdir()) / "clash-bench"),
+        help="Where generated subscriptions are kept between runs",
+    )
+    parser.add_argument(
+        "--serialize",
+        action="store_true",
+        help="Also time dumping SubZ from both and compare the output",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    path = Path(args.workdir) / f"synthetic-{args.count}-{args.style}.yaml"
+    if not path.is_file():
+        generate(path, args.count, args.style)
+
+    dicts, dict_held, dict_peak, dict_time = measure(
+        lambda: list(validate_proxies(stream_proxies(path)))
+    )
+    print(f"{len(dicts):,} proxies from {path.name}")
+    print(f"{'':<10} {'held MiB':>10} {'peak MiB':>10} {'load s':>8}")
+    print(
+        f"{'dicts':<10} {dict_held / 2**20:>10.1f} {dict_peak / 2**20:>10.1f} "
+        f"{dict_time:>8.2f}"
+    )
+    if not args.serialize:
+        del dicts
+    store, held, peak, elapsed = measure(
+        lambda: ProxyStore(validate_proxies(stream_proxies(path)))
+    )
+    print(
+        f"{'compact':<10} {held / 2**20:>10.1f} {peak / 2**20:>10.1f} "
+        f"{elapsed:>8.2f}"
+    )
+    print(f"held memory: {held / dict_held:.2f}x of the dict list")
+
+    if args.serialize:
+        started = time.perf_counter()
+        expected = dump_yaml(build_subz_config(dicts))
+        dict_dump = time.perf_counter() - started
+        started = time.perf_counter()
+        actual = "".join(iter_block_document(build_subz_config(store)))
+        store_dump = time.perf_counter() - started
+        print(f"serialize: dicts {dict_dump:.2f}s, compact {store_dump:.2f}s")
+        if actual != expected:
+            raise SystemExit("Compact output differs from the dict output.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Throughput of the per-type proxy validation used by ``collect_proxies``.
+
+Synthetic proxies (same type mix as ``clash.yaml``) are mixed with a share of
+broken entries (no server, bad port, unknown cipher, vless without uuid,
+plugin without opts, ...) and digit-string ports that get coerced. Reports
+entries/s for the validator next to the old dict-plus-name check, the
+rejection counts, and fails when the rate drops below ``--min-rate``.
+
+Example:
+    python benchmarks/bench_validate.py --count 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from clashschema import ValidationReport, validate_proxies  # noqa: E402
+from gen_subscription import Tagged, make_proxy  # noqa: E402
+
+
+def _drop(key: str) -> Callable[[dict[str, Any]], None]:
+    return lambda proxy: proxy.pop(key, None)
+
+
+def _set(key: str, value: Any) -> Callable[[dict[str, Any]], None]:
+    return lambda proxy: proxy.__setitem__(key, value)
+
+
+BREAKAGES = [
+    _drop("server"),
+    _set("port", "https"),
+    _set("port", 70000),
+    _drop("name"),
+    _drop("type"),
+    _drop("password"),
+    _drop("uuid"),
+    _set("cipher", "rot13"),
+    _set("plugin", "simple-obfs"),
+    _set("plugin", "obfs"),  # without plugin-opts
+]
+
+
+def make_entries(count: int, invalid: float, seed: int) -> list[Any]:
+    rng = random.Random(seed)
+    entries: list[Any] = []
+    for index in range(count):
+        proxy = make_proxy(index, rng)
+        if isinstance(proxy.get("password"), Tagged):
+            proxy["password"] = proxy["password"].text
+        roll = rng.random()
+        if roll < invalid:
+            proxy.pop("plugin-opts", None)
+            rng.choice(BREAKAGES)(proxy)
+        elif roll < invalid * 2:
+            proxy["port"] = str(proxy["port"])
+        entries.append(proxy)
+    return entries
+
+
+def name_only(entries: list[Any]) -> list[Any]:
+    """The check ``collect_proxies`` did before per-type validation."""
+    kept = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        name = entry.get("name")
+        if not isinstance(name, str) or not name.strip():
+            continue
+        kept.append(entry)
+    return kept
+
+
+def best_of(repeat: int, entries: list[Any], run: Callable[[list[Any]], Any]) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        # Coercion rewrites top-level keys, so a shallow copy is enough.
+        batch = [dict(entry) for entry in entries]
+        started = time.perf_counter()
+        run(batch)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark proxy validation.")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument(
+        "--invalid",
+        type=float,
+        default=0.05,
+        help="Share of broken entries (the same share gets string ports)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--min-rate",
+        type=float,
+        default=100_000,
+        help="Fail below this many validated entries/s (default: 100000)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    entries = make_entries(args.count, args.invalid, args.seed)
+
+    report = ValidationReport()
+    kept = list(validate_proxies([dict(entry) for entry in entries], report))
+    validate = best_of(
+        args.repeat, entries, lambda batch: list(validate_proxies(batch))
+    )
+    baseline = best_of(args.repeat, entries, name_only)
+
+    rate = len(entries) / validate
+    print(f"{len(entries):,} entries, {len(kept):,} accepted")
+    print(f"  per-type validation {validate * 1000:8.1f} ms  {rate:12,.0f} entries/s")
+    print(
+        f"  name-only check     {baseline * 1000:8.1f} ms  "
+        f"{len(entries) / baseline:12,.0f} entries/s"
+    )
+    for reason, count in report.rejected.most_common():
+        print(f"  {reason:<22} {count:>8,}")
+    if rate < args.min_rate:
+        raise SystemExit(
+            f"Validation rate {rate:,.0f}/s is below {args.min_rate:,.0f}/s."
+        )
+
+
+if __name__ == "__main__":
+    main()
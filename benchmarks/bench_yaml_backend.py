@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compare the libyaml and pure-Python YAML backends on a Clash source file.
+
+Example:
+    python benchmarks/bench_yaml_backend.py clash.yaml --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from clashyaml import HAS_LIBYAML, dump_yaml, load_yaml  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark YAML load/dump for each available backend."
+    )
+    parser.add_argument(
+        "source",
+        nargs="?",
+        default=str(Path(__file__).resolve().parent.parent / "clash.yaml"),
+        help="Clash YAML file to benchmark (defaults to the bundled clash.yaml)",
+    )
+    parser.add_argument(
+        "-n",
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of timed runs per phase; the best run is reported",
+    )
+    return parser.parse_args()
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> tuple[float, Any]:
+    best = float("inf")
+    result: Any = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    args = parse_args()
+    raw = Path(args.source).read_text(encoding="utf-8")
+    backends = ["python", "libyaml"] if HAS_LIBYAML else ["python"]
+
+    timings: dict[str, tuple[float, float]] = {}
+    outputs: dict[str, str] = {}
+    documents: dict[str, Any] = {}
+    for backend in backends:
+        load_time, data = best_of(args.repeat, lambda: load_yaml(raw, backend))
+        dump_time, text = best_of(args.repeat, lambda: dump_yaml(data, None, backend))
+        timings[backend] = (load_time, dump_time)
+        outputs[backend] = text
+        documents[backend] = data
+
+    print(f"{'backend':<10} {'load (ms)':>12} {'dump (ms)':>12}")
+    for backend, (load_time, dump_time) in timings.items():
+        print(f"{backend:<10} {load_time * 1000:>12.2f} {dump_time * 1000:>12.2f}")
+
+    if "libyaml" in timings:
+        py_load, py_dump = timings["python"]
+        c_load, c_dump = timings["libyaml"]
+        print(f"load speedup: {py_load / c_load:.1f}x, dump speedup: {py_dump / c_dump:.1f}x")
+        same_data = documents["python"] == documents["libyaml"]
+        same_bytes = outputs["python"] == outputs["libyaml"]
+        print(f"identical data: {same_data}, identical output: {same_bytes}")
+        if not (same_data and same_bytes):
+            raise SystemExit(1)
+    else:
+        print("libyaml is not available; only the Python backend was measured.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Clash subscriptions for benchmarking.
+
+Proxies follow the type mix of the bundled ``clash.yaml`` (mostly trojan, then
+ss with and without ``plugin-opts``, vless with reality, vmess over ws,
+hysteria2 and http) with flag-emoji names in both naming schemes seen in the
+sources, and a small share of ``!<str>``-tagged passwords like ``Sub.yml``.
+Entries are written one at a time in block or flow style, so a million
+proxies never have to be held in memory.
+
+Example:
+    python benchmarks/gen_subscription.py 100000 -o /tmp/synthetic.yaml --style flow
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from clashemit import render_flow  # noqa: E402
+
+STYLES = ("block", "flow")
+
+# Counts per type in clash.yaml.
+TYPE_WEIGHTS = {
+    "trojan": 341,
+    "ss": 26,
+    "vless": 26,
+    "vmess": 21,
+    "hysteria2": 14,
+    "http": 5,
+}
+# Share of ss passwords written with an explicit tag.
+TAGGED_SS_SHARE = 0.2
+
+REGIONS = [
+    ("\U0001F1ED\U0001F1F0", "HKG", "Hong Kong", "香港"),
+    ("\U0001F1EF\U0001F1F5", "JPN", "Tokyo", "日本"),
+    ("\U0001F1F8\U0001F1EC", "SGP", "Singapore", "新加坡"),
+    ("\U0001F1FA\U0001F1F8", "USA", "Los Angeles", "美国"),
+    ("\U0001F1E9\U0001F1EA", "GER", "Frankfurt", "德国"),
+    ("\U0001F1F9\U0001F1FC", "TWN", "Taipei", "台湾"),
+    ("\U0001F1EC\U0001F1E7", "GBR", "London", "英国"),
+    ("\U0001F1E8\U0001F1E6", "CAN", "Toronto", "加拿大"),
+]
+SNI = ["www.nintendogames.net", "addons.mozilla.org", "www.bing.com", "cdn.example.org"]
+CIPHERS = ["aes-256-gcm", "aes-128-gcm", "chacha20-ietf-poly1305", "aes-256-cfb"]
+
+
+class Tagged:
+    """A scalar written with an explicit (unknown) tag, e.g. ``!<str> 123``."""
+
+    def __init__(self, tag: str, text: str) -> None:
+        self.tag = tag
+        self.text = text
+
+
+def _server(rng: random.Random) -> str:
+    if rng.random() < 0.3:
+        domain = rng.choice(["eans.top", "dsjsapp.com", "example.net"])
+        return f"node{rng.randrange(10_000)}.{domain}"
+    return ".".join(str(rng.randrange(1, 255)) for _ in range(4))
+
+
+def _name(index: int, rng: random.Random) -> str:
+    flag, code, city, chinese = REGIONS[index % len(REGIONS)]
+    if rng.random() < 0.5:
+        return f"{flag} 机场推荐:dafei.de {chinese} {index:02d}"
+    return f"{code} {flag} {city} {index}"
+
+
+def make_proxy(index: int, rng: random.Random) -> dict[str, Any]:
+    kind = rng.choices(list(TYPE_WEIGHTS), weights=list(TYPE_WEIGHTS.values()))[0]
+    proxy: dict[str, Any] = {
+        "name": _name(index, rng),
+        "server": _server(rng),
+        "port": rng.choice([443, 8443, 989, 50000 + rng.randrange(10)]),
+    }
+    if kind == "trojan":
+        proxy.update(
+            {
+                "client-fingerprint": "chrome",
+                "type": "trojan",
+                "password": uuid.UUID(int=rng.getrandbits(128)).hex,
+                "sni": rng.choice(SNI),
+                "skip-cert-verify": rng.random() < 0.2,
+            }
+        )
+        if rng.random() < 0.1:
+            proxy["network"] = "ws"
+            proxy["ws-opts"] = {"path": "/", "headers": {"Host": rng.choice(SNI)}}
+    elif kind == "ss":
+        proxy.update({"type": "ss", "cipher": rng.choice(CIPHERS)})
+        if rng.random() < TAGGED_SS_SHARE:
+            proxy["password"] = Tagged("!<str>", str(rng.randrange(10**9, 10**10)))
+        else:
+            proxy["password"] = uuid.UUID(int=rng.getrandbits(128)).hex[:12]
+        proxy["udp"] = True
+        if rng.random() < 0.4:
+            proxy["plugin"] = "v2ray-plugin"
+            proxy["plugin-opts"] = {
+                "mode": "websocket",
+                "host": rng.choice(SNI),
+                "path": f"/{uuid.UUID(int=rng.getrandbits(128)).hex[:8]}",
+                "tls": True,
+                "mux": True,
+                "skip-cert-verify": False,
+            }
+    elif kind == "vless":
+        proxy.update(
+            {
+                "type": "vless",
+                "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                "tls": True,
+                "flow": "xtls-rprx-vision",
+                "reality-opts": {
+                    "public-key": uuid.UUID(int=rng.getrandbits(128)).hex,
+                    "short-id": uuid.UUID(int=rng.getrandbits(128)).hex[:8],
+                },
+                "client-fingerprint": "firefox",
+                "network": "tcp",
+                "udp": True,
+                "servername": rng.choice(SNI),
+            }
+        )
+    elif kind == "vmess":
+        proxy.update(
+            {
+                "type": "vmess",
+                "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                "alterId": 0,
+                "cipher": "auto",
+                "tls": rng.random() < 0.5,
+                "network": "ws",
+                "ws-opts": {"path": "/"},
+                "udp": True,
+            }
+        )
+    elif kind == "hysteria2":
+        secret = str(uuid.UUID(int=rng.getrandbits(128)))
+        proxy.update(
+            {
+                "type": "hysteria2",
+                "password": secret,
+                "auth": secret,
+                "up": 100,
+                "down": 100,
+                "skip-cert-verify": True,
+                "obfs": "salamander",
+                "obfs-password": uuid.UUID(int=rng.getrandbits(128)).hex[:24],
+                "udp": True,
+            }
+        )
+    else:
+        user = f"user{rng.randrange(10_000)}"
+        proxy.update(
+            {
+                "password": user,
+                "type": "http",
+                "username": user,
+                "client-fingerprint": "chrome",
+            }
+        )
+    return proxy
+
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, Tagged):
+        return f"{value.tag} {value.text}"
+    return render_flow(value)
+
+
+def _flow(mapping: dict[str, Any]) -> str:
+    items = []
+    for key, value in mapping.items():
+        text = _flow(value) if isinstance(value, dict) else _scalar(value)
+        items.append(f"{render_flow(key)}: {text}")
+    return "{" + ", ".join(items) + "}"
+
+
+def _block(mapping: dict[str, Any], indent: int, first_prefix: str) -> Iterator[str]:
+    prefix = first_prefix
+    for key, value in mapping.items():
+        if isinstance(value, dict):
+            yield f"{prefix}{render_flow(key)}:\n"
+            yield from _block(value, indent + 2, " " * (indent + 2))
+        else:
+            yield f"{prefix}{render_flow(key)}: {_scalar(value)}\n"
+        prefix = " " * indent
+
+
+def write_subscription(
+    handle: TextIO, count: int, style: str = "block", seed: int = 1
+) -> None:
+    """Write a complete config with ``count`` proxies to ``handle``."""
+    rng = random.Random(seed)
+    handle.write(
+        "port: 7890\nsocks-port: 7891\nallow-lan: true\nmode: Rule\n"
+        "log-level: info\nexternal-controller: 127.0.0.1:9090\nproxies:\n"
+    )
+    names = []
+    for index in range(count):
+        proxy = make_proxy(index, rng)
+        names.append(proxy["name"])
+        if style == "flow":
+            handle.write(f"  - {_flow(proxy)}\n")
+        else:
+            handle.writelines(_block(proxy, 4, "  - "))
+
+    handle.write("proxy-groups:\n")
+    groups = (("\U0001F680 节点选择", "select"), ("\u267B\ufe0f 自动选择", "url-test"))
+    for group, kind in groups:
+        handle.write(f"  - name: {render_flow(group)}\n    type: {kind}\n")
+        if kind == "url-test":
+            handle.write(
+                "    url: http://www.gstatic.com/generate_204\n    interval: 300\n"
+            )
+        handle.write("    proxies:\n")
+        handle.writelines(f"      - {render_flow(name)}\n" for name in names)
+    handle.write(
+        "rules:\n"
+        "  - DOMAIN-SUFFIX,ad.com,REJECT\n"
+        "  - GEOIP,CN,DIRECT\n"
+        "  - MATCH,\U0001F680 节点选择\n"
+    )
+
+
+def generate(path: Path, count: int, style: str = "block", seed: int = 1) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="\n") as handle:
+        write_subscription(handle, count, style, seed)
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic Clash subscription."
+    )
+    parser.add_argument(
+        "count", type=int, help="Number of proxies (e.g. 1000 to 1000000)"
+    )
+    parser.add_argument("-o", "--output", required=True, help="Destination YAML file")
+    parser.add_argument("--style", choices=STYLES, default="block")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    path = generate(Path(args.output), args.count, args.style, args.seed)
+    print(f"Wrote {args.count:,} proxies to {path} ({path.stat().st_size:,} bytes).")
+
+
+if __name__ == "__main__":
+    main()
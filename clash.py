@@ -9,8 +9,11 @@ Example:
 from __future__ import annotations
 
 import argparse
+import asyncio
 import os
 import sys
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
@@ -19,6 +22,52 @@ try:
 except ImportError as exc:  # pragma: no cover - intentional fail-fast
     raise SystemExit("PyYAML is required to run this script.") from exc
 
+from clashcache import ParseCache, is_parsed_dump
+from clashdedup import dedupe_proxies
+from clashengine import (
+    OUTPUT_FORMATS,
+    TARGETS,
+    Target,
+    collect_proxies,
+    emit_targets,
+    get_targets,
+    load_proxies,
+    parse_formats,
+    register_target,
+)
+from clashengine import read_clash_config  # noqa: F401 - re-exported for callers
+from clashfilter import FilterSet, add_filter_arguments
+from clashgroups import (
+    DEFAULT_REGION_SIZE,
+    GROUP_ENCODINGS,
+    build_region_groups,
+    encode_member_lists,
+    format_encoding_report,
+    measure_group_encodings,
+    probes_per_interval,
+)
+from clashio import write_if_changed
+from clashmerge import parse_source_spec
+from clashprobe import PROBE_MODES
+from clashprofile import add_profile_arguments, profiler_from_args
+from clashrules import RULE_OPTIMIZATIONS, compile_rules
+from clashselect import SelectionReport, select_diverse
+from clashserve import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    ProfileServer,
+    parse_listen_address,
+)
+from clashwatch import (
+    DEFAULT_DEBOUNCE,
+    WarmRenderer,
+    WarmSource,
+    open_watcher,
+    watch,
+)
+from clashyaml import RelaxedLoader  # noqa: F401 - re-exported for callers
+from clashyaml import BACKEND_CHOICES, load_yaml
+
 
 PRIMARY_GROUP = "\U0001F506 LIST"  # dY"+ LIST
 SELECT_GROUP = "\U0001F530 Select"  # dY"� Select
@@ -27,27 +76,6 @@ FALLBACK_GROUP = "Auto-Fallback"
 TEST_URL = "http://www.gstatic.com/generate_204"
 
 
-class RelaxedLoader(yaml.SafeLoader):
-    """Safe loader that silently accepts unknown YAML tags."""
-
-
-def _construct_unknown(  # type: ignore[override]
-    loader: RelaxedLoader, node: yaml.Node
-) -> Any:
-    if isinstance(node, yaml.ScalarNode):
-        return loader.construct_scalar(node)
-    if isinstance(node, yaml.SequenceNode):
-        return loader.construct_sequence(node)
-    if isinstance(node, yaml.MappingNode):
-        return loader.construct_mapping(node)
-    raise yaml.constructor.ConstructorError(  # pragma: no cover - defensive
-        None, None, f"Cannot construct node type {type(node)}", node.start_mark
-    )
-
-
-RelaxedLoader.add_constructor(None, _construct_unknown)
-
-
 INVISIBLE_CHARS = {
     "\ufeff",
     "\u202a",
@@ -71,8 +99,10 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "source",
-        nargs="?",
-        help="Path to the source clash.yaml file (prompted if omitted)",
+        nargs="*",
+        help="Source clash.yaml file (prompted if omitted) or a .pickle written by "
+        "--dump-parsed; several sources are merged, PATH=PRIORITY[:PREFIX] sets "
+        "a source's priority and name prefix",
     )
     parser.add_argument(
         "-z",
@@ -86,47 +116,184 @@ def parse_args() -> argparse.Namespace:
         dest="subwin_output",
         help="Destination path for Sub-Win.yml (defaults next to this script)",
     )
-    return parser.parse_args()
-
-
-def read_clash_config(path: Path) -> dict[str, Any]:
-    try:
-        raw = path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        raw = path.read_text(encoding="utf-8", errors="ignore")
-
-    try:
-        data = yaml.load(raw, Loader=RelaxedLoader)
-    except yaml.YAMLError as exc:
-        raise SystemExit(f"Failed to parse {path}: {exc}") from exc
-
-    if not isinstance(data, dict):
-        raise SystemExit(f"{path} does not contain a valid Clash mapping.")
-    return data
-
-
-def collect_proxies(entries: list[Any]) -> tuple[list[dict[str, Any]], list[str]]:
-    proxies: list[dict[str, Any]] = []
-    names: list[str] = []
-    skipped = 0
-    for entry in entries:
-        if not isinstance(entry, dict):
-            skipped += 1
-            continue
-        name = entry.get("name")
-        if not isinstance(name, str) or not name.strip():
-            skipped += 1
-            continue
-        proxies.append(entry)
-        names.append(name)
-
-    if not proxies:
-        raise SystemExit("No usable proxies were found in the source config.")
-    if skipped:
-        print(f"Skipped {skipped} malformed proxy entries.", file=sys.stderr)
-    return proxies, names
+    parser.add_argument(
+        "-t",
+        "--target",
+        dest="targets",
+        action="append",
+        choices=sorted(TARGETS),
+        help="Target to generate; repeat for several (default: all targets)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Worker processes used to parse merged sources and serialize targets "
+        "(default: one per source or target)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Construct only the 'proxies' section and skip the rest of the source",
+    )
+    parser.add_argument(
+        "--parallel-parse",
+        nargs="?",
+        type=int,
+        const=0,
+        metavar="WORKERS",
+        help="Parse the 'proxies' list in chunks across WORKERS processes "
+        "(default: one per CPU), falling back to a normal parse when its item "
+        "boundaries are ambiguous; --stream takes precedence",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Merge functionally identical proxies and make names unique",
+    )
+    parser.add_argument(
+        "--dedup-report",
+        help="Write the list of merged and renamed proxies to this file",
+    )
+    parser.add_argument(
+        "--probe",
+        choices=PROBE_MODES,
+        help="Probe server:port of every proxy and drop or demote dead ones",
+    )
+    parser.add_argument(
+        "--probe-timeout",
+        type=float,
+        default=3.0,
+        help="Seconds to wait for each probe (default: 3)",
+    )
+    parser.add_argument(
+        "--probe-concurrency",
+        type=int,
+        default=64,
+        help="Maximum number of probes in flight (default: 64)",
+    )
+    parser.add_argument(
+        "--probe-rate",
+        type=float,
+        default=4.0,
+        help="Maximum probe attempts per second against one host (default: 4)",
+    )
+    parser.add_argument(
+        "--region-groups",
+        dest="region_size",
+        type=int,
+        nargs="?",
+        const=DEFAULT_REGION_SIZE,
+        metavar="SIZE",
+        help="Shard auto-testing into one url-test group per region with at most "
+        f"SIZE members (default SIZE: {DEFAULT_REGION_SIZE})",
+    )
+    parser.add_argument(
+        "--group-encoding",
+        choices=GROUP_ENCODINGS,
+        default="anchor",
+        help="How groups listing every proxy are written: one anchored list "
+        "(default), repeated lists, or include-all for Clash.Meta clients",
+    )
+    parser.add_argument(
+        "--group-report",
+        action="store_true",
+        help="Report output size and parse time for every group encoding",
+    )
+    parser.add_argument(
+        "--optimize-rules",
+        choices=RULE_OPTIMIZATIONS,
+        nargs="?",
+        const="strict",
+        help="Compile the Sub-Win rules: drop dead rules, collapse CIDRs and "
+        "order cheap rules first; match-last also moves MATCH to the end",
+    )
+    parser.add_argument(
+        "--max-proxies",
+        type=int,
+        metavar="N",
+        help="Cap SubZ at N proxies, picked for region coverage, protocol "
+        "diversity and (with --probe) RTT",
+    )
+    parser.add_argument(
+        "--selection-report",
+        metavar="FILE",
+        help="With --max-proxies, write the kept and dropped proxies to FILE",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Hold proxies in a compact interned store instead of dicts "
+        "(for very large inputs; pair with --stream)",
+    )
+    parser.add_argument(
+        "--flow-proxies",
+        action="store_true",
+        help="Stream proxies one per line in flow style (smaller, constant memory)",
+    )
+    parser.add_argument(
+        "--format",
+        action="append",
+        metavar="[TARGET=]FORMAT",
+        help=f"Output format ({', '.join(OUTPUT_FORMATS)}) for all targets or one; "
+        "JSON is valid YAML for Clash cores and much faster to write and load",
+    )
+    parser.add_argument(
+        "--dump-parsed",
+        metavar="FILE",
+        help="Also save the validated proxies to FILE (.pickle) for later runs "
+        "to use as their source instead of parsing YAML",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and regenerate the targets whenever the source changes",
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        const=f"{DEFAULT_HOST}:{DEFAULT_PORT}",
+        metavar="[HOST:]PORT",
+        help="Serve the rendered targets over HTTP from memory, re-rendering "
+        f"them when the source changes (default: {DEFAULT_HOST}:{DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE * 1000,
+        metavar="MS",
+        help="With --watch/--serve, wait this long for a burst of writes to settle "
+        f"(default: {DEFAULT_DEBOUNCE * 1000:g} ms)",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="With --watch/--serve, poll the source instead of using inotify",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the parse cache for this run",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove all cached parse results before running",
+    )
+    parser.add_argument(
+        "--yaml-backend",
+        choices=BACKEND_CHOICES,
+        help="YAML implementation to use (default: libyaml when available)",
+    )
+    add_filter_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    if (args.watch or args.serve) and args.probe:
+        parser.error("--watch and --serve cannot be combined with --probe")
+    return args
 
 
+@register_target("subz", "SubZ.yml", with_names=False)
 def build_subz_config(proxies: list[dict[str, Any]]) -> dict[str, Any]:
     return {
         "port": 7890,
@@ -153,8 +320,85 @@ def build_subz_config(proxies: list[dict[str, Any]]) -> dict[str, Any]:
     }
 
 
+def build_proxy_groups(
+    proxy_names: list[str],
+    region_size: int | None = None,
+    group_encoding: str = "anchor",
+) -> list[dict[str, Any]]:
+    if region_size:
+        groups = build_region_proxy_groups(proxy_names, region_size)
+    else:
+        groups = build_flat_proxy_groups(proxy_names)
+    return encode_member_lists(groups, proxy_names, group_encoding)
+
+
+def build_flat_proxy_groups(proxy_names: list[str]) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": PRIMARY_GROUP,
+            "type": "select",
+            "proxies": [AUTO_GROUP, SELECT_GROUP],
+        },
+        {"name": SELECT_GROUP, "type": "select", "proxies": proxy_names},
+        {
+            "name": AUTO_GROUP,
+            "type": "url-test",
+            "proxies": proxy_names,
+            "url": TEST_URL,
+            "interval": 300,
+        },
+        {
+            "name": FALLBACK_GROUP,
+            "type": "fallback",
+            "proxies": proxy_names,
+            "url": TEST_URL,
+            "interval": 300,
+        },
+    ]
+
+
+def build_region_proxy_groups(
+    proxy_names: list[str], region_size: int
+) -> list[dict[str, Any]]:
+    region_names, region_groups = build_region_groups(
+        proxy_names, region_size, TEST_URL, 300
+    )
+    return [
+        {
+            "name": PRIMARY_GROUP,
+            "type": "select",
+            "proxies": [AUTO_GROUP, *region_names, SELECT_GROUP],
+        },
+        {"name": SELECT_GROUP, "type": "select", "proxies": proxy_names},
+        {
+            "name": AUTO_GROUP,
+            "type": "url-test",
+            "proxies": region_names,
+            "url": TEST_URL,
+            "interval": 300,
+        },
+        {
+            "name": FALLBACK_GROUP,
+            "type": "fallback",
+            "proxies": region_names,
+            "url": TEST_URL,
+            "interval": 300,
+        },
+        *region_groups,
+    ]
+
+
+@register_target(
+    "subwin",
+    "Sub-Win.yml",
+    options=("region_size", "group_encoding", "optimize_rules"),
+)
 def build_subwin_config(
-    proxies: list[dict[str, Any]], proxy_names: list[str]
+    proxies: list[dict[str, Any]],
+    proxy_names: list[str],
+    region_size: int | None = None,
+    group_encoding: str = "anchor",
+    optimize_rules: str | None = None,
 ) -> dict[str, Any]:
     return {
         "mixed-port": 7890,
@@ -177,104 +421,263 @@ def build_subwin_config(
             "fallback": ["94.140.14.14", "94.140.14.15"],
         },
         "proxies": proxies,
-        "proxy-groups": [
-            {
-                "name": PRIMARY_GROUP,
-                "type": "select",
-                "proxies": [AUTO_GROUP, SELECT_GROUP],
-            },
-            {"name": SELECT_GROUP, "type": "select", "proxies": proxy_names},
-            {
-                "name": AUTO_GROUP,
-                "type": "url-test",
-                "proxies": proxy_names,
-                "url": TEST_URL,
-                "interval": 300,
-            },
-            {
-                "name": FALLBACK_GROUP,
-                "type": "fallback",
-                "proxies": proxy_names,
-                "url": TEST_URL,
-                "interval": 300,
-            },
-        ],
-        "rules": [
-            "DOMAIN-SUFFIX,ad.com,REJECT",
-            "GEOIP,IR,DIRECT",
-            f"MATCH,{PRIMARY_GROUP}",
-            f"IP-CIDR,8.8.8.8/32,{PRIMARY_GROUP}",
-            f"IP-CIDR,8.8.4.4/32,{PRIMARY_GROUP}",
-            f"IP-CIDR,1.1.1.1/32,{PRIMARY_GROUP}",
-            f"IP-CIDR,1.0.0.1/32,{PRIMARY_GROUP}",
-            "SRC-IP-CIDR,192.168.1.201/32,DIRECT",
-            "IP-CIDR,10.0.0.0/8,DIRECT",
-            "IP-CIDR,172.16.0.0/12,DIRECT",
-            "IP-CIDR,127.0.0.0/8,DIRECT",
-            "IP-CIDR,192.168.0.0/16,DIRECT",
-        ],
+        "proxy-groups": build_proxy_groups(proxy_names, region_size, group_encoding),
+        "rules": build_rules(optimize_rules),
     }
 
 
-def write_yaml(path: Path, data: dict[str, Any]) -> None:
-    with path.open("w", encoding="utf-8") as handle:
-        yaml.dump(
-            data,
-            handle,
-            Dumper=yaml.SafeDumper,
-            allow_unicode=True,
-            sort_keys=False,
-            default_flow_style=False,
-        )
+def build_rules(optimize_rules: str | None = None) -> list[str]:
+    rules = [
+        "DOMAIN-SUFFIX,ad.com,REJECT",
+        "GEOIP,IR,DIRECT",
+        f"MATCH,{PRIMARY_GROUP}",
+        f"IP-CIDR,8.8.8.8/32,{PRIMARY_GROUP}",
+        f"IP-CIDR,8.8.4.4/32,{PRIMARY_GROUP}",
+        f"IP-CIDR,1.1.1.1/32,{PRIMARY_GROUP}",
+        f"IP-CIDR,1.0.0.1/32,{PRIMARY_GROUP}",
+        "SRC-IP-CIDR,192.168.1.201/32,DIRECT",
+        "IP-CIDR,10.0.0.0/8,DIRECT",
+        "IP-CIDR,172.16.0.0/12,DIRECT",
+        "IP-CIDR,127.0.0.0/8,DIRECT",
+        "IP-CIDR,192.168.0.0/16,DIRECT",
+    ]
+    if optimize_rules:
+        rules, _ = compile_rules(rules, hoist_match=optimize_rules == "match-last")
+    return rules
 
 
 def main() -> None:
     args = parse_args()
-    source_str = args.source
-    if not source_str:
+    if args.clear_cache:
+        removed = ParseCache().clear()
+        print(f"Removed {removed} cached parse result(s).")
+        if not args.source:
+            return
+
+    source_values = args.source
+    if not source_values:
         try:
-            source_str = input("Enter path to clash YAML file: ")
+            source_values = [input("Enter path to clash YAML file: ")]
         except EOFError:
-            source_str = ""
-    if not source_str:
-        raise SystemExit("No source file path provided.")
-
-    source_clean = sanitize_path(source_str)
-    if not source_clean:
+            source_values = []
+    specs = [
+        parse_source_spec(cleaned)
+        for cleaned in map(sanitize_path, source_values)
+        if cleaned
+    ]
+    if not specs:
         raise SystemExit("No source file path provided.")
-
-    source = Path(source_clean).expanduser().resolve()
-    if not source.is_file():
-        raise SystemExit(f"Source file not found: {source}")
+    for spec in specs:
+        if not spec.path.is_file():
+            raise SystemExit(f"Source file not found: {spec.path}")
+    source = specs[0].path
+    source_label = ", ".join(spec.path.name for spec in specs)
+    merging = len(specs) > 1 or bool(specs[0].prefix)
+    parsed = not merging and is_parsed_dump(source)
+    if merging and (args.watch or args.serve):
+        raise SystemExit("--watch and --serve take a single source without a prefix.")
+    if parsed and (args.watch or args.serve):
+        raise SystemExit("--watch and --serve need a YAML source, not a parsed dump.")
 
     script_dir = Path(__file__).resolve().parent
-    subz_path = (
-        Path(args.subz_output).expanduser().resolve()
-        if args.subz_output
-        else script_dir / "SubZ.yml"
+    overrides = {"subz": args.subz_output, "subwin": args.subwin_output}
+    jobs: list[tuple[Target, Path]] = []
+    for target in get_targets(args.targets):
+        override = overrides.get(target.name)
+        path = (
+            Path(override).expanduser().resolve()
+            if override
+            else script_dir / target.filename
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        jobs.append((target, path))
+
+    profiler = profiler_from_args(args, "clash")
+    filters = FilterSet.from_args(
+        args.include, args.exclude, [target.name for target, _ in jobs]
     )
-    subwin_path = (
-        Path(args.subwin_output).expanduser().resolve()
-        if args.subwin_output
-        else script_dir / "Sub-Win.yml"
+    formats = parse_formats(args.format, [target.name for target, _ in jobs])
+    proxies, proxy_names, rtts = load_proxies(args, specs, profiler, filters)
+
+    if args.region_size:
+        before = probes_per_interval(build_proxy_groups(proxy_names))
+        after = probes_per_interval(build_proxy_groups(proxy_names, args.region_size))
+        print(f"Sub-Win health checks per interval: {before} -> {after}.")
+
+    if args.optimize_rules:
+        hoist = args.optimize_rules == "match-last"
+        print(compile_rules(build_rules(), hoist)[1].format())
+
+    options = {
+        "region_size": args.region_size,
+        "group_encoding": args.group_encoding,
+        "optimize_rules": args.optimize_rules,
+    }
+    selections: dict[str, tuple[Any, list[str]]] = {}
+    selection = None
+    if filters is not None or args.max_proxies:
+        with profiler.phase("select"):
+            selections, selection = target_selections(
+                jobs, proxies, proxy_names, filters, args.max_proxies, rtts
+            )
+    if selection is not None:
+        print(selection.summary(), file=sys.stderr)
+        if args.selection_report:
+            Path(args.selection_report).write_text(
+                selection.format() + "\n", encoding="utf-8"
+            )
+    if args.group_report:
+        for target, _ in jobs:
+            if "group_encoding" not in target.options:
+                continue
+            chosen = selections.get(target.name, (proxies, proxy_names))
+            stats = measure_group_encodings(
+                lambda encoding: target.render(
+                    *chosen, {**options, "group_encoding": encoding}
+                ),
+                args.yaml_backend,
+            )
+            print(format_encoding_report(target.filename, stats))
+
+    results = emit_targets(
+        jobs,
+        proxies,
+        proxy_names,
+        args.yaml_backend,
+        args.jobs,
+        options,
+        args.flow_proxies,
+        profiler,
+        selections,
+        formats,
     )
-    subz_path.parent.mkdir(parents=True, exist_ok=True)
-    subwin_path.parent.mkdir(parents=True, exist_ok=True)
-
-    config = read_clash_config(source)
-    proxies_raw = config.get("proxies")
-    if not isinstance(proxies_raw, list):
-        raise SystemExit("The source config must contain a 'proxies' list.")
-
-    proxies, proxy_names = collect_proxies(proxies_raw)
-
-    write_yaml(subz_path, build_subz_config(proxies))
-    write_yaml(subwin_path, build_subwin_config(proxies, proxy_names))
+    for target, path in jobs:
+        result = results[target.name]
+        selected = selections.get(target.name)
+        count = f", {len(selected[0])} proxies" if selected else ""
+        print(f"{path}: {result.state} ({result.size} bytes{count})")
 
     print(
-        f"Generated {subz_path} and {subwin_path} with {len(proxies)} proxies "
-        f"based on {source.name}."
+        f"Generated {len(jobs)} target(s) with {len(proxies)} proxies "
+        f"based on {source_label}."
     )
+    profiler.finish(args.profile_jsonl)
+    if args.watch or args.serve:
+        watch_source(source, jobs, args, options, filters)
+
+
+def target_selections(
+    jobs: list[tuple[Target, Path]],
+    proxies: Any,
+    proxy_names: list[str],
+    filters: FilterSet | None = None,
+    max_proxies: int | None = None,
+    rtts: dict[str, float] | None = None,
+) -> tuple[dict[str, tuple[Any, list[str]]], SelectionReport | None]:
+    """Per-target ``(proxies, names)`` after filtering and the SubZ cap."""
+    selections: dict[str, tuple[Any, list[str]]] = {}
+    report = None
+    for target, _ in jobs:
+        if filters is not None:
+            selections[target.name] = filters.select(target.name, proxies)
+        if max_proxies and target.name == "subz":
+            chosen = selections.get(target.name, (proxies, proxy_names))[0]
+            kept, report = select_diverse(chosen, max_proxies, rtts)
+            selections[target.name] = kept, [proxy["name"] for proxy in kept]
+    return selections, report
+
+
+def watch_source(
+    source: Path,
+    jobs: list[tuple[Target, Path]],
+    args: argparse.Namespace,
+    options: dict[str, Any],
+    filters: FilterSet | None = None,
+) -> None:
+    """Regenerate ``jobs`` from warm state whenever ``source`` changes.
+
+    With ``--watch`` the files are rewritten, with ``--serve`` the rendered
+    text is published to the HTTP server.
+    """
+    warm = WarmSource(source, args.yaml_backend)
+    formats = parse_formats(args.format, [target.name for target, _ in jobs])
+    renderer = WarmRenderer(args.yaml_backend, args.flow_proxies, formats)
+    server = ProfileServer() if args.serve else None
+
+    def full_parse(raw: str) -> list[Any]:
+        config = load_yaml(raw, args.yaml_backend)
+        entries = config.get("proxies") if isinstance(config, dict) else None
+        if not isinstance(entries, list):
+            raise SystemExit("The source config must contain a 'proxies' list.")
+        return entries
+
+    def regenerate(changed: set[Path] | None = None) -> None:
+        started = time.perf_counter()
+        try:
+            proxies, proxy_names = collect_proxies(
+                warm.load(full_parse), filters=filters
+            )
+        except (OSError, SystemExit, yaml.YAMLError) as exc:
+            # Editors that save by rename can leave the source briefly missing.
+            print(f"{source.name}: not regenerated ({exc})", file=sys.stderr)
+            return
+        if args.dedup:
+            proxies, proxy_names, _ = dedupe_proxies(proxies)
+        selections, _ = target_selections(
+            jobs, proxies, proxy_names, filters, args.max_proxies
+        )
+        updated = []
+        for target, path in jobs:
+            try:
+                text = renderer.update(
+                    target,
+                    *selections.get(target.name, (proxies, proxy_names)),
+                    options,
+                )
+                if text is None:
+                    continue
+                if server is not None:
+                    server.publish(target.filename, text, formats[target.name])
+                    updated.append(target.filename)
+                if args.watch and write_if_changed(path, text).written:
+                    updated.append(path.name)
+            except (OSError, SystemExit, yaml.YAMLError) as exc:
+                # A full disk or a read-only output must not end the watch.
+                print(f"{path.name}: not written ({exc})", file=sys.stderr)
+        renderer.prune(proxies)
+        if changed is None:
+            return
+        parsed = "full parse" if warm.fell_back else f"{warm.parsed} proxies re-parsed"
+        outputs = ", ".join(dict.fromkeys(updated)) or "no output"
+        print(
+            f"{source.name} changed: {outputs} updated in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms ({parsed})."
+        )
+
+    regenerate()  # warm the caches
+    watcher = open_watcher([source], poll=args.poll)
+    print(f"Watching {source} ({type(watcher).__name__}); press Ctrl+C to stop.")
+    try:
+        if server is None:
+            watch(watcher, regenerate, max(0.0, args.debounce) / 1000)
+        else:
+            stopped = threading.Event()
+            thread = threading.Thread(
+                target=watch,
+                args=(watcher, regenerate, max(0.0, args.debounce) / 1000),
+                kwargs={"stop": stopped.is_set},
+                daemon=True,
+            )
+            thread.start()
+            try:
+                asyncio.run(server.serve(*parse_listen_address(args.serve)))
+            finally:
+                stopped.set()
+                thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Convert a whole directory (or glob) of Clash subscriptions concurrently.
+
+Each source goes through the usual read_clash_config -> collect_proxies ->
+build_* pipeline in a worker process, and its profiles are written into an
+output tree that mirrors the input layout:
+
+    subs/acme/main.yaml -> profiles/acme/main/SubZ.yml, .../Sub-Win.yml
+
+Sources that would share a subtree (``main.yaml`` next to ``main.yml``) keep
+their suffix instead: ``profiles/acme/main.yaml/``, ``profiles/acme/main.yml/``.
+
+Example:
+    python clashbatch.py C:/subs -o C:/profiles
+    python clashbatch.py "subs/**/*.yaml" -j 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+import yaml
+
+from clash import collect_proxies, read_clash_config, sanitize_path
+from clashengine import TARGETS, get_targets, write_target
+from clashyaml import BACKEND_CHOICES
+
+SOURCE_SUFFIXES = {".yaml", ".yml"}
+
+
+class BatchResult(NamedTuple):
+    source: Path
+    proxies: int
+    written: int
+    error: str | None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Convert every Clash YAML file in a directory or glob."
+    )
+    parser.add_argument(
+        "source",
+        help="Directory to scan recursively, or a glob such as 'subs/**/*.yaml'",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default="profiles",
+        help="Root of the mirrored output tree (default: ./profiles)",
+    )
+    parser.add_argument(
+        "-t",
+        "--target",
+        dest="targets",
+        action="append",
+        choices=sorted(TARGETS),
+        help="Target to generate; repeat for several (default: all targets)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--yaml-backend",
+        choices=BACKEND_CHOICES,
+        help="YAML implementation to use (default: libyaml when available)",
+    )
+    return parser.parse_args()
+
+
+def discover_sources(pattern: str) -> tuple[Path, list[Path]]:
+    """Return the base directory used for mirroring and the matched files."""
+    root = Path(pattern).expanduser()
+    if root.is_dir():
+        base = root.resolve()
+        files = [
+            path
+            for path in base.rglob("*")
+            if path.suffix.lower() in SOURCE_SUFFIXES and path.is_file()
+        ]
+    else:
+        files = [
+            Path(match).resolve()
+            for match in glob.glob(str(root), recursive=True)
+            if Path(match).is_file()
+        ]
+        if not files:
+            return Path.cwd(), []
+        base = Path(os.path.commonpath([path.parent for path in files]))
+    return base, sorted(files)
+
+
+def output_dirs(base: Path, sources: list[Path], root: Path) -> dict[Path, Path]:
+    """Map each source to its output subtree, keeping the suffix on clashes.
+
+    Names are compared case-insensitively, as on Windows and macOS.
+    """
+    stems: dict[str, int] = {}
+    for source in sources:
+        key = str(source.relative_to(base).with_suffix("")).casefold()
+        stems[key] = stems.get(key, 0) + 1
+    dirs = {}
+    for source in sources:
+        relative = source.relative_to(base)
+        if stems[str(relative.with_suffix("")).casefold()] == 1:
+            relative = relative.with_suffix("")
+        dirs[source] = root / relative
+    return dirs
+
+
+def convert_file(
+    source: Path,
+    destination: Path,
+    target_names: list[str] | None,
+    backend: str | None,
+) -> BatchResult:
+    try:
+        config = read_clash_config(source, backend)
+        proxies_raw = config.get("proxies")
+        if not isinstance(proxies_raw, list):
+            raise SystemExit("The source config must contain a 'proxies' list.")
+        proxies, proxy_names = collect_proxies(proxies_raw)
+        destination.mkdir(parents=True, exist_ok=True)
+        written = 0
+        for target in get_targets(target_names):
+            result = write_target(
+                target, destination / target.filename, proxies, proxy_names, backend
+            )
+            written += result.written
+    except SystemExit as exc:
+        return BatchResult(source, 0, 0, str(exc))
+    except (OSError, yaml.YAMLError) as exc:
+        return BatchResult(source, 0, 0, f"{type(exc).__name__}: {exc}")
+    return BatchResult(source, len(proxies), written, None)
+
+
+def main() -> None:
+    args = parse_args()
+    base, sources = discover_sources(sanitize_path(args.source))
+    output_root = Path(sanitize_path(args.output_dir)).expanduser().resolve()
+    sources = [path for path in sources if not path.is_relative_to(output_root)]
+    if not sources:
+        raise SystemExit(f"No YAML sources found for {args.source}.")
+
+    destinations = output_dirs(base, sources, output_root)
+    started = time.perf_counter()
+    results: list[BatchResult] = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [
+            pool.submit(
+                convert_file,
+                source,
+                destinations[source],
+                args.targets,
+                args.yaml_backend,
+            )
+            for source in sources
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result.error:
+                print(f"FAILED {result.source}: {result.error}", file=sys.stderr)
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    failures = sum(1 for result in results if result.error)
+    proxies = sum(result.proxies for result in results)
+    written = sum(result.written for result in results)
+    print(
+        f"Converted {len(results) - failures}/{len(results)} files into "
+        f"{output_root} ({written} profiles written) in {elapsed:.2f}s: "
+        f"{len(results) / elapsed:.1f} files/s, {proxies / elapsed:.0f} proxies/s, "
+        f"{failures} failure(s)."
+    )
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Content-addressed on-disk cache of collected proxies.
+
+Entries are keyed by a SHA-256 of the source bytes plus the parser version,
+and hold the already-validated ``(proxies, proxy_names)`` pair as a pickle so
+an unchanged source skips reading and parsing YAML entirely. The cache is
+bounded in size; the least recently used entries are evicted first.
+
+The cache lives in ``$CLASH_CACHE_DIR`` when set, otherwise in the platform
+cache directory.
+
+:func:`write_parsed`/:func:`read_parsed` handle the same pickle as a
+standalone file (``--dump-parsed``) that later runs take as their source
+instead of a YAML config.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from clashio import write_atomic
+
+CACHE_VERSION = 3  # 2: per-type proxy validation, 3: serverless types
+PARSER_VERSION = f"{CACHE_VERSION}:pyyaml-{yaml.__version__}"
+CACHE_ENV = "CLASH_CACHE_DIR"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+SUFFIX = ".pickle"
+
+Entry = tuple[list[dict[str, Any]], list[str]]
+
+
+def is_parsed_dump(path: Path) -> bool:
+    return path.suffix == SUFFIX
+
+
+def write_parsed(path: Path, proxies: Any, names: list[str]) -> None:
+    """Write validated proxies as a standalone dump for :func:`read_parsed`."""
+    payload = {"version": PARSER_VERSION, "proxies": proxies, "names": names}
+    write_atomic(path, pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+
+
+def read_parsed(path: Path) -> Entry:
+    """Load a :func:`write_parsed` dump. Only load dumps you wrote yourself:
+    unpickling runs code."""
+    try:
+        with path.open("rb") as handle:
+            payload = pickle.load(handle)
+    except (pickle.UnpicklingError, EOFError, ValueError, TypeError) as exc:
+        raise SystemExit(f"{path} is not a parsed proxy dump: {exc}") from exc
+    if not isinstance(payload, dict) or "proxies" not in payload:
+        raise SystemExit(f"{path} is not a parsed proxy dump.")
+    if payload.get("version") != PARSER_VERSION:
+        raise SystemExit(
+            f"{path} was written by another version; recreate it with --dump-parsed."
+        )
+    return payload["proxies"], payload["names"]
+
+
+def default_cache_dir() -> Path:
+    override = os.environ.get(CACHE_ENV)
+    if override:
+        return Path(override).expanduser()
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "clash-profiles"
+
+
+class ParseCache:
+    """Size-bounded LRU cache of ``collect_proxies`` results."""
+
+    def __init__(
+        self, directory: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key_for(self, source: Path, extra: str = "") -> str:
+        """Hash the source contents together with everything that shapes
+        the cached result (parser version plus caller-supplied ``extra``)."""
+        digest = hashlib.sha256()
+        digest.update(PARSER_VERSION.encode())
+        digest.update(b"\0")
+        digest.update(extra.encode("utf-8"))
+        digest.update(b"\0")
+        with source.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    def get(self, key: str) -> Entry | None:
+        path = self._path(key)
+        try:
+            with path.open("rb") as handle:
+                proxies, names = pickle.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return proxies, names
+
+    def put(self, key: str, proxies: list[dict[str, Any]], names: list[str]) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    pickle.dump((proxies, names), handle, pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_name, self._path(key))
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except (OSError, pickle.PicklingError, TypeError) as exc:
+            print(f"Could not write parse cache: {exc}", file=sys.stderr)
+            return
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under ``max_bytes``."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        if not self.directory.is_dir():
+            return 0
+        removed = 0
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
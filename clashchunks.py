@@ -0,0 +1,131 @@
+"""
+Parallel parsing of the ``proxies`` sequence in independent chunks.
+
+A single YAML parse is single-threaded and, for large subscriptions, almost
+all of it is spent in ``proxies``. The block is split on its item
+boundaries, i.e. the lines that start a top-level ``- `` item at the
+sequence's own indentation. In block style (``clash.yaml``) that is one item
+per several lines, in flow style (``Sub.yml``) one per line. Each run of
+items is a valid YAML sequence on its own, so the runs are parsed in a
+process pool with the usual loader (:class:`clashyaml.RelaxedLoader` tag
+handling included) and concatenated in order.
+
+:func:`split_proxies` gives up, so that the caller parses normally, whenever
+the boundaries cannot be trusted: no plain top-level ``proxies:`` key, more
+than one, lines indented less than the items, tabs, document markers or
+directives, or anchors and aliases (which may cross items). A chunk that
+fails to parse or yields the wrong number of items also means a fallback,
+so that errors are reported by the regular parser.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from clashyaml import load_yaml
+
+_HEADER_RE = re.compile(r"proxies:[ \t]*(?:#.*)?")
+_ITEM_RE = re.compile(r"( *)-(?: |$)")
+_ANCHOR_RE = re.compile(r"(?:^|[\s\[{,])[&*][^\s,\[\]{}]", re.MULTILINE)
+CHUNKS_PER_WORKER = 4
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def split_proxies(raw: str) -> list[list[str]] | None:
+    """The items of the top-level ``proxies`` block, as lists of lines.
+
+    Returns None when the boundaries are ambiguous (see the module docstring).
+    """
+    lines = raw.removeprefix("\ufeff").splitlines(keepends=True)
+    if any(line.startswith(("---", "...", "%")) for line in lines):
+        return None
+    headers = [
+        index
+        for index, line in enumerate(lines)
+        if _HEADER_RE.fullmatch(line.rstrip("\r\n"))
+    ]
+    if len(headers) != 1:
+        return None
+
+    items: list[list[str]] = []
+    item_indent: int | None = None
+    for line in lines[headers[0] + 1 :]:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            if items:
+                items[-1].append(line)
+            continue
+        if "\t" in line[: _indent(line) + 1]:
+            return None
+        indent = _indent(line)
+        match = _ITEM_RE.match(line)
+        if item_indent is None:
+            if match is None:
+                return None  # not a block sequence
+            item_indent = len(match.group(1))
+        if match is not None and indent == item_indent:
+            items.append([line])
+        elif indent > item_indent:
+            items[-1].append(line)
+        elif indent == 0:
+            break  # the next top-level key
+        else:
+            return None
+    if not items or _ANCHOR_RE.search("".join(map("".join, items))):
+        return None
+    return items
+
+
+def _parse_chunk(text: str, backend: str | None) -> list[Any]:
+    return load_yaml(text, backend)
+
+
+def parse_proxies_parallel(
+    raw: str, backend: str | None = None, workers: int | None = None
+) -> list[Any] | None:
+    """The ``proxies`` entries of ``raw``, parsed in chunks across ``workers``
+    processes (default: one per CPU). None means: parse normally instead."""
+    items = split_proxies(raw)
+    if items is None:
+        return None
+    workers = workers or os.cpu_count() or 1
+    count = max(1, min(len(items), workers * CHUNKS_PER_WORKER))
+    size = -(-len(items) // count)
+    groups = [items[start : start + size] for start in range(0, len(items), size)]
+    texts = ["".join(line for item in group for line in item) for group in groups]
+
+    try:
+        if workers <= 1 or len(texts) <= 1:
+            results = [_parse_chunk(text, backend) for text in texts]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_parse_chunk, texts, [backend] * len(texts)))
+    except yaml.YAMLError:
+        return None
+
+    entries: list[Any] = []
+    for group, result in zip(groups, results):
+        if not isinstance(result, list) or len(result) != len(group):
+            return None
+        entries.extend(result)
+    return entries
+
+
+def load_proxies_parallel(
+    path: Path, backend: str | None = None, workers: int | None = None
+) -> list[Any] | None:
+    """File-level wrapper around :func:`parse_proxies_parallel`."""
+    try:
+        raw = path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        raw = path.read_text(encoding="utf-8", errors="ignore")
+    return parse_proxies_parallel(raw, backend, workers)
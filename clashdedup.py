@@ -0,0 +1,167 @@
+"""
+Proxy deduplication and unique-name enforcement.
+
+Two entries are functional duplicates when they share the same canonical
+connection tuple for their ``type`` (server, port, credentials and transport
+settings). Only the first occurrence is kept. Names that still collide
+afterwards are made unique deterministically by appending `` (2)``, `` (3)``...
+Everything runs in a single O(n) pass over hash-indexed keys.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Hashable
+
+# Fields that identify the remote endpoint per proxy type. Cosmetic or purely
+# client-side options (name, udp, tfo, client-fingerprint, ...) are ignored.
+CONNECTION_FIELDS: dict[str, tuple[str, ...]] = {
+    "ss": ("server", "port", "cipher", "password", "plugin", "plugin-opts"),
+    "ssr": (
+        "server",
+        "port",
+        "cipher",
+        "password",
+        "obfs",
+        "obfs-param",
+        "protocol",
+        "protocol-param",
+    ),
+    "trojan": ("server", "port", "password", "sni", "network", "ws-opts", "grpc-opts"),
+    "vless": (
+        "server",
+        "port",
+        "uuid",
+        "flow",
+        "network",
+        "tls",
+        "servername",
+        "reality-opts",
+        "ws-opts",
+        "grpc-opts",
+        "http-opts",
+    ),
+    "vmess": (
+        "server",
+        "port",
+        "uuid",
+        "alterId",
+        "cipher",
+        "network",
+        "tls",
+        "servername",
+        "ws-opts",
+        "grpc-opts",
+        "http-opts",
+    ),
+    "hysteria2": (
+        "server",
+        "port",
+        "ports",
+        "password",
+        "auth",
+        "sni",
+        "obfs",
+        "obfs-password",
+    ),
+    "http": ("server", "port", "username", "password", "tls", "sni"),
+    "socks5": ("server", "port", "username", "password", "tls", "sni"),
+}
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, Mapping):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def connection_key(proxy: dict[str, Any]) -> tuple[Hashable, ...]:
+    """Canonical, hashable description of where and how ``proxy`` connects."""
+    kind = str(proxy.get("type", "")).strip().lower()
+    fields = CONNECTION_FIELDS.get(kind)
+    if fields is None:
+        fields = tuple(sorted(str(key) for key in proxy if key != "name"))
+    values: list[Hashable] = [kind]
+    for name in fields:
+        value = proxy.get(name)
+        if name == "server" and isinstance(value, str):
+            value = value.strip().lower().rstrip(".")
+        elif name == "port" and value is not None:
+            value = str(value).strip()
+        values.append((name, _freeze(value)))
+    return tuple(values)
+
+
+@dataclass
+class DedupReport:
+    merged: list[tuple[str, str]] = field(default_factory=list)  # (dropped, kept)
+    renamed: list[tuple[str, str]] = field(default_factory=list)  # (old, new)
+
+    def summary(self) -> str:
+        return (
+            f"Merged {len(self.merged)} duplicate proxies and renamed "
+            f"{len(self.renamed)} colliding names."
+        )
+
+    def format(self) -> str:
+        lines = [self.summary()]
+        lines.extend(f"merged: {dropped} -> {kept}" for dropped, kept in self.merged)
+        lines.extend(f"renamed: {old} -> {new}" for old, new in self.renamed)
+        return "\n".join(lines)
+
+
+def unique_name(name: str, taken: set[str], suffixes: dict[str, int]) -> str:
+    """The first free ``name (N)``, N >= 2, which is then added to ``taken``.
+
+    ``suffixes`` remembers where each base name's search stopped, so renaming
+    k entries of the same name stays O(k) rather than O(k²).
+    """
+    counter = suffixes.get(name, 2)
+    while f"{name} ({counter})" in taken:
+        counter += 1
+    suffixes[name] = counter + 1
+    new_name = f"{name} ({counter})"
+    taken.add(new_name)
+    return new_name
+
+
+def dedupe_proxies(
+    proxies: list[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], list[str], DedupReport]:
+    """Drop functional duplicates and make the remaining names unique.
+
+    Renamed entries are shallow copies; the input dicts are left untouched.
+    """
+    report = DedupReport()
+    kept_by_key: dict[tuple[Hashable, ...], str] = {}
+    unique: list[dict[str, Any]] = []
+    for proxy in proxies:
+        key = connection_key(proxy)
+        kept = kept_by_key.get(key)
+        if kept is not None:
+            report.merged.append((proxy["name"], kept))
+            continue
+        kept_by_key[key] = proxy["name"]
+        unique.append(proxy)
+
+    # Reserve every original name first so generated suffixes never steal a
+    # name that appears later in the list.
+    taken = {proxy["name"] for proxy in unique}
+    suffixes: dict[str, int] = {}
+    seen: set[str] = set()
+    names: list[str] = []
+    for index, proxy in enumerate(unique):
+        name = proxy["name"]
+        if name in seen:
+            new_name = unique_name(name, taken, suffixes)
+            report.renamed.append((name, new_name))
+            unique[index] = {**proxy, "name": new_name}
+            name = new_name
+        seen.add(name)
+        names.append(name)
+    return unique, names, report
@@ -0,0 +1,241 @@
+"""
+Constant-memory streaming writer for Clash profiles.
+
+The generic dumper builds one event stream for the whole document and emits
+every proxy in block style. This writer instead:
+
+* renders the static part of a target before ``proxies`` (ports, ``dns``,
+  ``tun``...) once and reuses it,
+* streams ``proxies`` one entry per line in flow style, like ``Sub.yml``,
+* renders whatever follows (``proxy-groups``, ``rules``) with the regular
+  dumper,
+
+yielding text chunks so the caller can write them incrementally. Scalars are
+quoted with PyYAML's own analysis and resolver, so the output loads back with
+``yaml.safe_load`` to exactly the same data as :func:`clashyaml.dump_yaml`.
+
+:func:`dump_json` is the ``--format json`` alternative: JSON is a subset of
+YAML that Clash cores read directly, and the stdlib encoder is far faster
+than any YAML emitter.
+"""
+
+from __future__ import annotations
+
+import datetime
+import io
+import json
+import math
+import re
+from collections.abc import Iterable as IterableABC
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Iterable, Iterator
+
+import yaml
+
+from clashyaml import dump_yaml
+
+PROXIES_KEY = "proxies"
+
+_STR_TAG = "tag:yaml.org,2002:str"
+_analyzer = yaml.emitter.Emitter(io.StringIO(), allow_unicode=True)
+_resolver = yaml.resolver.Resolver()
+_header_cache: dict[str, str] = {}
+
+
+def _printable(ch: str) -> bool:
+    # As Emitter.write_double_quoted: line breaks (\x85, \u2028, \u2029) and
+    # the BOM are escaped even though they are printable.
+    if ch in "\x85\u2028\u2029\ufeff":
+        return False
+    return (
+        "\x20" <= ch <= "\x7e"
+        or "\xa0" <= ch <= "\ud7ff"
+        or "\ue000" <= ch <= "\ufffd"
+        or "\U00010000" <= ch <= "\U0010ffff"
+    )
+
+
+def _double_quoted(value: str) -> str:
+    parts = ['"']
+    for ch in value:
+        if ch in '"\\':
+            parts.append("\\" + ch)
+        elif _printable(ch):
+            parts.append(ch)
+        elif ch in yaml.emitter.Emitter.ESCAPE_REPLACEMENTS:
+            parts.append("\\" + yaml.emitter.Emitter.ESCAPE_REPLACEMENTS[ch])
+        elif ch <= "\xff":
+            parts.append(f"\\x{ord(ch):02X}")
+        elif ch <= "\uffff":
+            parts.append(f"\\u{ord(ch):04X}")
+        else:
+            parts.append(f"\\U{ord(ch):08X}")
+    parts.append('"')
+    return "".join(parts)
+
+
+@lru_cache(maxsize=65536)
+def _string(value: str) -> str:
+    implicit = _resolver.resolve(yaml.ScalarNode, value, (True, False))
+    if implicit == _STR_TAG:
+        analysis = _analyzer.analyze_scalar(value)
+        if analysis.allow_flow_plain and not analysis.multiline:
+            return value
+    return _double_quoted(value)
+
+
+def _float(value: float) -> str:
+    if math.isnan(value):
+        return ".nan"
+    if math.isinf(value):
+        return ".inf" if value > 0 else "-.inf"
+    text = repr(value).lower()
+    if "." not in text and "e" in text:
+        text = text.replace("e", ".0e", 1)
+    return text
+
+
+def render_flow(value: Any) -> str:
+    """Render ``value`` as a single-line YAML flow node."""
+    if isinstance(value, str):
+        return _string(value)
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return _float(value)
+    if isinstance(value, dict):
+        items = ", ".join(
+            f"{render_flow(key)}: {render_flow(item)}" for key, item in value.items()
+        )
+        return "{" + items + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(render_flow(item) for item in value) + "]"
+    if isinstance(value, Mapping):  # compact records, see clashstore
+        items = ", ".join(
+            f"{render_flow(key)}: {render_flow(item)}" for key, item in value.items()
+        )
+        return "{" + items + "}"
+    # Anything else (dates, bytes...) falls back to the regular dumper.
+    return dump_yaml(value, None).rstrip("\n").removesuffix("\n...")
+
+
+def render_header(section: dict[str, Any], backend: str | None = None) -> str:
+    """Block-style text for a static section, rendered once per process."""
+    if not section:
+        return ""
+    key = repr(section)
+    cached = _header_cache.get(key)
+    if cached is None:
+        cached = _header_cache[key] = dump_yaml(section, None, backend)
+    return cached
+
+
+def _split_document(
+    config: dict[str, Any],
+) -> tuple[dict[str, Any], Iterable[Any] | None, bool, dict[str, Any]]:
+    head: dict[str, Any] = {}
+    tail: dict[str, Any] = {}
+    proxies: Iterable[Any] | None = None
+    has_proxies = False
+    for key, value in config.items():
+        if key == PROXIES_KEY:
+            proxies, has_proxies = value, True
+        elif has_proxies:
+            tail[key] = value
+        else:
+            head[key] = value
+    return head, proxies, has_proxies, tail
+
+
+def iter_flow_document(
+    config: dict[str, Any], backend: str | None = None
+) -> Iterator[str]:
+    """Yield the text of ``config`` chunk by chunk, proxies one per line.
+
+    ``config[PROXIES_KEY]`` may be any iterable, so proxies can be streamed
+    straight from a parser without materialising a list.
+    """
+    head, proxies, has_proxies, tail = _split_document(config)
+    yield render_header(head, backend)
+    if has_proxies:
+        empty = True
+        for proxy in proxies or ():
+            if empty:
+                yield f"{PROXIES_KEY}:\n"
+                empty = False
+            yield f"- {render_flow(proxy)}\n"
+        if empty:
+            yield f"{PROXIES_KEY}: []\n"
+    if tail:
+        yield dump_yaml(tail, None, backend)
+
+
+def iter_block_document(
+    config: dict[str, Any], backend: str | None = None
+) -> Iterator[str]:
+    """Like :func:`iter_flow_document`, but byte-identical to ``dump_yaml``.
+
+    Every proxy is dumped on its own, so only one of them is ever expanded
+    into a dict and a node tree at a time.
+    """
+    head, proxies, has_proxies, tail = _split_document(config)
+    yield render_header(head, backend)
+    if has_proxies:
+        empty = True
+        for proxy in proxies or ():
+            if empty:
+                yield f"{PROXIES_KEY}:\n"
+                empty = False
+            yield dump_yaml([proxy], None, backend)
+        if empty:
+            yield f"{PROXIES_KEY}: []\n"
+    if tail:
+        yield dump_yaml(tail, None, backend)
+
+
+# Characters JSON leaves raw that YAML would treat as line breaks or reject
+# as non-printable; escaping them keeps the output a valid YAML document.
+_JSON_YAML_UNSAFE = re.compile("[\x7f-\x9f\u2028\u2029\ufeff\ufffe\uffff]")
+# YAML 1.1 needs a dot in the mantissa ("1.0e+20"); json writes "1e+20", which
+# would load back as a string. Strings are matched whole so they are skipped.
+_JSON_BARE_EXPONENT = re.compile(r'"(?:[^"\\]|\\.)*"|(?<![\d.])(-?\d+)(e[-+]\d+)')
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Mapping):  # compact records, see clashstore
+        return dict(value.items())
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, IterableABC) and not isinstance(value, (str, bytes)):
+        return list(value)  # proxy stores and streamed proxies
+    raise TypeError(f"{type(value).__name__} values cannot be written as JSON")
+
+
+def dump_json(config: Mapping[str, Any]) -> str:
+    """``config`` as compact JSON text that also loads as YAML."""
+    try:
+        text = json.dumps(
+            config,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=_json_default,
+        )
+    except (TypeError, ValueError) as exc:
+        raise SystemExit(f"Cannot write JSON output: {exc}") from exc
+    if _JSON_YAML_UNSAFE.search(text):
+        text = _JSON_YAML_UNSAFE.sub(lambda match: f"\\u{ord(match[0]):04x}", text)
+    if "e+" in text or "e-" in text:
+        text = _JSON_BARE_EXPONENT.sub(_dotted_exponent, text)
+    return text + "\n"
+
+
+def _dotted_exponent(match: re.Match[str]) -> str:
+    if match[1] is None:
+        return match[0]
+    return f"{match[1]}.0{match[2]}"
@@ -0,0 +1,431 @@
+"""
+Shared conversion engine: parse a source once, then emit every target.
+
+:func:`load_proxies` is the loading pipeline every entry point shares: parse
+cache, merged sources, parsed dumps, streaming or parallel parsing,
+validation and filters, then dedup, probing, selection and compaction, each
+as requested on the command line.
+
+Output flavours register themselves with :func:`register_target`. A target
+builder receives the collected proxies (and, if it asks for them, their names)
+plus any keyword options it declared, and returns the document to serialize.
+:func:`emit_targets` renders and writes the requested targets concurrently in
+a process pool, so the wall-clock cost is roughly one parse plus the slowest
+single dump.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+import yaml
+
+from clashcache import ParseCache, is_parsed_dump, read_parsed, write_parsed
+from clashchunks import load_proxies_parallel
+from clashdedup import dedupe_proxies
+from clashemit import (
+    PROXIES_KEY,
+    dump_json,
+    iter_block_document,
+    iter_flow_document,
+)
+from clashfilter import FilterSet
+from clashio import WriteResult, write_chunks_if_changed, write_if_changed
+from clashmerge import SourceSpec, merge_sources
+from clashprobe import run_probe
+from clashprofile import NO_PROFILER, Profiler
+from clashschema import ValidationReport, validate_proxies
+from clashselect import select_diverse
+from clashstore import ProxyStore, compact
+from clashstream import stream_proxies
+from clashyaml import dump_yaml, load_yaml
+
+Builder = Callable[..., dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Target:
+    name: str
+    filename: str
+    build: Builder
+    with_names: bool = True
+    options: tuple[str, ...] = ()
+
+    def render(
+        self,
+        proxies: list[dict[str, Any]],
+        proxy_names: list[str],
+        options: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        kwargs = {
+            key: value
+            for key, value in (options or {}).items()
+            if key in self.options and value is not None
+        }
+        if self.with_names:
+            return self.build(proxies, proxy_names, **kwargs)
+        return self.build(proxies, **kwargs)
+
+
+TARGETS: dict[str, Target] = {}
+OUTPUT_FORMATS = ("yaml", "json")
+
+
+def register_target(
+    name: str,
+    filename: str,
+    *,
+    with_names: bool = True,
+    options: tuple[str, ...] = (),
+) -> Callable[[Builder], Builder]:
+    """Decorator registering ``func`` as the builder for target ``name``.
+
+    ``options`` lists the keyword arguments the builder accepts; only those
+    are forwarded from the options passed to :func:`emit_targets`.
+    """
+
+    def decorator(func: Builder) -> Builder:
+        TARGETS[name] = Target(name, filename, func, with_names, options)
+        return func
+
+    return decorator
+
+
+def get_targets(names: list[str] | None = None) -> list[Target]:
+    if not names:
+        return list(TARGETS.values())
+    missing = [name for name in names if name not in TARGETS]
+    if missing:
+        raise SystemExit(
+            f"Unknown target(s): {', '.join(missing)}; "
+            f"available: {', '.join(TARGETS)}."
+        )
+    return [TARGETS[name] for name in dict.fromkeys(names)]
+
+
+def parse_formats(values: list[str] | None, targets: list[str]) -> dict[str, str]:
+    """``[TARGET=]FORMAT`` values -> output format per target name."""
+    formats = dict.fromkeys(targets, OUTPUT_FORMATS[0])
+    for value in values or ():
+        target, _, fmt = value.rpartition("=")
+        fmt = fmt.strip().lower()
+        if fmt not in OUTPUT_FORMATS:
+            raise SystemExit(
+                f"Unknown format {fmt!r}; expected one of {', '.join(OUTPUT_FORMATS)}."
+            )
+        if target and target not in formats:
+            raise SystemExit(
+                f"Unknown target {target!r} in --format {value!r}; "
+                f"available: {', '.join(targets)}."
+            )
+        for name in [target] if target else targets:
+            formats[name] = fmt
+    return formats
+
+
+def write_document(
+    path: Path,
+    config: dict[str, Any],
+    backend: str | None = None,
+    flow: bool = False,
+    profiler: Profiler = NO_PROFILER,
+    fmt: str = "yaml",
+) -> WriteResult:
+    """Serialize ``config`` and write it only if the bytes changed.
+
+    With ``flow`` the proxies are streamed one per line by
+    :mod:`clashemit` instead of going through a single ``yaml.dump``; a
+    :class:`~clashstore.ProxyStore` is also dumped one proxy at a time. An
+    enabled ``profiler`` gets separate serialize and write phases, so the
+    flow output is then joined in memory instead of streamed. ``fmt="json"``
+    writes compact JSON instead (``flow`` does not apply).
+    """
+    chunks: Iterator[str] | None = None
+    if fmt == "json":
+        pass
+    elif flow:
+        chunks = iter_flow_document(config, backend)
+    elif isinstance(config.get(PROXIES_KEY), ProxyStore):
+        # Expand one compact record at a time instead of the whole list.
+        chunks = iter_block_document(config, backend)
+
+    if not profiler.enabled:
+        if fmt == "json":
+            return write_if_changed(path, dump_json(config))
+        if chunks is not None:
+            return write_chunks_if_changed(path, chunks)
+        return write_if_changed(path, dump_yaml(config, None, backend))
+
+    with profiler.phase("serialize"):
+        if fmt == "json":
+            text = dump_json(config)
+        elif chunks is not None:
+            text = "".join(chunks)
+        else:
+            text = dump_yaml(config, None, backend)
+    with profiler.phase("write"):
+        result = write_if_changed(path, text)
+    profiler.record_output(path, result.size)
+    return result
+
+
+def write_target(
+    target: Target,
+    path: Path,
+    proxies: list[dict[str, Any]],
+    proxy_names: list[str],
+    backend: str | None = None,
+    options: dict[str, Any] | None = None,
+    flow: bool = False,
+    profiler: Profiler = NO_PROFILER,
+    fmt: str = "yaml",
+) -> WriteResult:
+    """Build and serialize one target, writing it only if the bytes changed."""
+    with profiler.phase("build"):
+        config = target.render(proxies, proxy_names, options)
+    return write_document(path, config, backend, flow, profiler, fmt)
+
+
+def emit_targets(
+    jobs: list[tuple[Target, Path]],
+    proxies: list[dict[str, Any]],
+    proxy_names: list[str],
+    backend: str | None = None,
+    workers: int | None = None,
+    options: dict[str, Any] | None = None,
+    flow: bool = False,
+    profiler: Profiler = NO_PROFILER,
+    selections: dict[str, tuple[Any, list[str]]] | None = None,
+    formats: dict[str, str] | None = None,
+) -> dict[str, WriteResult]:
+    """Write every ``(target, path)`` pair, in parallel when worthwhile.
+
+    Returns the write result per target name. Targets are written in-process
+    when ``profiler`` is enabled so that its phases see the work.
+    ``selections`` maps target names to their own ``(proxies, names)``, e.g.
+    from per-target filters; other targets get ``proxies``. ``formats``
+    maps target names to an output format (default ``yaml``).
+    """
+    formats = formats or {}
+    selected = {
+        target.name: (selections or {}).get(target.name, (proxies, proxy_names))
+        for target, _ in jobs
+    }
+    if workers is None:
+        workers = min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1 or profiler.enabled:
+        return {
+            target.name: write_target(
+                target,
+                path,
+                *selected[target.name],
+                backend,
+                options,
+                flow,
+                profiler,
+                formats.get(target.name, "yaml"),
+            )
+            for target, path in jobs
+        }
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            target.name: pool.submit(
+                write_target,
+                target,
+                path,
+                *selected[target.name],
+                backend,
+                options,
+                flow=flow,
+                fmt=formats.get(target.name, "yaml"),
+            )
+            for target, path in jobs
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def read_clash_config(
+    path: Path, backend: str | None = None, profiler: Profiler = NO_PROFILER
+) -> dict[str, Any]:
+    with profiler.phase("read"):
+        try:
+            raw = path.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            raw = path.read_text(encoding="utf-8", errors="ignore")
+
+    try:
+        with profiler.phase("parse"):
+            data = load_yaml(raw, backend)
+    except yaml.YAMLError as exc:
+        raise SystemExit(f"Failed to parse {path}: {exc}") from exc
+
+    if not isinstance(data, dict):
+        raise SystemExit(f"{path} does not contain a valid Clash mapping.")
+    return data
+
+
+def collect_proxies(
+    entries: Iterable[Any], compact: bool = False, filters: FilterSet | None = None
+) -> tuple[list[dict[str, Any]] | ProxyStore, list[str]]:
+    report = ValidationReport()
+    valid = validate_proxies(entries, report)
+    if filters is not None:
+        valid = filters.apply(valid)
+    proxies = ProxyStore(valid) if compact else list(valid)
+    names = [entry["name"] for entry in proxies]
+
+    if not proxies:
+        raise SystemExit("No usable proxies were found in the source config.")
+    if report.skipped:
+        print(report.summary(), file=sys.stderr)
+    if filters is not None and filters.filtered:
+        print(f"Filtered out {filters.filtered} proxies.", file=sys.stderr)
+    return proxies, names
+
+
+def _parse_source(
+    source: Path,
+    args: argparse.Namespace,
+    profiler: Profiler,
+    filters: FilterSet | None,
+) -> tuple[list[dict[str, Any]] | ProxyStore, list[str]]:
+    proxies_raw: Iterable[Any] | None = None
+    if args.stream:
+        proxies_raw = stream_proxies(source, args.yaml_backend)
+    elif args.parallel_parse is not None:
+        with profiler.phase("parse"):
+            proxies_raw = load_proxies_parallel(
+                source, args.yaml_backend, args.parallel_parse
+            )
+        if proxies_raw is None:
+            print(
+                f"{source.name}: ambiguous proxy boundaries, parsing it whole.",
+                file=sys.stderr,
+            )
+    if proxies_raw is None:
+        config = read_clash_config(source, args.yaml_backend, profiler)
+        proxies_raw = config.get("proxies")
+        del config
+        if not isinstance(proxies_raw, list):
+            raise SystemExit("The source config must contain a 'proxies' list.")
+
+    # Streamed entries are parsed lazily, inside the collect loop.
+    with profiler.phase("stream" if args.stream else "collect"):
+        proxies, proxy_names = collect_proxies(
+            profiler.counted("entries", proxies_raw), args.compact, filters
+        )
+    del proxies_raw  # only the collected proxies stay alive
+    filtered = filters.filtered if filters is not None else 0
+    profiler.count("filtered", filtered)
+    profiler.count("skipped", profiler.counters["entries"] - len(proxies) - filtered)
+    return proxies, proxy_names
+
+
+def _filter_loaded(
+    proxies: Iterable[Any], filters: FilterSet, profiler: Profiler
+) -> tuple[list[Any], list[str]]:
+    kept = list(filters.apply(proxies))
+    profiler.count("filtered", filters.filtered)
+    if not kept:
+        raise SystemExit("No proxies are left after filtering.")
+    return kept, [proxy["name"] for proxy in kept]
+
+
+def load_proxies(
+    args: argparse.Namespace,
+    specs: list[SourceSpec],
+    profiler: Profiler = NO_PROFILER,
+    filters: FilterSet | None = None,
+    max_proxies: int | None = None,
+) -> tuple[list[dict[str, Any]] | ProxyStore, list[str], dict[str, float]]:
+    """Load the proxies of ``specs`` as the shared command-line options ask.
+
+    Returns the proxies, their names and the RTTs measured by ``--probe``.
+    With ``max_proxies`` the proxies are also capped with
+    :func:`clashselect.select_diverse` (entry points with several targets
+    select per target instead).
+    """
+    source = specs[0].path
+    merging = len(specs) > 1 or bool(specs[0].prefix)
+    parsed = not merging and is_parsed_dump(source)
+    if merging and any(is_parsed_dump(spec.path) for spec in specs):
+        raise SystemExit("Parsed dumps cannot be merged; pass the YAML sources.")
+
+    cache = None if args.no_cache or merging or parsed else ParseCache()
+    cache_key = ""
+    cached = None
+    if cache is not None:
+        with profiler.phase("cache"):
+            extra = "compact" if args.compact else ""
+            if filters is not None:
+                extra += "\n" + filters.key()
+            cache_key = cache.key_for(source, extra)
+            cached = cache.get(cache_key)
+    if merging:
+        with profiler.phase("merge"):
+            proxies, proxy_names, merge_report = merge_sources(
+                specs, args.yaml_backend, getattr(args, "jobs", None)
+            )
+        profiler.count("entries", sum(merge_report.loaded))
+        profiler.count("skipped", merge_report.rejected)
+        print(merge_report.summary(), file=sys.stderr)
+        if filters is not None:
+            proxies, proxy_names = _filter_loaded(proxies, filters, profiler)
+    elif parsed:
+        with profiler.phase("load"):
+            proxies, proxy_names = read_parsed(source)
+        if filters is not None:
+            proxies, proxy_names = _filter_loaded(proxies, filters, profiler)
+    elif cached is not None:
+        proxies, proxy_names = cached
+    else:
+        proxies, proxy_names = _parse_source(source, args, profiler, filters)
+        if cache is not None:
+            with profiler.phase("cache"):
+                cache.put(cache_key, proxies, proxy_names)
+
+    if args.dump_parsed:
+        dump_path = Path(args.dump_parsed).expanduser().resolve()
+        write_parsed(dump_path, proxies, proxy_names)
+        print(f"Saved {len(proxies)} parsed proxies to {dump_path}.")
+
+    profiler.record_proxies(proxies)
+
+    if args.dedup:
+        with profiler.phase("dedup"):
+            proxies, proxy_names, report = dedupe_proxies(proxies)
+        print(report.summary(), file=sys.stderr)
+        if args.dedup_report:
+            Path(args.dedup_report).write_text(report.format() + "\n", encoding="utf-8")
+
+    rtts: dict[str, float] = {}
+    if args.probe:
+        with profiler.phase("probe"):
+            proxies, proxy_names, rtts = run_probe(
+                proxies,
+                args.probe,
+                args.probe_concurrency,
+                args.probe_rate,
+                args.probe_timeout,
+            )
+
+    if max_proxies:
+        with profiler.phase("select"):
+            proxies, selection = select_diverse(proxies, max_proxies, rtts)
+        proxy_names = [proxy["name"] for proxy in proxies]
+        print(selection.summary(), file=sys.stderr)
+        if args.selection_report:
+            Path(args.selection_report).write_text(
+                selection.format() + "\n", encoding="utf-8"
+            )
+
+    if args.compact:
+        proxies = compact(proxies)
+    return proxies, proxy_names, rtts
@@ -0,0 +1,292 @@
+"""
+Include/exclude filters for trimming proxies, globally or per target.
+
+A filter is ``[TARGET:]FIELD=VALUE``:
+
+* ``name=REGEX``     regular expression searched in the proxy name
+* ``type=ss|vmess``  proxy types
+* ``server=VALUE``   IP or host, ``10.0.0.0/8`` CIDR or ``*.example.com``
+                     suffix (also matches ``example.com`` itself)
+* ``port=443|8000-9000``
+* ``region=HK|JP``   region derived from the name, see :mod:`clashgroups`
+
+``|`` separates alternatives. Filters without a target apply to every
+target; a proxy is kept for a target when it matches any include (or there
+are none) and no exclude, for the global filters and that target's own.
+
+All filters are compiled once into a single matcher that computes the set
+of targets a proxy belongs to. :meth:`FilterSet.apply` runs it inside the
+``collect_proxies`` pass, drops proxies no target wants and remembers the
+memberships by position (with the names, not the proxies, so ``--compact``
+can free the dicts), so :meth:`FilterSet.select` only has to look them up.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Mapping, Sequence
+
+from clashgroups import proxy_region
+from clashstore import ProxyStore
+
+FIELDS = ("name", "type", "server", "port", "region")
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+@dataclass(frozen=True)
+class Term:
+    target: str | None
+    field: str
+    value: str
+    exclude: bool
+
+
+def parse_filter(value: str, exclude: bool, targets: Iterable[str]) -> Term:
+    spec, sep, pattern = value.partition("=")
+    target, _, name = spec.rpartition(":")
+    name = name.strip().lower()
+    if not sep or name not in FIELDS or not pattern:
+        raise SystemExit(
+            f"Invalid filter {value!r}: expected [TARGET:]FIELD=VALUE with FIELD "
+            f"one of {', '.join(FIELDS)}."
+        )
+    known = set(targets)
+    if target and target not in known:
+        raise SystemExit(
+            f"Unknown target {target!r} in filter {value!r}; "
+            f"available: {', '.join(sorted(known))}."
+        )
+    return Term(target or None, name, pattern, exclude)
+
+
+@dataclass
+class Criteria:
+    """Union of the terms of one kind (include or exclude) for one scope."""
+
+    names: list[str] = field(default_factory=list)
+    types: set[str] = field(default_factory=set)
+    servers: set[str] = field(default_factory=set)
+    suffixes: set[str] = field(default_factory=set)
+    networks: list[Network] = field(default_factory=list)
+    ports: list[tuple[int, int]] = field(default_factory=list)
+    regions: set[str] = field(default_factory=set)
+
+    def add(self, term: Term) -> None:
+        if term.field == "name":
+            try:
+                re.compile(term.value)
+            except re.error as exc:
+                raise SystemExit(
+                    f"Invalid name pattern {term.value!r}: {exc}"
+                ) from exc
+            self.names.append(term.value)
+            return
+        for item in (part.strip() for part in term.value.split("|")):
+            if not item:
+                continue
+            if term.field == "type":
+                self.types.add(item.lower())
+            elif term.field == "region":
+                self.regions.add(item.upper())
+            elif term.field == "port":
+                low, _, high = item.partition("-")
+                try:
+                    self.ports.append((int(low), int(high or low)))
+                except ValueError as exc:
+                    raise SystemExit(f"Invalid port filter {item!r}.") from exc
+            elif "/" in item:
+                try:
+                    self.networks.append(ipaddress.ip_network(item, strict=False))
+                except ValueError as exc:
+                    raise SystemExit(f"Invalid CIDR filter {item!r}.") from exc
+            elif item.startswith(("*.", ".")):
+                self.suffixes.add(item.lstrip("*.").lower())
+            else:
+                self.servers.add(item.lower())
+
+    def compile(self) -> Callable[[Mapping[str, Any], str | None], bool]:
+        """One closure testing only the fields that have terms."""
+        checks: list[Callable[[Mapping[str, Any], str | None], bool]] = []
+        if self.names:
+            pattern = "|".join(f"(?:{name})" for name in self.names)
+            search = re.compile(pattern).search
+            checks.append(lambda proxy, _: search(proxy["name"]) is not None)
+        if self.types:
+            types = frozenset(self.types)
+            checks.append(
+                lambda proxy, _: str(proxy.get("type", "")).lower() in types
+            )
+        if self.regions:
+            regions = frozenset(self.regions)
+            checks.append(lambda _, region: region in regions)
+        if self.ports:
+            ports = tuple(self.ports)
+            checks.append(lambda proxy, _: _port_in(proxy.get("port"), ports))
+        if self.servers or self.suffixes or self.networks:
+            checks.append(
+                _server_check(
+                    frozenset(self.servers), tuple(self.suffixes), tuple(self.networks)
+                )
+            )
+
+        def matches(proxy: Mapping[str, Any], region: str | None) -> bool:
+            for check in checks:
+                if check(proxy, region):
+                    return True
+            return False
+
+        return matches
+
+
+def _port_in(value: Any, ports: tuple[tuple[int, int], ...]) -> bool:
+    try:
+        port = int(value)
+    except (TypeError, ValueError):
+        return False
+    return any(low <= port <= high for low, high in ports)
+
+
+def _server_check(
+    servers: frozenset[str], suffixes: tuple[str, ...], networks: tuple[Network, ...]
+) -> Callable[[Mapping[str, Any], str | None], bool]:
+    dotted = tuple(f".{suffix}" for suffix in suffixes)
+
+    def check(proxy: Mapping[str, Any], _: str | None) -> bool:
+        server = str(proxy.get("server", "")).strip().lower().rstrip(".")
+        if server in servers:
+            return True
+        if suffixes and (server in suffixes or server.endswith(dotted)):
+            return True
+        if networks:
+            try:
+                address = ipaddress.ip_address(server.strip("[]"))
+            except ValueError:
+                return False
+            return any(address in network for network in networks)
+        return False
+
+    return check
+
+
+class FilterSet:
+    """Compiled include/exclude filters for a fixed list of targets."""
+
+    def __init__(self, terms: list[Term], targets: list[str]) -> None:
+        self.terms = terms
+        self.targets = targets
+        self.filtered = 0
+        self._uses_region = any(term.field == "region" for term in terms)
+        # Target bitmasks of the proxies the last apply() kept, in order, and
+        # their names to recognise that sequence in select().
+        self._names: list[str] = []
+        self._masks: list[int] = []
+        scopes = [None, *targets]
+        compiled = {}
+        for scope in scopes:
+            include, exclude = Criteria(), Criteria()
+            for term in terms:
+                if term.target == scope:
+                    (exclude if term.exclude else include).add(term)
+            has_include = any(t.target == scope and not t.exclude for t in terms)
+            has_exclude = any(t.target == scope and t.exclude for t in terms)
+            compiled[scope] = (
+                include.compile() if has_include else None,
+                exclude.compile() if has_exclude else None,
+            )
+        self._scopes = compiled
+
+    @classmethod
+    def from_args(
+        cls, includes: list[str] | None, excludes: list[str] | None, targets: list[str]
+    ) -> FilterSet | None:
+        terms = [parse_filter(value, False, targets) for value in includes or ()]
+        terms += [parse_filter(value, True, targets) for value in excludes or ()]
+        return cls(terms, targets) if terms else None
+
+    def key(self) -> str:
+        """Stable description, e.g. for cache keys."""
+        return "\n".join(
+            f"{'-' if term.exclude else '+'}{term.target or ''}:"
+            f"{term.field}={term.value}"
+            for term in self.terms
+        )
+
+    def _keeps(
+        self, scope: str | None, proxy: Mapping[str, Any], region: str | None
+    ) -> bool:
+        include, exclude = self._scopes[scope]
+        if include is not None and not include(proxy, region):
+            return False
+        return exclude is None or not exclude(proxy, region)
+
+    def membership(self, proxy: Mapping[str, Any]) -> int:
+        """Bitmask of the targets (in order) that keep ``proxy``."""
+        region = proxy_region(proxy["name"]) if self._uses_region else None
+        if not self._keeps(None, proxy, region):
+            return 0
+        mask = 0
+        for bit, target in enumerate(self.targets):
+            if self._keeps(target, proxy, region):
+                mask |= 1 << bit
+        return mask
+
+    def apply(self, proxies: Iterable[Any]) -> Iterator[Any]:
+        """Yield the proxies some target keeps, remembering which ones."""
+        self.filtered = 0
+        names: list[str] = []
+        masks: list[int] = []
+        self._names, self._masks = names, masks
+        for proxy in proxies:
+            mask = self.membership(proxy)
+            if not mask:
+                self.filtered += 1
+                continue
+            names.append(proxy["name"])
+            masks.append(mask)
+            yield proxy
+
+    def _masks_for(self, proxies: Sequence[Any]) -> list[int]:
+        names = self._names
+        if len(proxies) == len(names) and all(
+            proxy["name"] == name for proxy, name in zip(proxies, names)
+        ):
+            return self._masks
+        # Deduplicated, probed, restored from the cache...
+        self._names = [proxy["name"] for proxy in proxies]
+        self._masks = [self.membership(proxy) for proxy in proxies]
+        return self._masks
+
+    def select(
+        self, target: str, proxies: Sequence[Any]
+    ) -> tuple[list[Any] | ProxyStore, list[str]]:
+        """The proxies ``target`` keeps (a store stays a store), and their names."""
+        bit = 1 << self.targets.index(target)
+        masks = self._masks_for(proxies)
+        kept = [proxy for proxy, mask in zip(proxies, masks) if mask & bit]
+        names = [proxy["name"] for proxy in kept]
+        if isinstance(proxies, ProxyStore):
+            return proxies.subset(kept), names
+        return kept, names
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    fields = (
+        "name (regex), type, server (IP, CIDR or *.suffix), port (N or N-M), region"
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="[TARGET:]FIELD=VALUE",
+        help=f"Keep only matching proxies (repeatable, any match); FIELD is {fields}, "
+        "'|' separates alternatives",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="[TARGET:]FIELD=VALUE",
+        help="Drop matching proxies (repeatable), e.g. 'name=机场推荐' or "
+        "'subwin:type=hysteria2'",
+    )
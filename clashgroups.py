@@ -0,0 +1,195 @@
+"""
+Region-sharded proxy groups.
+
+A region is derived from each proxy name: the flag emoji first
+("CAN 🇨🇦 Toronto" -> CA, "🇭🇰 ... 香港 01" -> HK), then a few common Chinese
+place names, then a leading three-letter country prefix. Instead of one
+url-test group probing every node, each region gets a small bounded url-test
+group, and the top-level auto/fallback groups choose between regions. That
+cuts the number of probes per interval by roughly an order of magnitude.
+
+Groups that list every proxy can also be encoded more compactly, see
+:func:`encode_member_lists`.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from clashyaml import dump_yaml, load_yaml
+
+DEFAULT_REGION_SIZE = 5
+OTHER_REGION = "Other"
+
+_FLAG_RE = re.compile("([\U0001F1E6-\U0001F1FF])([\U0001F1E6-\U0001F1FF])")
+_PREFIX_RE = re.compile(r"^([A-Z]{3})\b")
+_INDICATOR_BASE = 0x1F1E6
+
+# Flags that should be folded into another region.
+REGION_ALIASES = {"UM": "US"}
+
+REGION_KEYWORDS = {
+    "香港": "HK",
+    "台湾": "TW",
+    "臺灣": "TW",
+    "日本": "JP",
+    "美国": "US",
+    "新加坡": "SG",
+    "狮城": "SG",
+    "韩国": "KR",
+    "英国": "GB",
+    "德国": "DE",
+    "法国": "FR",
+}
+
+
+def proxy_region(name: str) -> str:
+    """Best-effort region code for a proxy name."""
+    match = _FLAG_RE.search(name)
+    if match:
+        code = "".join(chr(ord(ch) - _INDICATOR_BASE + ord("A")) for ch in match.groups())
+        return REGION_ALIASES.get(code, code)
+    for keyword, code in REGION_KEYWORDS.items():
+        if keyword in name:
+            return code
+    match = _PREFIX_RE.match(name.strip())
+    if match:
+        return match.group(1)
+    return OTHER_REGION
+
+
+def region_flag(region: str) -> str:
+    if len(region) != 2 or not region.isascii() or not region.isalpha():
+        return ""
+    return "".join(chr(_INDICATOR_BASE + ord(ch) - ord("A")) for ch in region.upper())
+
+
+def region_group_name(region: str) -> str:
+    flag = region_flag(region)
+    return f"{flag} {region} Auto" if flag else f"{region} Auto"
+
+
+def group_by_region(proxy_names: list[str]) -> dict[str, list[str]]:
+    """Proxy names per region, regions ordered by first appearance."""
+    regions: dict[str, list[str]] = {}
+    for name in proxy_names:
+        regions.setdefault(proxy_region(name), []).append(name)
+    return regions
+
+
+def build_region_groups(
+    proxy_names: list[str],
+    max_size: int = DEFAULT_REGION_SIZE,
+    url: str = "http://www.gstatic.com/generate_204",
+    interval: int = 300,
+) -> tuple[list[str], list[dict[str, Any]]]:
+    """One bounded url-test group per region.
+
+    Only the first ``max_size`` proxies of a region are probed; put the
+    preferred ones first (e.g. after ``--probe demote``). Returns the group
+    names and the group definitions.
+    """
+    names: list[str] = []
+    groups: list[dict[str, Any]] = []
+    for region, members in group_by_region(proxy_names).items():
+        group_name = region_group_name(region)
+        names.append(group_name)
+        groups.append(
+            {
+                "name": group_name,
+                "type": "url-test",
+                "proxies": members[: max(1, max_size)],
+                "url": url,
+                "interval": interval,
+            }
+        )
+    return names, groups
+
+
+def probes_per_interval(groups: list[dict[str, Any]]) -> int:
+    """Health checks a client issues per interval for ``groups``."""
+    return sum(
+        len(group.get("proxies", ()))
+        for group in groups
+        if group.get("type") in ("url-test", "fallback", "load-balance")
+    )
+
+
+GROUP_ENCODINGS = ("anchor", "inline", "include-all")
+
+
+def encode_member_lists(
+    groups: list[dict[str, Any]], proxy_names: list[str], encoding: str = "anchor"
+) -> list[dict[str, Any]]:
+    """Choose how groups listing every proxy are written out.
+
+    ``anchor`` shares one list object so the dumper emits it once and aliases
+    it (``&id001``/``*id001``), ``inline`` repeats the list in every group and
+    ``include-all`` drops the list in favour of ``include-all: true``, which
+    Clash.Meta/mihomo clients expand themselves.
+    """
+    if encoding not in GROUP_ENCODINGS:
+        raise ValueError(f"unknown group encoding {encoding!r}")
+    encoded: list[dict[str, Any]] = []
+    for group in groups:
+        members = group.get("proxies")
+        if members is None or members != proxy_names:
+            encoded.append(group)
+            continue
+        if encoding == "anchor":
+            encoded.append({**group, "proxies": proxy_names})
+        elif encoding == "inline":
+            encoded.append({**group, "proxies": list(proxy_names)})
+        else:
+            replaced: dict[str, Any] = {}
+            for key, value in group.items():
+                if key == "proxies":
+                    replaced["include-all"] = True
+                else:
+                    replaced[key] = value
+            encoded.append(replaced)
+    return encoded
+
+
+@dataclass
+class EncodingStats:
+    encoding: str
+    size: int
+    parse_seconds: float
+
+
+def measure_group_encodings(
+    build: Callable[[str], dict[str, Any]],
+    backend: str | None = None,
+    repeat: int = 5,
+) -> list[EncodingStats]:
+    """Output size and parse time of a target under every group encoding.
+
+    ``build`` returns the target's document for a given encoding.
+    """
+    stats = []
+    for encoding in GROUP_ENCODINGS:
+        text = dump_yaml(build(encoding), None, backend)
+        best = float("inf")
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            load_yaml(text, backend)
+            best = min(best, time.perf_counter() - started)
+        stats.append(EncodingStats(encoding, len(text.encode("utf-8")), best))
+    return stats
+
+
+def format_encoding_report(label: str, stats: list[EncodingStats]) -> str:
+    baseline = next(item for item in stats if item.encoding == "inline")
+    lines = [f"{label} group encodings (savings vs inline):"]
+    for item in stats:
+        saved = baseline.size - item.size
+        faster = (baseline.parse_seconds - item.parse_seconds) * 1000
+        lines.append(
+            f"  {item.encoding:<12} {item.size:>10,} B ({saved:,} B saved)  "
+            f"parse {item.parse_seconds * 1000:7.1f} ms ({faster:.1f} ms saved)"
+        )
+    return "\n".join(lines)
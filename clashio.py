@@ -0,0 +1,115 @@
+"""
+Output helpers: write generated profiles atomically and only when changed.
+
+Clients watching ``SubZ.yml``/``Sub-Win.yml`` reload whenever the file is
+touched, so the new document is compared by digest with what is on disk and
+written (temp file + atomic rename) only when the content differs. Streamed
+documents are hashed while being spooled into the temp file, which is simply
+discarded when nothing changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import stat
+import tempfile
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+
+class WriteResult(NamedTuple):
+    path: Path
+    size: int
+    written: bool
+
+    @property
+    def state(self) -> str:
+        return "written" if self.written else "unchanged"
+
+
+def encode_text(text: str) -> bytes:
+    """Encode like a text-mode ``open(..., "w", encoding="utf-8")`` would."""
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8")
+
+
+def file_digest(path: Path) -> str | None:
+    digest = hashlib.sha256()
+    try:
+        with path.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    return digest.hexdigest()
+
+
+def _new_file_mode(path: Path) -> int:
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(tmp_name, _new_file_mode(path))
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_if_changed(path: Path, data: bytes | str) -> WriteResult:
+    """Atomically replace ``path`` with ``data`` unless it already matches."""
+    if isinstance(data, str):
+        data = encode_text(data)
+    try:
+        unchanged = path.stat().st_size == len(data) and (
+            file_digest(path) == hashlib.sha256(data).hexdigest()
+        )
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        write_atomic(path, data)
+    return WriteResult(path, len(data), not unchanged)
+
+
+def write_chunks_if_changed(path: Path, chunks: Iterable[str]) -> WriteResult:
+    """Streaming variant of :func:`write_if_changed` for chunked text."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            for chunk in chunks:
+                data = encode_text(chunk)
+                digest.update(data)
+                size += len(data)
+                handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        try:
+            unchanged = path.stat().st_size == size and (
+                file_digest(path) == digest.hexdigest()
+            )
+        except FileNotFoundError:
+            unchanged = False
+        if unchanged:
+            Path(tmp_name).unlink()
+        else:
+            os.chmod(tmp_name, _new_file_mode(path))
+            os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return WriteResult(path, size, not unchanged)
@@ -0,0 +1,177 @@
+"""
+Merge the proxies of several subscriptions into one list.
+
+Sources are given as ``PATH[=PRIORITY[:PREFIX]]``. Each source is parsed in
+its own worker process with the streaming ``proxies`` extractor, validated,
+optionally renamed with ``PREFIX`` and sorted into a run ordered by region
+then name; the parent only ever receives these runs, never a source
+document. The runs are then combined in one k-way ``heapq.merge`` pass:
+
+* entries with the same connection (see :func:`clashdedup.connection_key`)
+  are resolved in favour of the highest priority, then the source given
+  first, then the earlier entry;
+* the result is ordered by region (``Other`` last) then name, stably;
+* names that still collide get `` (2)``, `` (3)``... like ``--dedup``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Hashable, Iterator
+
+from clashdedup import connection_key, unique_name
+from clashgroups import OTHER_REGION, proxy_region
+from clashschema import ValidationReport, validate_proxies
+from clashstream import stream_proxies
+
+SortKey = tuple[bool, str, str]
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    path: Path
+    priority: int = 0
+    prefix: str = ""
+
+
+@dataclass
+class SourceRun:
+    spec: SourceSpec
+    proxies: list[dict[str, Any]]
+    sort_keys: list[SortKey]
+    connections: list[tuple[Hashable, ...]]
+    rejected: int = 0
+
+
+@dataclass
+class MergeReport:
+    # Per source, in the order given.
+    sources: list[str] = field(default_factory=list)
+    loaded: list[int] = field(default_factory=list)
+    kept: list[int] = field(default_factory=list)
+    rejected: int = 0
+    overridden: int = 0
+    renamed: int = 0
+
+    def summary(self) -> str:
+        sources = ", ".join(
+            f"{name} {kept}/{loaded}"
+            for name, loaded, kept in zip(self.sources, self.loaded, self.kept)
+        )
+        return (
+            f"Merged {len(self.sources)} source(s) ({sources} kept): "
+            f"{self.overridden} duplicate connections resolved by priority, "
+            f"{self.renamed} names made unique, {self.rejected} invalid entries."
+        )
+
+
+def parse_source_spec(value: str) -> SourceSpec:
+    """``PATH[=PRIORITY[:PREFIX]]`` -> :class:`SourceSpec`."""
+    path = Path(value).expanduser()
+    if path.is_file() or "=" not in value:
+        return SourceSpec(path.resolve())
+    location, _, options = value.rpartition("=")
+    priority, _, prefix = options.partition(":")
+    try:
+        number = int(priority) if priority else 0
+    except ValueError as exc:
+        raise SystemExit(f"Invalid priority in source {value!r}.") from exc
+    return SourceSpec(Path(location).expanduser().resolve(), number, prefix)
+
+
+def _sort_key(region: str, name: str) -> SortKey:
+    return region == OTHER_REGION, region, name
+
+
+def load_run(spec: SourceSpec, backend: str | None = None) -> SourceRun:
+    """Parse, validate, prefix and sort one source (runs in a worker)."""
+    report = ValidationReport()
+    rows = []
+    for proxy in validate_proxies(stream_proxies(spec.path, backend), report):
+        region = proxy_region(proxy["name"])
+        if spec.prefix:
+            proxy["name"] = spec.prefix + proxy["name"]
+        rows.append((_sort_key(region, proxy["name"]), proxy))
+    rows.sort(key=lambda row: row[0])
+    return SourceRun(
+        spec,
+        [proxy for _, proxy in rows],
+        [key for key, _ in rows],
+        [connection_key(proxy) for _, proxy in rows],
+        report.skipped,
+    )
+
+
+def load_runs(
+    specs: list[SourceSpec], backend: str | None = None, workers: int | None = None
+) -> list[SourceRun]:
+    if workers is None:
+        workers = min(len(specs), os.cpu_count() or 1)
+    if workers <= 1 or len(specs) <= 1:
+        return [load_run(spec, backend) for spec in specs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(load_run, spec, backend) for spec in specs]
+        return [future.result() for future in futures]
+
+
+def _entries(
+    index: int, run: SourceRun
+) -> Iterator[tuple[SortKey, int, int, dict[str, Any]]]:
+    for position, (key, proxy) in enumerate(zip(run.sort_keys, run.proxies)):
+        yield key, index, position, proxy
+
+
+def merge_runs(
+    runs: list[SourceRun],
+) -> tuple[list[dict[str, Any]], list[str], MergeReport]:
+    report = MergeReport()
+    for run in runs:
+        report.sources.append(run.spec.path.name)
+        report.loaded.append(len(run.proxies) + run.rejected)
+        report.kept.append(0)
+        report.rejected += run.rejected
+
+    # Winner per connection: highest priority, then source order, then position.
+    winners: dict[tuple[Hashable, ...], tuple[int, int]] = {}
+    ranked = sorted(range(len(runs)), key=lambda index: -runs[index].spec.priority)
+    for index in ranked:
+        for position, connection in enumerate(runs[index].connections):
+            winners.setdefault(connection, (index, position))
+    report.overridden = sum(len(run.proxies) for run in runs) - len(winners)
+
+    # Reserve every kept name first so generated suffixes never steal one.
+    taken = {
+        runs[index].proxies[position]["name"] for index, position in winners.values()
+    }
+    suffixes: dict[str, int] = {}
+    seen: set[str] = set()
+    proxies: list[dict[str, Any]] = []
+    names: list[str] = []
+    streams = [_entries(index, run) for index, run in enumerate(runs)]
+    for _, index, position, proxy in heapq.merge(*streams):
+        if winners[runs[index].connections[position]] != (index, position):
+            continue
+        name = proxy["name"]
+        if name in seen:
+            name = unique_name(name, taken, suffixes)
+            proxy = {**proxy, "name": name}
+            report.renamed += 1
+        seen.add(name)
+        proxies.append(proxy)
+        names.append(name)
+        report.kept[index] += 1
+    return proxies, names, report
+
+
+def merge_sources(
+    specs: list[SourceSpec], backend: str | None = None, workers: int | None = None
+) -> tuple[list[dict[str, Any]], list[str], MergeReport]:
+    """Parse ``specs`` concurrently and merge them; see the module docstring."""
+    proxies, names, report = merge_runs(load_runs(specs, backend, workers))
+    if not proxies:
+        raise SystemExit("No usable proxies were found in the source configs.")
+    return proxies, names, report
@@ -10,35 +10,21 @@ from __future__ import annotations
 
 import argparse
 import os
-import sys
 from pathlib import Path
 from typing import Any
 
-try:
-    import yaml
-except ImportError as exc:  # pragma: no cover - makes intent explicit
-    raise SystemExit("PyYAML is required to run this script.") from exc
-
-
-class RelaxedLoader(yaml.SafeLoader):
-    """Safe loader that silently accepts unknown YAML tags."""
-
-
-def _construct_unknown(  # type: ignore[override]
-    loader: RelaxedLoader, node: yaml.Node
-) -> Any:
-    if isinstance(node, yaml.ScalarNode):
-        return loader.construct_scalar(node)
-    if isinstance(node, yaml.SequenceNode):
-        return loader.construct_sequence(node)
-    if isinstance(node, yaml.MappingNode):
-        return loader.construct_mapping(node)
-    raise yaml.constructor.ConstructorError(  # pragma: no cover - defensive
-        None, None, f"Cannot construct node type {type(node)}", node.start_mark
-    )
-
-
-RelaxedLoader.add_constructor(None, _construct_unknown)
+from clashcache import ParseCache
+from clashengine import OUTPUT_FORMATS, load_proxies, write_document
+from clashengine import (  # noqa: F401 - re-exported for callers
+    collect_proxies,
+    read_clash_config,
+)
+from clashfilter import FilterSet, add_filter_arguments
+from clashmerge import parse_source_spec
+from clashprobe import PROBE_MODES
+from clashprofile import add_profile_arguments, profiler_from_args
+from clashyaml import RelaxedLoader  # noqa: F401 - re-exported for callers
+from clashyaml import BACKEND_CHOICES
 
 
 INVISIBLE_CHARS = {
@@ -64,53 +50,119 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "source",
-        nargs="?",
-        help="Path to the source clash.yaml file (prompted if omitted)",
+        nargs="*",
+        help="Source clash.yaml file (prompted if omitted) or a .pickle written by "
+        "--dump-parsed; several sources are merged, PATH=PRIORITY[:PREFIX] sets "
+        "a source's priority and name prefix",
     )
     parser.add_argument(
         "-o",
         "--output",
         help="Destination file (defaults to SubZ.yml next to this script)",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Construct only the 'proxies' section and skip the rest of the source",
+    )
+    parser.add_argument(
+        "--parallel-parse",
+        nargs="?",
+        type=int,
+        const=0,
+        metavar="WORKERS",
+        help="Parse the 'proxies' list in chunks across WORKERS processes "
+        "(default: one per CPU), falling back to a normal parse when its item "
+        "boundaries are ambiguous; --stream takes precedence",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Merge functionally identical proxies and make names unique",
+    )
+    parser.add_argument(
+        "--dedup-report",
+        help="Write the list of merged and renamed proxies to this file",
+    )
+    parser.add_argument(
+        "--probe",
+        choices=PROBE_MODES,
+        help="Probe server:port of every proxy and drop or demote dead ones",
+    )
+    parser.add_argument(
+        "--probe-timeout",
+        type=float,
+        default=3.0,
+        help="Seconds to wait for each probe (default: 3)",
+    )
+    parser.add_argument(
+        "--probe-concurrency",
+        type=int,
+        default=64,
+        help="Maximum number of probes in flight (default: 64)",
+    )
+    parser.add_argument(
+        "--probe-rate",
+        type=float,
+        default=4.0,
+        help="Maximum probe attempts per second against one host (default: 4)",
+    )
+    parser.add_argument(
+        "--max-proxies",
+        type=int,
+        metavar="N",
+        help="Keep at most N proxies, picked for region coverage, protocol "
+        "diversity and (with --probe) RTT",
+    )
+    parser.add_argument(
+        "--selection-report",
+        metavar="FILE",
+        help="With --max-proxies, write the kept and dropped proxies to FILE",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Hold proxies in a compact interned store instead of dicts "
+        "(for very large inputs; pair with --stream)",
+    )
+    parser.add_argument(
+        "--flow-proxies",
+        action="store_true",
+        help="Stream proxies one per line in flow style (smaller, constant memory)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=OUTPUT_FORMATS[0],
+        help="Output format; JSON is valid YAML for Clash cores and much faster "
+        "to write and load (default: yaml)",
+    )
+    parser.add_argument(
+        "--dump-parsed",
+        metavar="FILE",
+        help="Also save the validated proxies to FILE (.pickle) for later runs "
+        "to use as their source instead of parsing YAML",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the parse cache for this run",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove all cached parse results before running",
+    )
+    parser.add_argument(
+        "--yaml-backend",
+        choices=BACKEND_CHOICES,
+        help="YAML implementation to use (default: libyaml when available)",
+    )
+    add_filter_arguments(parser)
+    add_profile_arguments(parser)
     return parser.parse_args()
 
 
-def read_clash_config(path: Path) -> dict[str, Any]:
-    try:
-        raw = path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        raw = path.read_text(encoding="utf-8", errors="ignore")
-
-    try:
-        data = yaml.load(raw, Loader=RelaxedLoader)
-    except yaml.YAMLError as exc:
-        raise SystemExit(f"Failed to parse {path}: {exc}") from exc
-
-    if not isinstance(data, dict):
-        raise SystemExit(f"{path} does not contain a valid Clash mapping.")
-    return data
-
-
-def collect_proxies(entries: list[Any]) -> list[dict[str, Any]]:
-    proxies: list[dict[str, Any]] = []
-    skipped = 0
-    for entry in entries:
-        if not isinstance(entry, dict):
-            skipped += 1
-            continue
-        name = entry.get("name")
-        if not isinstance(name, str) or not name.strip():
-            skipped += 1
-            continue
-        proxies.append(entry)
-
-    if not proxies:
-        raise SystemExit("No usable proxies were found in the source config.")
-    if skipped:
-        print(f"Skipped {skipped} malformed proxy entries.", file=sys.stderr)
-    return proxies
-
-
 def build_mobile_config(proxies: list[dict[str, Any]]) -> dict[str, Any]:
     return {
         "port": 7890,
@@ -139,22 +191,29 @@ def build_mobile_config(proxies: list[dict[str, Any]]) -> dict[str, Any]:
 
 def main() -> None:
     args = parse_args()
-    source_str = args.source
-    if not source_str:
+    if args.clear_cache:
+        removed = ParseCache().clear()
+        print(f"Removed {removed} cached parse result(s).")
+        if not args.source:
+            return
+
+    source_values = args.source
+    if not source_values:
         try:
-            source_str = input("Enter path to clash YAML file: ")
+            source_values = [input("Enter path to clash YAML file: ")]
         except EOFError:
-            source_str = ""
-    if not source_str:
-        raise SystemExit("No source file path provided.")
-
-    source_clean = sanitize_path(source_str)
-    if not source_clean:
+            source_values = []
+    specs = [
+        parse_source_spec(cleaned)
+        for cleaned in map(sanitize_path, source_values)
+        if cleaned
+    ]
+    if not specs:
         raise SystemExit("No source file path provided.")
-
-    source = Path(source_clean).expanduser().resolve()
-    if not source.is_file():
-        raise SystemExit(f"Source file not found: {source}")
+    for spec in specs:
+        if not spec.path.is_file():
+            raise SystemExit(f"Source file not found: {spec.path}")
+    source_label = ", ".join(spec.path.name for spec in specs)
 
     output_path = (
         Path(args.output).expanduser().resolve()
@@ -163,28 +222,20 @@ def main() -> None:
     )
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    config = read_clash_config(source)
-    proxies_raw = config.get("proxies")
-    if not isinstance(proxies_raw, list):
-        raise SystemExit("The source config must contain a 'proxies' list.")
-
-    proxies = collect_proxies(proxies_raw)
-    result = build_mobile_config(proxies)
-
-    with output_path.open("w", encoding="utf-8") as handle:
-        yaml.dump(
-            result,
-            handle,
-            Dumper=yaml.SafeDumper,
-            allow_unicode=True,
-            sort_keys=False,
-            default_flow_style=False,
-        )
+    profiler = profiler_from_args(args, "clashmob")
+    filters = FilterSet.from_args(args.include, args.exclude, ["subz"])
+    proxies, _, _ = load_proxies(args, specs, profiler, filters, args.max_proxies)
+    with profiler.phase("build"):
+        result = build_mobile_config(proxies)
 
+    written = write_document(
+        output_path, result, args.yaml_backend, args.flow_proxies, profiler, args.format
+    )
     print(
-        f"Generated {output_path} with {len(proxies)} proxies "
-        f"based on {source.name}."
+        f"{'Generated' if written.written else 'Unchanged'} {output_path} "
+        f"with {len(proxies)} proxies based on {source_label}."
     )
+    profiler.finish(args.profile_jsonl)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+"""
+Asynchronous reachability prober for collected proxies.
+
+Every proxy's ``server:port`` is probed concurrently with asyncio: a TCP
+connect for stream-based protocols, and a UDP datagram for QUIC-based ones
+(hysteria/hysteria2/tuic), where an ICMP "port unreachable" marks the node as
+dead. Concurrency is capped globally, attempts against the same host are rate
+limited, and each attempt has a timeout. The measured connect RTT is attached
+to every result so dead entries can be dropped or demoted before emitting.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import errno
+import socket
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any
+
+UDP_TYPES = {"hysteria", "hysteria2", "tuic", "wireguard"}
+PROBE_MODES = ("drop", "demote")
+
+
+@dataclass
+class ProbeResult:
+    proxy: dict[str, Any]
+    rtt: float | None = None  # seconds; None when unknown or unreachable
+    error: str | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self.error is None
+
+
+class _HostRateLimiter:
+    """Spaces attempts against one host at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next: dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next.get(host, now))
+        self._next[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class _UDPProbe(asyncio.DatagramProtocol):
+    def __init__(self) -> None:
+        self.refused = asyncio.get_running_loop().create_future()
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.refused.done():
+            self.refused.set_result(exc)
+
+
+async def _probe_tcp(host: str, port: int, timeout: float) -> float:
+    started = time.perf_counter()
+    _, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port), timeout=timeout
+    )
+    rtt = time.perf_counter() - started
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return rtt
+
+
+async def _probe_udp(host: str, port: int, timeout: float) -> None:
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        _UDPProbe, remote_addr=(host, port)
+    )
+    try:
+        transport.sendto(b"\0")
+        try:
+            exc = await asyncio.wait_for(asyncio.shield(protocol.refused), timeout)
+        except asyncio.TimeoutError:
+            return  # silence is the best UDP can offer
+        raise ConnectionRefusedError(errno.ECONNREFUSED, f"port unreachable ({exc})")
+    finally:
+        transport.close()
+
+
+async def _probe_one(
+    proxy: dict[str, Any],
+    semaphore: asyncio.Semaphore,
+    limiter: _HostRateLimiter,
+    timeout: float,
+) -> ProbeResult:
+    host = proxy.get("server")
+    try:
+        port = int(proxy.get("port"))  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return ProbeResult(proxy, error="missing or invalid port")
+    if not isinstance(host, str) or not host.strip():
+        return ProbeResult(proxy, error="missing server")
+    host = host.strip()
+
+    await limiter.wait(host)
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        udp = str(proxy.get("type", "")).lower() in UDP_TYPES
+        try:
+            infos = await asyncio.wait_for(
+                loop.getaddrinfo(
+                    host,
+                    port,
+                    type=socket.SOCK_DGRAM if udp else socket.SOCK_STREAM,
+                ),
+                timeout=timeout,
+            )
+            address = infos[0][4][0]
+            if udp:
+                await _probe_udp(address, port, timeout)
+                return ProbeResult(proxy)
+            return ProbeResult(proxy, rtt=await _probe_tcp(address, port, timeout))
+        except asyncio.TimeoutError:
+            return ProbeResult(proxy, error="timeout")
+        except OSError as exc:
+            return ProbeResult(proxy, error=exc.strerror or type(exc).__name__)
+        except (UnicodeError, ValueError) as exc:
+            # Malformed hosts such as "a..b.com" fail IDNA encoding.
+            return ProbeResult(proxy, error=f"invalid server: {exc}")
+
+
+async def probe_proxies(
+    proxies: list[dict[str, Any]],
+    concurrency: int = 64,
+    per_host_rate: float = 4.0,
+    timeout: float = 3.0,
+) -> list[ProbeResult]:
+    """Probe every proxy; results are returned in input order."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = _HostRateLimiter(per_host_rate)
+    return list(
+        await asyncio.gather(
+            *(_probe_one(proxy, semaphore, limiter, timeout) for proxy in proxies)
+        )
+    )
+
+
+def prune_proxies(
+    results: list[ProbeResult], mode: str = "drop"
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """Drop unreachable entries, or move them behind the reachable ones."""
+    alive = [result.proxy for result in results if result.alive]
+    if mode == "demote":
+        alive += [result.proxy for result in results if not result.alive]
+    return alive, [proxy["name"] for proxy in alive]
+
+
+def run_probe(
+    proxies: list[dict[str, Any]],
+    mode: str = "drop",
+    concurrency: int = 64,
+    per_host_rate: float = 4.0,
+    timeout: float = 3.0,
+) -> tuple[list[dict[str, Any]], list[str], dict[str, float]]:
+    """Synchronous entry point used by the scripts.
+
+    Returns the surviving proxies, their names and the measured RTT (in
+    seconds) per proxy name.
+    """
+    results = asyncio.run(probe_proxies(proxies, concurrency, per_host_rate, timeout))
+    dead = sum(1 for result in results if not result.alive)
+    if dead == len(results) and mode == "drop":
+        raise SystemExit("No proxies answered the reachability probe.")
+    kept, names = prune_proxies(results, mode)
+    rtts = {
+        result.proxy["name"]: result.rtt for result in results if result.rtt is not None
+    }
+    action = "dropped" if mode == "drop" else "demoted"
+    print(
+        f"Probed {len(results)} proxies: {len(results) - dead} reachable, "
+        f"{dead} {action}.",
+        file=sys.stderr,
+    )
+    return kept, names, rtts
@@ -0,0 +1,204 @@
+"""
+Per-phase instrumentation for the conversion scripts (``--profile``).
+
+A :class:`Profiler` records, for each named phase (read, parse, collect,
+build, serialize, write...), the wall time and the tracemalloc peak reached
+above the memory in use when the phase started, plus free-form counters
+(proxies by type, skipped entries, output bytes). Selected phases can also be
+run under cProfile and dumped as pstats files for ``python -m pstats`` or
+snakeviz. The disabled profiler turns every call into a no-op, so the
+instrumented code paths cost nothing by default.
+
+tracemalloc slows allocation-heavy phases (the pure-Python YAML dumper most
+of all), so only compare wall times between profiled runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+CPROFILE_PHASES = ("parse", "serialize")
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    seconds: float = 0.0
+    peak_bytes: int = 0
+    calls: int = 0
+
+
+@dataclass
+class Profiler:
+    enabled: bool = False
+    script: str = ""
+    pstats_dir: Path | None = None
+    cprofile_phases: tuple[str, ...] = CPROFILE_PHASES
+    phases: dict[str, PhaseStats] = field(default_factory=dict)
+    counters: Counter = field(default_factory=Counter)
+    proxy_types: Counter = field(default_factory=Counter)
+    outputs: dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._profiles: dict[str, cProfile.Profile] = {}
+        self._started = time.perf_counter()
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        stats = self.phases.setdefault(name, PhaseStats(name))
+        profile = None
+        if self.pstats_dir is not None and name in self.cprofile_phases:
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            stats.seconds += time.perf_counter() - started
+            stats.peak_bytes = max(
+                stats.peak_bytes, tracemalloc.get_traced_memory()[1] - baseline
+            )
+            stats.calls += 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += value
+
+    def counted(self, name: str, items: Iterable[Any]) -> Iterable[Any]:
+        """Pass ``items`` through, counting them under ``name``."""
+        if not self.enabled:
+            return items
+        return self._counting(name, items)
+
+    def _counting(self, name: str, items: Iterable[Any]) -> Iterator[Any]:
+        for item in items:
+            self.counters[name] += 1
+            yield item
+
+    def record_proxies(self, proxies: list[dict[str, Any]]) -> None:
+        if self.enabled:
+            self.proxy_types = Counter(
+                str(proxy.get("type", "unknown")) for proxy in proxies
+            )
+
+    def record_output(self, path: Path | str, size: int) -> None:
+        if self.enabled:
+            self.outputs[str(path)] = size
+
+    def dump_pstats(self) -> list[Path]:
+        if self.pstats_dir is None:
+            return []
+        self.pstats_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name, profile in self._profiles.items():
+            path = self.pstats_dir / f"{self.script or 'clash'}-{name}.pstats"
+            profile.dump_stats(path)
+            written.append(path)
+        return written
+
+    def records(self) -> list[dict[str, Any]]:
+        """JSON-serializable records: one per phase, then a summary."""
+        records: list[dict[str, Any]] = [
+            {
+                "script": self.script,
+                "phase": stats.name,
+                "seconds": stats.seconds,
+                "peak_bytes": stats.peak_bytes,
+                "calls": stats.calls,
+            }
+            for stats in self.phases.values()
+        ]
+        records.append(
+            {
+                "script": self.script,
+                "phase": "total",
+                "seconds": time.perf_counter() - self._started,
+                "counters": dict(self.counters),
+                "proxy_types": dict(self.proxy_types),
+                "outputs": self.outputs,
+            }
+        )
+        return records
+
+    def write_jsonl(self, path: Path) -> None:
+        with path.open("a", encoding="utf-8") as handle:
+            for record in self.records():
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def summary(self) -> str:
+        lines = [f"{'phase':<12} {'wall ms':>10} {'peak MiB':>10}"]
+        for stats in self.phases.values():
+            lines.append(
+                f"{stats.name:<12} {stats.seconds * 1000:>10.1f} "
+                f"{stats.peak_bytes / 2**20:>10.1f}"
+            )
+        total = time.perf_counter() - self._started
+        lines.append(f"{'total':<12} {total * 1000:>10.1f}")
+        if self.proxy_types:
+            types = ", ".join(
+                f"{name} {count}" for name, count in self.proxy_types.most_common()
+            )
+            lines.append(f"proxies: {sum(self.proxy_types.values())} ({types})")
+        for name, value in self.counters.items():
+            lines.append(f"{name}: {value}")
+        for path, size in self.outputs.items():
+            lines.append(f"output: {path} {size:,} bytes")
+        return "\n".join(lines)
+
+    def finish(self, jsonl: str | None = None) -> None:
+        """Print the summary and write the requested reports."""
+        if not self.enabled:
+            return
+        print(self.summary())
+        if jsonl:
+            self.write_jsonl(Path(jsonl))
+        for path in self.dump_pstats():
+            print(f"pstats: {path}")
+        tracemalloc.stop()
+
+
+NO_PROFILER = Profiler()
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Report wall time and peak memory per phase (read, parse, collect, "
+        "build, serialize, write); combine with --no-cache to time the parse",
+    )
+    parser.add_argument(
+        "--profile-jsonl",
+        metavar="FILE",
+        help="Append the --profile measurements to FILE as JSON lines",
+    )
+    parser.add_argument(
+        "--profile-pstats",
+        metavar="DIR",
+        help="Dump cProfile stats of the parse and serialize phases into DIR",
+    )
+
+
+def profiler_from_args(args: argparse.Namespace, script: str) -> Profiler:
+    enabled = bool(args.profile or args.profile_jsonl or args.profile_pstats)
+    pstats_dir = Path(args.profile_pstats) if args.profile_pstats else None
+    return Profiler(enabled, script, pstats_dir)
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Offline compiler for local rule-provider lists.
+
+Reads the ``rule-providers`` of a Clash config whose ``path`` points at a
+local ``classical``/``domain``/``ipcidr`` list (text or YAML ``payload``),
+normalizes the entries (lower case, IDNA, no trailing dot) and drops the ones
+that can never decide a match:
+
+* duplicates, and domains covered by a ``DOMAIN-SUFFIX``/``+.`` parent or a
+  ``DOMAIN-KEYWORD`` of the same provider;
+* domains already matched by a provider referenced earlier in ``rules``,
+  since the earlier ``RULE-SET`` always wins (only for providers used by
+  plain top-level ``RULE-SET`` rules);
+* CIDRs contained in or adjacent to another one (collapsed into a merged set).
+
+Each provider is written as one binary file holding a front-coded sorted
+domain set, the merged CIDR set and any rules that do not fit either (process
+names, regexes...), together with a report of entries removed and bytes
+saved. Only local files are read; nothing is downloaded.
+
+Example:
+    python clashproviders.py clash.yaml -o ruleset-compiled
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import struct
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Union
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+MAGIC = b"CLRS"
+FORMAT_VERSION = 1
+COMPILED_SUFFIX = ".clrs"
+
+
+def normalize_domain(value: str) -> str:
+    domain = value.strip().lower().rstrip(".")
+    if domain.isascii():
+        return domain
+    try:
+        return domain.encode("idna").decode("ascii")
+    except UnicodeError:
+        return domain
+
+
+def domain_key(domain: str) -> str:
+    """Sort key with the labels reversed, so a suffix groups its subdomains."""
+    return ".".join(reversed(domain.split(".")))
+
+
+def _parents(domain: str) -> Iterable[str]:
+    labels = domain.split(".")
+    for start in range(1, len(labels)):
+        yield ".".join(labels[start:])
+
+
+@dataclass
+class ProviderEntries:
+    exact: set[str] = field(default_factory=set)
+    suffixes: set[str] = field(default_factory=set)
+    keywords: set[str] = field(default_factory=set)
+    networks: list[IPNetwork] = field(default_factory=list)
+    other: list[str] = field(default_factory=list)
+    total: int = 0
+    duplicates: int = 0
+
+
+def _add_network(entries: ProviderEntries, payload: str) -> bool:
+    try:
+        entries.networks.append(ipaddress.ip_network(payload, strict=False))
+    except ValueError:
+        return False
+    return True
+
+
+def _add_unique(entries: ProviderEntries, bucket: set[str], value: str) -> None:
+    # Spellings differing only in case or a trailing dot are duplicates too.
+    if value in bucket:
+        entries.duplicates += 1
+    else:
+        bucket.add(value)
+
+
+def parse_provider_lines(lines: Iterable[str], behavior: str) -> ProviderEntries:
+    """Parse the entries of a rule-provider list."""
+    entries = ProviderEntries()
+    seen: set[str] = set()
+    for raw in lines:
+        line = str(raw).strip().strip("'\"")
+        if not line or line.startswith(("#", "//", "payload:")):
+            continue
+        line = line.removeprefix("- ").strip().strip("'\"")
+        entries.total += 1
+        if line in seen:
+            entries.duplicates += 1
+            continue
+        seen.add(line)
+
+        if behavior == "domain":
+            if line.startswith("+."):
+                _add_unique(entries, entries.suffixes, normalize_domain(line[2:]))
+            elif line.startswith((".", "*")):
+                entries.other.append(line)  # subdomain-only and wildcards
+            else:
+                _add_unique(entries, entries.exact, normalize_domain(line))
+            continue
+        if behavior == "ipcidr":
+            if not _add_network(entries, line):
+                entries.other.append(line)
+            continue
+
+        parts = [part.strip() for part in line.split(",")]
+        kind = parts[0].upper()
+        if len(parts) == 2 and kind == "DOMAIN":
+            _add_unique(entries, entries.exact, normalize_domain(parts[1]))
+        elif len(parts) == 2 and kind == "DOMAIN-SUFFIX":
+            _add_unique(entries, entries.suffixes, normalize_domain(parts[1]))
+        elif len(parts) == 2 and kind == "DOMAIN-KEYWORD":
+            _add_unique(entries, entries.keywords, parts[1].lower())
+        elif len(parts) == 2 and kind in ("IP-CIDR", "IP-CIDR6"):
+            if not _add_network(entries, parts[1]):
+                entries.other.append(line)
+        else:
+            entries.other.append(line)  # options such as no-resolve stay as-is
+    return entries
+
+
+def read_provider(path: Path, behavior: str, fmt: str | None = None) -> ProviderEntries:
+    text = path.read_text(encoding="utf-8-sig")
+    if fmt == "yaml" or (fmt is None and path.suffix in (".yaml", ".yml")):
+        from clashyaml import load_yaml
+
+        data = load_yaml(text)
+        payload = data.get("payload") if isinstance(data, dict) else None
+        return parse_provider_lines(payload or [], behavior)
+    return parse_provider_lines(text.splitlines(), behavior)
+
+
+@dataclass
+class ProviderStats:
+    name: str
+    entries: int = 0
+    duplicates: int = 0
+    covered: int = 0
+    shadowed: int = 0
+    merged: int = 0
+    source_bytes: int = 0
+    output_bytes: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.duplicates + self.covered + self.shadowed + self.merged
+
+
+@dataclass
+class CompiledProvider:
+    """A provider's domain set and merged CIDR set, ready to be matched."""
+
+    name: str
+    exact: list[str] = field(default_factory=list)  # sorted domain_key()s
+    suffixes: list[str] = field(default_factory=list)
+    keywords: list[str] = field(default_factory=list)
+    networks: list[IPNetwork] = field(default_factory=list)
+    other: list[str] = field(default_factory=list)
+
+    def _contains(self, keys: list[str], key: str) -> bool:
+        position = bisect_right(keys, key)
+        return position > 0 and keys[position - 1] == key
+
+    def match_domain(self, domain: str) -> bool:
+        domain = normalize_domain(domain)
+        if self._contains(self.exact, domain_key(domain)):
+            return True
+        if any(keyword in domain for keyword in self.keywords):
+            return True
+        return any(
+            self._contains(self.suffixes, domain_key(candidate))
+            for candidate in (domain, *_parents(domain))
+        )
+
+    def match_ip(self, address: str) -> bool:
+        ip = ipaddress.ip_address(address)
+        return any(
+            net.version == ip.version and ip in net for net in self.networks
+        )
+
+
+def compile_providers(
+    providers: list[tuple[str, ProviderEntries]], independent: Iterable[str] = ()
+) -> tuple[list[CompiledProvider], list[ProviderStats]]:
+    """Minimize providers given in rule order; earlier providers win.
+
+    Providers named in ``independent`` neither shadow nor get shadowed.
+    """
+    independent = set(independent)
+    earlier_exact: set[str] = set()
+    earlier_suffixes: set[str] = set()
+    earlier_keywords: set[str] = set()
+    compiled: list[CompiledProvider] = []
+    stats: list[ProviderStats] = []
+
+    def covered_by(domain: str, suffixes: set[str], keywords: set[str]) -> bool:
+        if domain in suffixes or any(parent in suffixes for parent in _parents(domain)):
+            return True
+        return any(keyword in domain for keyword in keywords)
+
+    for name, entries in providers:
+        stat = ProviderStats(name, entries.total, entries.duplicates)
+        alone = name in independent
+        shadow_exact = set() if alone else earlier_exact
+        shadow_suffixes = set() if alone else earlier_suffixes
+        shadow_keywords = set() if alone else earlier_keywords
+
+        keywords = set()
+        for keyword in sorted(entries.keywords, key=len):
+            if any(kept in keyword for kept in keywords):
+                stat.covered += 1
+            elif any(kept in keyword for kept in shadow_keywords):
+                stat.shadowed += 1
+            else:
+                keywords.add(keyword)
+
+        suffixes = set()
+        for suffix in sorted(entries.suffixes, key=lambda item: item.count(".")):
+            if covered_by(suffix, suffixes, keywords):
+                stat.covered += 1
+            elif covered_by(suffix, shadow_suffixes, shadow_keywords):
+                stat.shadowed += 1
+            else:
+                suffixes.add(suffix)
+
+        exact = set()
+        for domain in entries.exact:
+            if covered_by(domain, suffixes, keywords):
+                stat.covered += 1
+            elif domain in shadow_exact or covered_by(
+                domain, shadow_suffixes, shadow_keywords
+            ):
+                stat.shadowed += 1
+            else:
+                exact.add(domain)
+
+        networks = [
+            net
+            for version in (4, 6)
+            for net in ipaddress.collapse_addresses(
+                [net for net in entries.networks if net.version == version]
+            )
+        ]
+        stat.merged = len(entries.networks) - len(networks)
+
+        if not alone:
+            earlier_exact |= exact
+            earlier_suffixes |= suffixes
+            earlier_keywords |= keywords
+        compiled.append(
+            CompiledProvider(
+                name,
+                sorted(domain_key(domain) for domain in exact),
+                sorted(domain_key(domain) for domain in suffixes),
+                sorted(keywords),
+                networks,
+                entries.other,
+            )
+        )
+        stats.append(stat)
+    return compiled, stats
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _front_coded(keys: list[str]) -> bytes:
+    out = bytearray(_varint(len(keys)))
+    previous = b""
+    for key in keys:
+        encoded = key.encode("utf-8")
+        shared = 0
+        limit = min(len(previous), len(encoded))
+        while shared < limit and previous[shared] == encoded[shared]:
+            shared += 1
+        out += _varint(shared) + _varint(len(encoded) - shared) + encoded[shared:]
+        previous = encoded
+    return bytes(out)
+
+
+def _read_front_coded(data: bytes, offset: int) -> tuple[list[str], int]:
+    count, offset = _read_varint(data, offset)
+    keys: list[str] = []
+    previous = b""
+    for _ in range(count):
+        shared, offset = _read_varint(data, offset)
+        length, offset = _read_varint(data, offset)
+        previous = previous[:shared] + data[offset : offset + length]
+        offset += length
+        keys.append(previous.decode("utf-8"))
+    return keys, offset
+
+
+def _strings(values: list[str]) -> bytes:
+    out = bytearray(_varint(len(values)))
+    for value in values:
+        encoded = value.encode("utf-8")
+        out += _varint(len(encoded)) + encoded
+    return bytes(out)
+
+
+def _read_strings(data: bytes, offset: int) -> tuple[list[str], int]:
+    count, offset = _read_varint(data, offset)
+    values = []
+    for _ in range(count):
+        length, offset = _read_varint(data, offset)
+        values.append(data[offset : offset + length].decode("utf-8"))
+        offset += length
+    return values, offset
+
+
+def encode_provider(provider: CompiledProvider) -> bytes:
+    """Serialize a compiled provider.
+
+    Layout: magic, version, then the exact and suffix domain sets (sorted
+    reversed-label keys, front coded), keywords, IPv4 and IPv6 networks as
+    packed ``address + prefix length`` records, and the remaining rules.
+    """
+    v4 = [net for net in provider.networks if net.version == 4]
+    v6 = [net for net in provider.networks if net.version == 6]
+    out = bytearray(MAGIC + bytes([FORMAT_VERSION]))
+    out += _front_coded(provider.exact)
+    out += _front_coded(provider.suffixes)
+    out += _strings(provider.keywords)
+    out += _varint(len(v4))
+    for net in v4:
+        out += net.network_address.packed + bytes([net.prefixlen])
+    out += _varint(len(v6))
+    for net in v6:
+        out += net.network_address.packed + bytes([net.prefixlen])
+    out += _strings(provider.other)
+    return bytes(out)
+
+
+def decode_provider(name: str, data: bytes) -> CompiledProvider:
+    if data[:4] != MAGIC or data[4] != FORMAT_VERSION:
+        raise ValueError(f"{name}: not a compiled rule-provider")
+    offset = 5
+    exact, offset = _read_front_coded(data, offset)
+    suffixes, offset = _read_front_coded(data, offset)
+    keywords, offset = _read_strings(data, offset)
+    networks: list[IPNetwork] = []
+    for version, size in ((4, 4), (6, 16)):
+        count, offset = _read_varint(data, offset)
+        for _ in range(count):
+            address = data[offset : offset + size]
+            prefix = data[offset + size]
+            offset += size + 1
+            if version == 4:
+                networks.append(
+                    ipaddress.IPv4Network((struct.unpack("!I", address)[0], prefix))
+                )
+            else:
+                networks.append(
+                    ipaddress.IPv6Network((int.from_bytes(address, "big"), prefix))
+                )
+    other, offset = _read_strings(data, offset)
+    return CompiledProvider(name, exact, suffixes, keywords, networks, other)
+
+
+def load_compiled(path: Path) -> CompiledProvider:
+    return decode_provider(path.stem, path.read_bytes())
+
+
+def provider_order(config: dict[str, Any]) -> tuple[list[str], set[str]]:
+    """Provider names in the order their RULE-SET rules are evaluated.
+
+    Also returns the providers that may not be shadowed by earlier ones:
+    those used inside logical rules or sub-rules, and those no rule
+    references. They come last and are compiled on their own.
+    """
+    providers = config.get("rule-providers") or {}
+    rules = [str(rule) for rule in config.get("rules") or []]
+    for sub_rules in (config.get("sub-rules") or {}).values():
+        rules.extend(f"SUB-RULE,{rule}" for rule in sub_rules or [])
+    order: list[str] = []
+    independent: set[str] = set()
+    for rule in rules:
+        parts = [part.strip() for part in rule.split(",")]
+        if len(parts) >= 3 and parts[0].upper() == "RULE-SET":
+            if parts[1] in providers and parts[1] not in order:
+                order.append(parts[1])
+            continue
+        independent.update(name for name in providers if f"RULE-SET,{name}" in rule)
+    independent.update(name for name in providers if name not in order)
+    order = [name for name in order if name not in independent]
+    return order + [name for name in providers if name in independent], independent
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compile local rule-provider lists into compact binary sets."
+    )
+    parser.add_argument("source", help="Clash YAML file with 'rule-providers'")
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="Directory for the compiled providers "
+        "(default: ruleset-compiled next to the source)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    from clash import read_clash_config
+    from clashio import write_if_changed
+
+    args = parse_args()
+    source = Path(args.source).expanduser().resolve()
+    config: dict[str, Any] = read_clash_config(source)
+    providers = config.get("rule-providers")
+    if not isinstance(providers, dict) or not providers:
+        raise SystemExit("The source config must contain 'rule-providers'.")
+    output_dir = (
+        Path(args.output_dir).expanduser().resolve()
+        if args.output_dir
+        else source.parent / "ruleset-compiled"
+    )
+
+    loaded: list[tuple[str, ProviderEntries]] = []
+    source_bytes: dict[str, int] = {}
+    order, independent = provider_order(config)
+    for name in order:
+        provider = providers[name] or {}
+        behavior = str(provider.get("behavior", "classical")).lower()
+        if provider.get("type") == "inline":
+            loaded.append(
+                (name, parse_provider_lines(provider.get("payload") or [], behavior))
+            )
+            source_bytes[name] = 0
+            continue
+        path = provider.get("path")
+        local = (source.parent / str(path)).resolve() if path else None
+        if local is None or not local.is_file():
+            print(f"skipped: {name} (no local file at {path})")
+            continue
+        loaded.append((name, read_provider(local, behavior, provider.get("format"))))
+        source_bytes[name] = local.stat().st_size
+
+    if not loaded:
+        raise SystemExit("No local rule-provider lists found.")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    compiled, stats = compile_providers(loaded, independent)
+    for provider, stat in zip(compiled, stats):
+        data = encode_provider(provider)
+        write_if_changed(output_dir / f"{provider.name}{COMPILED_SUFFIX}", data)
+        stat.source_bytes = source_bytes[provider.name]
+        stat.output_bytes = len(data)
+        print(
+            f"{stat.name}: {stat.entries} -> {stat.entries - stat.removed} entries "
+            f"({stat.duplicates} duplicate, {stat.covered} covered, "
+            f"{stat.shadowed} shadowed, {stat.merged} CIDRs merged), "
+            f"{stat.source_bytes:,} -> {stat.output_bytes:,} bytes"
+        )
+
+    removed = sum(stat.removed for stat in stats)
+    saved = sum(stat.source_bytes - stat.output_bytes for stat in stats)
+    print(
+        f"Compiled {len(compiled)} provider(s) into {output_dir}: "
+        f"{removed} entries removed, {saved:,} bytes saved."
+    )
+
+
+if __name__ == "__main__":
+    main()
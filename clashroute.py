@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Routing simulator for generated Clash profiles.
+
+Loads a profile's ``rules`` together with the locally available
+rule-provider lists and replays a file of connections, one
+``domain,dst-ip,src-ip`` tuple per line (empty fields or ``-`` allowed),
+reporting the policy chosen for each line and how often every rule fired.
+
+Rules are not evaluated one by one. Every supported rule is indexed by its
+position: ``DOMAIN``/``DOMAIN-SUFFIX`` entries in a reversed-label trie,
+``DOMAIN-KEYWORD`` in a list, and ``IP-CIDR``/``IP-CIDR6``/``SRC-IP-CIDR``
+in sorted tables of disjoint intervals labelled with the lowest rule index
+covering them. The first matching rule is the minimum index over all
+lookups. IP lookups run batch-wise with numpy when it is installed, and as
+one bisect per address otherwise.
+
+Rules that need data the tuples do not carry (GEOIP, ports, process names,
+logical rules...) never match and are listed as skipped. Destination-IP
+rules with ``no-resolve`` only match connections without a domain.
+
+Example:
+    python clashroute.py Sub-Win.yml connections.txt -o routes.tsv
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import ipaddress
+import socket
+import sys
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional speedup
+    np = None
+
+from clashproviders import (
+    ProviderEntries,
+    normalize_domain,
+    parse_provider_lines,
+    read_provider,
+)
+
+HAS_NUMPY = np is not None
+NO_MATCH = sys.maxsize
+DEFAULT_POLICY = "DIRECT"
+DEFAULT_BATCH = 65536
+
+Connection = tuple[str, str, str]  # (domain, dst-ip, src-ip)
+
+
+class DomainTrie:
+    """Reversed-label trie holding the lowest rule index per domain entry."""
+
+    __slots__ = ("root",)
+
+    def __init__(self) -> None:
+        # node: [children, exact rule, suffix rule]
+        self.root: list[Any] = [{}, NO_MATCH, NO_MATCH]
+
+    def add(self, domain: str, index: int, suffix: bool) -> None:
+        node = self.root
+        for label in reversed(domain.split(".")):
+            node = node[0].setdefault(label, [{}, NO_MATCH, NO_MATCH])
+        slot = 2 if suffix else 1
+        node[slot] = min(node[slot], index)
+
+    def lookup(self, domain: str) -> int:
+        best = NO_MATCH
+        node = self.root
+        for label in reversed(domain.split(".")):
+            node = node[0].get(label)
+            if node is None:
+                return best
+            if node[2] < best:
+                best = node[2]
+        return min(best, node[1])
+
+
+class IntervalTable:
+    """Disjoint address intervals, each labelled with the lowest rule index."""
+
+    def __init__(self) -> None:
+        self._pending: list[tuple[int, int, int]] = []
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        self.rules: list[int] = []
+        self._arrays: Any = None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, first: int, last: int, index: int) -> None:
+        self._pending.append((first, last, index))
+
+    def build(self) -> None:
+        """Split overlapping intervals into elementary segments (sweep line)."""
+        bounds = sorted({first for first, _, _ in self._pending} | {
+            last + 1 for _, last, _ in self._pending
+        })
+        pending = sorted(self._pending)
+        active: list[tuple[int, int]] = []  # (rule, last)
+        position = 0
+        starts: list[int] = []
+        ends: list[int] = []
+        rules: list[int] = []
+        for start, stop in zip(bounds, bounds[1:]):
+            while position < len(pending) and pending[position][0] <= start:
+                first, last, index = pending[position]
+                heapq.heappush(active, (index, last))
+                position += 1
+            while active and active[0][1] < start:
+                heapq.heappop(active)
+            if not active:
+                continue
+            rule = active[0][0]
+            if rules and rules[-1] == rule and ends[-1] + 1 == start:
+                ends[-1] = stop - 1
+            else:
+                starts.append(start)
+                ends.append(stop - 1)
+                rules.append(rule)
+        self.starts, self.ends, self.rules = starts, ends, rules
+        self._pending = []
+        if HAS_NUMPY and starts and ends[-1] < 1 << 64:
+            self._arrays = (
+                np.array(starts, dtype=np.uint64),
+                np.array(ends, dtype=np.uint64),
+                np.array(rules, dtype=np.int64),
+            )
+
+    def lookup(self, value: int) -> int:
+        position = bisect_right(self.starts, value) - 1
+        if position >= 0 and value <= self.ends[position]:
+            return self.rules[position]
+        return NO_MATCH
+
+    def lookup_many(self, values: Sequence[int]) -> list[int]:
+        """Vectorized :meth:`lookup` for a batch of addresses."""
+        if not self.starts or not values:
+            return [NO_MATCH] * len(values)
+        if self._arrays is None:
+            # Without numpy (or beyond 64 bits) a pure-Python batch merge is
+            # slower than bisecting each address.
+            lookup = self.lookup
+            return [lookup(value) for value in values]
+        starts, ends, rules = self._arrays
+        queries = np.array(values, dtype=np.uint64)
+        positions = np.searchsorted(starts, queries, side="right") - 1
+        clipped = np.maximum(positions, 0)
+        hit = (positions >= 0) & (queries <= ends[clipped])
+        return np.where(hit, rules[clipped], NO_MATCH).tolist()
+
+
+def parse_address(value: str) -> tuple[int, int] | None:
+    """``(version, integer)`` for an IP address, or None."""
+    if not value or value == "-":
+        return None
+    try:
+        return 4, int.from_bytes(socket.inet_aton(value), "big")
+    except OSError:
+        pass
+    try:
+        address = ipaddress.ip_address(value.strip("[]"))
+    except ValueError:
+        return None
+    return address.version, int(address)
+
+
+@dataclass
+class Router:
+    rules: list[str]
+    targets: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    match_rule: int = NO_MATCH
+
+    def __post_init__(self) -> None:
+        self.domains = DomainTrie()
+        self.keywords: list[tuple[int, str]] = []
+        # (source/destination, version, resolving) -> table
+        self.tables: dict[tuple[str, int, bool], IntervalTable] = {}
+        self._keyword_rules: dict[str, int] = {}
+        self._keyword_lengths: list[int] = []
+        self._domain_cache = lru_cache(maxsize=1 << 18)(self._lookup_domain)
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict[str, Any],
+        base_dir: Path,
+        providers: dict[str, ProviderEntries] | None = None,
+    ) -> Router:
+        """Index a profile; providers are read relative to ``base_dir``."""
+        if providers is None:
+            providers = load_providers(config, base_dir)
+        rules = [str(rule) for rule in config.get("rules") or []]
+        router = cls(rules)
+        for index, rule in enumerate(rules):
+            router._add_rule(index, rule, providers)
+        router.build()
+        return router
+
+    def _table(self, side: str, version: int, resolving: bool) -> IntervalTable:
+        key = (side, version, resolving)
+        table = self.tables.get(key)
+        if table is None:
+            table = self.tables[key] = IntervalTable()
+        return table
+
+    def _add_network(self, index: int, payload: str, side: str, resolving: bool) -> bool:
+        try:
+            network = ipaddress.ip_network(payload, strict=False)
+        except ValueError:
+            return False
+        self._table(side, network.version, resolving).add(
+            int(network.network_address), int(network.broadcast_address), index
+        )
+        return True
+
+    def _add_entry(
+        self, index: int, kind: str, payload: str, options: Sequence[str]
+    ) -> bool:
+        resolving = "no-resolve" not in options
+        if kind == "DOMAIN":
+            self.domains.add(normalize_domain(payload), index, suffix=False)
+        elif kind == "DOMAIN-SUFFIX":
+            self.domains.add(normalize_domain(payload), index, suffix=True)
+        elif kind == "DOMAIN-KEYWORD":
+            self.keywords.append((index, payload.lower()))
+        elif kind in ("IP-CIDR", "IP-CIDR6"):
+            return self._add_network(index, payload, "dst", resolving)
+        elif kind == "SRC-IP-CIDR":
+            return self._add_network(index, payload, "src", True)
+        else:
+            return False
+        return True
+
+    def _add_rule(
+        self, index: int, rule: str, providers: dict[str, ProviderEntries]
+    ) -> None:
+        parts = [part.strip() for part in rule.split(",")]
+        kind = parts[0].upper()
+        self.targets.append(parts[-1] if len(parts) > 1 else "")
+        if kind in ("MATCH", "FINAL") and len(parts) >= 2:
+            self.targets[-1] = parts[1]
+            self.match_rule = min(self.match_rule, index)
+            return
+        if len(parts) < 3:
+            self.skipped.append(rule)
+            return
+        self.targets[-1] = parts[2]
+        options = parts[3:]
+        if kind != "RULE-SET":
+            if not self._add_entry(index, kind, parts[1], options):
+                self.skipped.append(rule)
+            return
+
+        entries = providers.get(parts[1])
+        if entries is None:
+            self.skipped.append(f"{rule} (provider not available locally)")
+            return
+        for domain in entries.exact:
+            self.domains.add(domain, index, suffix=False)
+        for domain in entries.suffixes:
+            self.domains.add(domain, index, suffix=True)
+        self.keywords.extend((index, keyword) for keyword in entries.keywords)
+        resolving = "no-resolve" not in options
+        for network in entries.networks:
+            self._table("dst", network.version, resolving).add(
+                int(network.network_address), int(network.broadcast_address), index
+            )
+        unsupported = 0
+        for line in entries.other:
+            item = [part.strip() for part in line.split(",")]
+            if len(item) < 2 or not self._add_entry(
+                index, item[0].upper(), item[1], [*item[2:], *options]
+            ):
+                unsupported += 1
+        if unsupported:
+            self.skipped.append(f"{rule} ({unsupported} unsupported entries)")
+
+    def build(self) -> None:
+        # Keyword -> lowest rule index, probed per distinct keyword length.
+        for index, keyword in self.keywords:
+            if index < self._keyword_rules.get(keyword, NO_MATCH):
+                self._keyword_rules[keyword] = index
+        self._keyword_lengths = sorted({len(keyword) for keyword in self._keyword_rules})
+        for table in self.tables.values():
+            table.build()
+
+    def _lookup_domain(self, domain: str) -> int:
+        best = self.domains.lookup(domain)
+        rules = self._keyword_rules
+        for length in self._keyword_lengths:
+            for start in range(len(domain) - length + 1):
+                index = rules.get(domain[start : start + length], NO_MATCH)
+                if index < best:
+                    best = index
+        return best
+
+    def lookup_domain(self, domain: str) -> int:
+        if not domain or domain == "-":
+            return NO_MATCH
+        return self._domain_cache(normalize_domain(domain))
+
+    def route(self, domain: str, dst: str = "", src: str = "") -> int:
+        """Index of the first matching rule, or NO_MATCH."""
+        best = min(self.lookup_domain(domain), self.match_rule)
+        has_domain = bool(domain) and domain != "-"
+        for side, value in (("dst", dst), ("src", src)):
+            address = parse_address(value)
+            if address is None:
+                continue
+            version, number = address
+            for resolving in (True, False):
+                if not resolving and (side == "src" or has_domain):
+                    continue
+                table = self.tables.get((side, version, resolving))
+                if table is not None:
+                    best = min(best, table.lookup(number))
+        return best
+
+    def route_batch(self, connections: Sequence[Connection]) -> list[int]:
+        """:meth:`route` for many connections, IP lookups batched per table."""
+        best = [
+            min(self.lookup_domain(domain), self.match_rule)
+            for domain, _, _ in connections
+        ]
+        queries: dict[tuple[str, int, bool], tuple[list[int], list[int]]] = {}
+        for slot, (domain, dst, src) in enumerate(connections):
+            has_domain = bool(domain) and domain != "-"
+            for side, value in (("dst", dst), ("src", src)):
+                address = parse_address(value)
+                if address is None:
+                    continue
+                version, number = address
+                for resolving in (True, False):
+                    if not resolving and (side == "src" or has_domain):
+                        continue
+                    key = (side, version, resolving)
+                    if key in self.tables:
+                        slots, values = queries.setdefault(key, ([], []))
+                        slots.append(slot)
+                        values.append(number)
+        for key, (slots, values) in queries.items():
+            for slot, rule in zip(slots, self.tables[key].lookup_many(values)):
+                if rule < best[slot]:
+                    best[slot] = rule
+        return best
+
+    def policy(self, rule: int) -> str:
+        return DEFAULT_POLICY if rule == NO_MATCH else self.targets[rule]
+
+
+def load_providers(config: dict[str, Any], base_dir: Path) -> dict[str, ProviderEntries]:
+    """Entries of every rule-provider whose list is available locally."""
+    loaded: dict[str, ProviderEntries] = {}
+    for name, provider in (config.get("rule-providers") or {}).items():
+        provider = provider or {}
+        behavior = str(provider.get("behavior", "classical")).lower()
+        if provider.get("type") == "inline":
+            loaded[name] = parse_provider_lines(provider.get("payload") or [], behavior)
+            continue
+        path = provider.get("path")
+        local = (base_dir / str(path)).resolve() if path else None
+        if local is not None and local.is_file():
+            loaded[name] = read_provider(local, behavior, provider.get("format"))
+    return loaded
+
+
+def parse_connection(line: str) -> Connection | None:
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = line.split(",") if "," in line else line.split()
+    fields = [item.strip() for item in fields][:3]
+    fields += [""] * (3 - len(fields))
+    return fields[0], fields[1], fields[2]
+
+
+def iter_batches(lines: Iterable[str], size: int) -> Iterator[list[Connection]]:
+    batch: list[Connection] = []
+    for line in lines:
+        connection = parse_connection(line)
+        if connection is None:
+            continue
+        batch.append(connection)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay connections against a profile's rules."
+    )
+    parser.add_argument("profile", help="Generated Clash profile (e.g. Sub-Win.yml)")
+    parser.add_argument(
+        "connections",
+        help="File with one 'domain,dst-ip,src-ip' tuple per line ('-' for stdin)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write 'domain dst-ip src-ip policy rule' per connection (TSV)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH,
+        help=f"Connections routed per batch (default: {DEFAULT_BATCH})",
+    )
+    parser.add_argument(
+        "--scalar",
+        action="store_true",
+        help="Route connections one at a time instead of batch-wise",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    from clash import read_clash_config
+
+    args = parse_args()
+    profile = Path(args.profile).expanduser().resolve()
+    config = read_clash_config(profile)
+    if not isinstance(config.get("rules"), list):
+        raise SystemExit("The profile must contain a 'rules' list.")
+
+    started = time.perf_counter()
+    router = Router.from_config(config, profile.parent)
+    build_seconds = time.perf_counter() - started
+    for rule in router.skipped:
+        print(f"skipped: {rule}", file=sys.stderr)
+
+    hits = [0] * len(router.rules)
+    unmatched = total = 0
+    source = (
+        sys.stdin
+        if args.connections == "-"
+        else open(args.connections, encoding="utf-8")
+    )
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    started = time.perf_counter()
+    try:
+        for batch in iter_batches(source, max(1, args.batch_size)):
+            if args.scalar:
+                chosen = [router.route(*connection) for connection in batch]
+            else:
+                chosen = router.route_batch(batch)
+            for connection, rule in zip(batch, chosen):
+                if rule == NO_MATCH:
+                    unmatched += 1
+                else:
+                    hits[rule] += 1
+                if output is not None:
+                    text = "-" if rule == NO_MATCH else router.rules[rule]
+                    output.write(
+                        "\t".join((*connection, router.policy(rule), text)) + "\n"
+                    )
+            total += len(batch)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"{'hits':>10}  rule")
+    for rule, count in zip(router.rules, hits):
+        if count:
+            print(f"{count:>10,}  {rule}")
+    if unmatched:
+        print(f"{unmatched:>10,}  (no rule matched -> {DEFAULT_POLICY})")
+    rate = total / elapsed * 60 if elapsed else 0.0
+    print(
+        f"Routed {total:,} connections in {elapsed:.2f}s "
+        f"({rate:,.0f} lookups/min, index built in {build_seconds * 1000:.1f} ms)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Rule compiler for Clash ``rules`` lists.
+
+Clients evaluate rules top to bottom for every connection, so the compiler
+rewrites a list into an equivalent but cheaper one:
+
+* rules that can never fire (everything after ``MATCH``, exact duplicates,
+  rules fully covered by an earlier one) are removed;
+* overlapping or adjacent ``IP-CIDR``/``SRC-IP-CIDR`` ranges with the same
+  target and options are collapsed, when the later rule can be moved up
+  without crossing a conflicting rule;
+* independent rules are reordered so cheap lookups (``DOMAIN``,
+  ``DOMAIN-SUFFIX``) come before ``GEOIP`` and ``RULE-SET``.
+
+Two rules may only swap places when they share a target or provably cannot
+match the same connection, so the first matching rule for any connection
+keeps the same target. A diagnostics report lists every change.
+
+Example:
+    python clashrules.py clash.yaml
+    python clashrules.py Sub-Win.yml --match-last -o Sub-Win.optimized.yml
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import ipaddress
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Union
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+MATCH_TYPES = {"MATCH", "FINAL"}
+LOGICAL_TYPES = {"AND", "OR", "NOT", "SUB-RULE"}
+DOMAIN_TYPES = {"DOMAIN", "DOMAIN-SUFFIX", "DOMAIN-KEYWORD"}
+DST_IP_TYPES = {"IP-CIDR", "IP-CIDR6"}
+SRC_IP_TYPES = {"SRC-IP-CIDR"}
+# Rules matching one exact value of a single-valued connection attribute:
+# two of them with different payloads can never match the same connection.
+EXCLUSIVE_TYPES = {"GEOIP", "DST-PORT", "SRC-PORT", "IN-PORT", "NETWORK"}
+
+RULE_COSTS = {
+    "DOMAIN": 1,
+    "DOMAIN-SUFFIX": 2,
+    "DST-PORT": 2,
+    "SRC-PORT": 2,
+    "IN-PORT": 2,
+    "NETWORK": 2,
+    "DOMAIN-KEYWORD": 3,
+    "SRC-IP-CIDR": 3,
+    "IP-CIDR": 4,
+    "IP-CIDR6": 4,
+    "DOMAIN-REGEX": 6,
+    "PROCESS-NAME": 6,
+    "PROCESS-PATH": 6,
+    "GEOSITE": 7,
+    "IP-ASN": 7,
+    "GEOIP": 8,
+    "RULE-SET": 9,
+}
+DEFAULT_COST = 9
+MATCH_COST = 1000
+# Destination-IP rules force a DNS lookup for domain connections unless they
+# carry no-resolve, which makes them costlier than any domain or rule-set.
+RESOLVING_TYPES = {"IP-CIDR", "IP-CIDR6", "GEOIP", "IP-ASN"}
+RESOLVE_COST = 6
+
+RULE_OPTIMIZATIONS = ("strict", "match-last")
+
+
+@dataclass
+class Rule:
+    index: int
+    text: str
+    type: str
+    payload: str = ""
+    target: str = ""
+    options: tuple[str, ...] = ()
+    networks: list[IPNetwork] = field(default_factory=list)
+    opaque: bool = False
+    changed: bool = False
+
+    @property
+    def cost(self) -> int:
+        if self.type in MATCH_TYPES:
+            return MATCH_COST
+        cost = RULE_COSTS.get(self.type, DEFAULT_COST)
+        if self.type in RESOLVING_TYPES and not self.no_resolve:
+            cost += RESOLVE_COST
+        return cost
+
+    @property
+    def no_resolve(self) -> bool:
+        return "no-resolve" in self.options
+
+    def render(self) -> list[str]:
+        if not self.changed:
+            return [self.text]
+        suffix = "".join(f",{option}" for option in self.options)
+        return [
+            f"{self.type},{network},{self.target}{suffix}" for network in self.networks
+        ]
+
+
+def parse_rule(index: int, text: str) -> Rule:
+    parts = [part.strip() for part in text.split(",")]
+    kind = parts[0].upper()
+    if kind in MATCH_TYPES and len(parts) >= 2:
+        return Rule(index, text, kind, target=parts[1])
+    if kind in LOGICAL_TYPES or len(parts) < 3:
+        target = parts[-1] if len(parts) > 1 else ""
+        return Rule(index, text, kind, target=target, opaque=True)
+
+    rule = Rule(index, text, kind, parts[1], parts[2], tuple(parts[3:]))
+    if kind in DOMAIN_TYPES:
+        rule.payload = rule.payload.lower().rstrip(".")
+    elif kind in DST_IP_TYPES or kind in SRC_IP_TYPES:
+        try:
+            rule.networks = [ipaddress.ip_network(rule.payload, strict=False)]
+        except ValueError:
+            rule.opaque = True
+    return rule
+
+
+def _domain_within(domain: str, suffix: str) -> bool:
+    return domain == suffix or domain.endswith("." + suffix)
+
+
+def _ip_family(rule: Rule) -> str | None:
+    if rule.opaque:
+        return None
+    if rule.type in DST_IP_TYPES:
+        return "dst"
+    if rule.type in SRC_IP_TYPES:
+        return "src"
+    return None
+
+
+def covers(first: Rule, later: Rule) -> bool:
+    """True when every connection matching ``later`` also matches ``first``."""
+    if first.type in MATCH_TYPES:
+        return True
+    if first.opaque or later.opaque or later.type in MATCH_TYPES:
+        return False
+    if first.options != later.options and not (
+        # An IP rule that resolves also matches everything its no-resolve
+        # twin would.
+        _ip_family(first) and not first.options and later.options == ("no-resolve",)
+    ):
+        return False
+    if first.type == later.type and first.payload == later.payload:
+        return True
+
+    if first.type == "DOMAIN-SUFFIX" and later.type in ("DOMAIN", "DOMAIN-SUFFIX"):
+        return _domain_within(later.payload, first.payload)
+    if first.type == "DOMAIN-KEYWORD" and later.type in DOMAIN_TYPES:
+        return first.payload in later.payload
+    family = _ip_family(first)
+    if family and family == _ip_family(later):
+        return all(
+            any(
+                net.version == outer.version and net.subnet_of(outer)  # type: ignore[arg-type]
+                for outer in first.networks
+            )
+            for net in later.networks
+        )
+    return False
+
+
+def may_overlap(a: Rule, b: Rule) -> bool:
+    """Conservative: False only if no connection can match both rules."""
+    if a.opaque or b.opaque or a.type in MATCH_TYPES or b.type in MATCH_TYPES:
+        return True
+    if a.type in DOMAIN_TYPES and b.type in DOMAIN_TYPES:
+        if "DOMAIN-KEYWORD" in (a.type, b.type):
+            keyword, other = (a, b) if a.type == "DOMAIN-KEYWORD" else (b, a)
+            return other.type != "DOMAIN" or keyword.payload in other.payload
+        if a.type == "DOMAIN" and b.type == "DOMAIN":
+            return a.payload == b.payload
+        return _domain_within(a.payload, b.payload) or _domain_within(
+            b.payload, a.payload
+        )
+    family = _ip_family(a)
+    if family and family == _ip_family(b):
+        return any(
+            x.version == y.version and x.overlaps(y)  # type: ignore[arg-type]
+            for x in a.networks
+            for y in b.networks
+        )
+    if a.type == b.type and a.type in EXCLUSIVE_TYPES:
+        if any(ch in a.payload + b.payload for ch in "-/"):
+            return True  # port ranges and lists
+        return a.payload.upper() == b.payload.upper()
+    return True
+
+
+def conflicts(a: Rule, b: Rule) -> bool:
+    """Whether the relative order of ``a`` and ``b`` affects routing."""
+    return a.target != b.target and may_overlap(a, b)
+
+
+@dataclass
+class RuleReport:
+    before: int = 0
+    after: int = 0
+    removed: list[tuple[str, str]] = field(default_factory=list)  # (rule, reason)
+    merged: list[tuple[list[str], list[str]]] = field(default_factory=list)
+    moved: int = 0
+    hoisted_match: bool = False
+    warnings: list[str] = field(default_factory=list)
+
+    def format(self) -> str:
+        lines = [
+            f"Rules: {self.before} -> {self.after} "
+            f"({len(self.removed)} removed, {len(self.merged)} CIDR merges, "
+            f"{self.moved} reordered)."
+        ]
+        lines.extend(f"warning: {message}" for message in self.warnings)
+        if self.hoisted_match:
+            lines.append("moved MATCH to the end of the list")
+        lines.extend(f"removed: {rule}  [{reason}]" for rule, reason in self.removed)
+        for sources, result in self.merged:
+            lines.append(f"merged: {' + '.join(sources)} -> {' + '.join(result)}")
+        return "\n".join(lines)
+
+
+def _remove_dead(rules: list[Rule], report: RuleReport) -> list[Rule]:
+    kept: list[Rule] = []
+    for rule in rules:
+        for earlier in kept:
+            if covers(earlier, rule):
+                if earlier.type in MATCH_TYPES:
+                    reason = f"unreachable after {earlier.text}"
+                elif earlier.target == rule.target and earlier.text == rule.text:
+                    reason = "duplicate"
+                else:
+                    reason = f"shadowed by {earlier.text}"
+                report.removed.append((rule.text, reason))
+                break
+        else:
+            kept.append(rule)
+    return kept
+
+
+def _merge_cidrs(rules: list[Rule], report: RuleReport) -> list[Rule]:
+    result: list[Rule] = []
+    sources: dict[int, list[str]] = {}
+    for rule in rules:
+        family = _ip_family(rule)
+        host = None
+        if family:
+            for position in range(len(result) - 1, -1, -1):
+                candidate = result[position]
+                if (
+                    candidate.type == rule.type
+                    and candidate.target == rule.target
+                    and candidate.options == rule.options
+                    and not candidate.opaque
+                ):
+                    host = candidate
+                    break
+                if conflicts(candidate, rule):
+                    break
+        combined = host.networks + rule.networks if host else []
+        collapsed = [
+            net
+            for version in (4, 6)
+            for net in ipaddress.collapse_addresses(
+                [net for net in combined if net.version == version]
+            )
+        ]
+        if host is None or len(collapsed) == len(combined):
+            result.append(rule)  # nothing to gain from merging
+            continue
+        sources.setdefault(id(host), [host.text]).append(rule.text)
+        host.changed = True
+        host.networks = collapsed
+    for rule in result:
+        if id(rule) in sources:
+            report.merged.append((sources[id(rule)], rule.render()))
+    return result
+
+
+def _reorder(rules: list[Rule], report: RuleReport) -> list[Rule]:
+    count = len(rules)
+    blockers = [0] * count
+    successors: list[list[int]] = [[] for _ in range(count)]
+    for i in range(count):
+        for j in range(i + 1, count):
+            if conflicts(rules[i], rules[j]):
+                successors[i].append(j)
+                blockers[j] += 1
+
+    ready = [(rules[i].cost, i) for i in range(count) if not blockers[i]]
+    heapq.heapify(ready)
+    order: list[Rule] = []
+    while ready:
+        _, i = heapq.heappop(ready)
+        order.append(rules[i])
+        for j in successors[i]:
+            blockers[j] -= 1
+            if not blockers[j]:
+                heapq.heappush(ready, (rules[j].cost, j))
+    report.moved = sum(
+        1 for position, rule in enumerate(order) if rule is not rules[position]
+    )
+    return order
+
+
+def compile_rules(
+    rules: list[str], hoist_match: bool = False
+) -> tuple[list[str], RuleReport]:
+    """Return an equivalent, cheaper rule list and a diagnostics report.
+
+    With ``hoist_match`` a misplaced ``MATCH`` is moved to the end first,
+    which re-enables the rules it shadowed (a deliberate behaviour change).
+    """
+    report = RuleReport(before=len(rules))
+    parsed = [parse_rule(index, str(text)) for index, text in enumerate(rules)]
+
+    matches = [rule for rule in parsed if rule.type in MATCH_TYPES]
+    if matches and parsed[-1] is not matches[0]:
+        if hoist_match:
+            parsed = [rule for rule in parsed if rule is not matches[0]] + [matches[0]]
+            report.hoisted_match = True
+        else:
+            shadowed = len(parsed) - parsed.index(matches[0]) - 1
+            report.warnings.append(
+                f"{matches[0].text} shadows the {shadowed} rule(s) after it"
+            )
+
+    compiled = _reorder(_merge_cidrs(_remove_dead(parsed, report), report), report)
+    output = [text for rule in compiled for text in rule.render()]
+    report.after = len(output)
+    return output, report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Optimize the rules of a Clash config and report what changed."
+    )
+    parser.add_argument("source", help="Clash YAML file containing a 'rules' list")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write the config with optimized rules to this file",
+    )
+    parser.add_argument(
+        "--match-last",
+        action="store_true",
+        help="Move a misplaced MATCH rule to the end before optimizing",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    from clash import read_clash_config
+    from clashio import write_if_changed
+    from clashyaml import dump_yaml
+
+    args = parse_args()
+    config: dict[str, Any] = read_clash_config(Path(args.source))
+    rules = config.get("rules")
+    if not isinstance(rules, list):
+        raise SystemExit("The source config must contain a 'rules' list.")
+
+    optimized, report = compile_rules(rules, args.match_last)
+    print(report.format())
+    if args.output:
+        config["rules"] = optimized
+        result = write_if_changed(Path(args.output), dump_yaml(config))
+        print(f"{result.path}: {result.state}")
+
+
+if __name__ == "__main__":
+    main()
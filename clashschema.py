@@ -0,0 +1,211 @@
+"""
+Per-type validation of proxy entries.
+
+Every proxy ``type`` found in the sources (ss with plugin-opts, trojan,
+vless, vmess, hysteria2, http) has a :class:`TypeSpec`. The specs are
+compiled once into one closure per type holding only the checks that type
+needs, so validating an entry is a dict lookup plus a handful of key
+lookups. Ports given as digit strings are coerced to ``int`` in place;
+anything the client would reject or choke on is dropped and counted under
+its reason in a :class:`ValidationReport`. ``server`` and ``port`` are
+required for the types known to connect to one (``endpoint``); for the
+rest, e.g. ``direct``, ``dns``, ``wireguard`` with ``peers`` or types
+without a spec, they are only checked when present.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator
+
+Validator = Callable[[dict[str, Any]], "str | None"]
+
+SS_CIPHERS = frozenset(
+    {
+        "none",
+        "dummy",
+        "rc4-md5",
+        "aes-128-ctr",
+        "aes-192-ctr",
+        "aes-256-ctr",
+        "aes-128-cfb",
+        "aes-192-cfb",
+        "aes-256-cfb",
+        "aes-128-gcm",
+        "aes-192-gcm",
+        "aes-256-gcm",
+        "aes-128-ccm",
+        "aes-192-ccm",
+        "aes-256-ccm",
+        "aes-128-gcm-siv",
+        "aes-256-gcm-siv",
+        "chacha20",
+        "chacha20-ietf",
+        "xchacha20",
+        "chacha20-ietf-poly1305",
+        "xchacha20-ietf-poly1305",
+        "chacha8-ietf-poly1305",
+        "xchacha8-ietf-poly1305",
+        "rabbit128-poly1305",
+        "aegis-128l",
+        "aegis-256",
+        "2022-blake3-aes-128-gcm",
+        "2022-blake3-aes-256-gcm",
+        "2022-blake3-chacha20-poly1305",
+    }
+)
+SS_PLUGINS = frozenset(
+    {"obfs", "v2ray-plugin", "gost-plugin", "shadow-tls", "restls", "kcptun"}
+)
+VMESS_CIPHERS = frozenset({"auto", "none", "zero", "aes-128-gcm", "chacha20-poly1305"})
+
+
+@dataclass(frozen=True)
+class TypeSpec:
+    # Fields that must hold a non-empty string (or a number).
+    required: tuple[str, ...] = ()
+    # At least one of these must hold a non-empty string (or a number).
+    any_of: tuple[str, ...] = ()
+    # Allowed values; a key listed in ``required`` must also be present.
+    choices: dict[str, frozenset[str]] = field(default_factory=dict)
+    # Optional integer fields, coerced from digit strings.
+    ints: tuple[str, ...] = ()
+    # Allowed ``plugin`` values; the plugin then needs a ``plugin-opts`` mapping.
+    plugins: frozenset[str] | None = None
+    # Whether ``server`` and ``port`` are required rather than optional.
+    endpoint: bool = True
+
+
+SPECS: dict[str, TypeSpec] = {
+    "ss": TypeSpec(
+        required=("cipher", "password"),
+        choices={"cipher": SS_CIPHERS},
+        plugins=SS_PLUGINS,
+    ),
+    "trojan": TypeSpec(required=("password",)),
+    "vless": TypeSpec(required=("uuid",)),
+    "vmess": TypeSpec(
+        required=("uuid",), choices={"cipher": VMESS_CIPHERS}, ints=("alterId",)
+    ),
+    "hysteria2": TypeSpec(any_of=("password", "auth")),
+    "http": TypeSpec(),
+    "socks5": TypeSpec(),
+    "direct": TypeSpec(endpoint=False),
+    "dns": TypeSpec(endpoint=False),
+    "wireguard": TypeSpec(endpoint=False),  # or per-peer servers
+}
+
+
+def _has_text(value: Any) -> bool:
+    if isinstance(value, str):
+        return bool(value.strip())
+    # The client decodes weakly typed, so numeric secrets are fine.
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _coerce_int(entry: dict[str, Any], key: str, low: int, high: int) -> bool:
+    value = entry.get(key)
+    if isinstance(value, str):
+        text = value.strip()
+        if not text.isdecimal():
+            return False
+        value = entry[key] = int(text)
+    elif not isinstance(value, int) or isinstance(value, bool):
+        return False
+    return low <= value <= high
+
+
+def compile_validator(spec: TypeSpec) -> Validator:
+    """Build the validator for one type: entry -> rejection reason or None."""
+    required = tuple((key, f"missing {key}") for key in spec.required)
+    any_of = spec.any_of
+    any_of_reason = f"missing {' or '.join(any_of)}"
+    choices = tuple(
+        (key, allowed, f"unknown {key}") for key, allowed in spec.choices.items()
+    )
+    ints = tuple((key, f"invalid {key}") for key in spec.ints)
+    plugins = spec.plugins
+    endpoint = spec.endpoint
+
+    def validate(entry: dict[str, Any]) -> str | None:
+        server = entry.get("server")
+        if endpoint or server is not None:
+            if not isinstance(server, str) or not server.strip():
+                return "missing server"
+        if endpoint or "port" in entry:
+            if not _coerce_int(entry, "port", 1, 65535):
+                return "invalid port"
+        for key, reason in required:
+            if not _has_text(entry.get(key)):
+                return reason
+        if any_of and not any(_has_text(entry.get(key)) for key in any_of):
+            return any_of_reason
+        for key, allowed, reason in choices:
+            value = entry.get(key)
+            if value is not None and (
+                not isinstance(value, str) or value not in allowed
+            ):
+                return reason
+        for key, reason in ints:
+            if key in entry and not _coerce_int(entry, key, 0, 65535):
+                return reason
+        if plugins is not None and entry.get("plugin") is not None:
+            plugin = entry["plugin"]
+            if not isinstance(plugin, str) or plugin not in plugins:
+                return "unknown plugin"
+            if not isinstance(entry.get("plugin-opts"), dict):
+                return "invalid plugin-opts"
+        return None
+
+    return validate
+
+
+VALIDATORS: dict[str, Validator] = {
+    name: compile_validator(spec) for name, spec in SPECS.items()
+}
+GENERIC_VALIDATOR = compile_validator(TypeSpec(endpoint=False))
+
+
+def validate_proxy(entry: Any) -> str | None:
+    """Rejection reason for ``entry``, or None if it is usable."""
+    if not isinstance(entry, dict):
+        return "not a mapping"
+    name = entry.get("name")
+    if not isinstance(name, str) or not name.strip():
+        return "missing name"
+    kind = entry.get("type")
+    if not isinstance(kind, str) or not kind:
+        return "missing type"
+    return VALIDATORS.get(kind, GENERIC_VALIDATOR)(entry)
+
+
+@dataclass
+class ValidationReport:
+    accepted: int = 0
+    rejected: Counter = field(default_factory=Counter)
+
+    @property
+    def skipped(self) -> int:
+        return sum(self.rejected.values())
+
+    def summary(self) -> str:
+        reasons = ", ".join(
+            f"{reason}: {count}" for reason, count in self.rejected.most_common()
+        )
+        return f"Skipped {self.skipped} invalid proxy entries ({reasons})."
+
+
+def validate_proxies(
+    entries: Iterable[Any], report: ValidationReport | None = None
+) -> Iterator[dict[str, Any]]:
+    """Yield the usable entries, counting rejections in ``report``."""
+    if report is None:
+        report = ValidationReport()
+    for entry in entries:
+        reason = validate_proxy(entry)
+        if reason is None:
+            report.accepted += 1
+            yield entry
+        else:
+            report.rejected[reason] += 1
@@ -0,0 +1,119 @@
+"""
+Bounded, diversity-aware proxy selection for the SubZ mobile profile.
+
+Phones pay for every proxy in a profile at startup, so ``--max-proxies N``
+keeps at most ``N`` of them, picked for region coverage first, then protocol
+diversity, then measured RTT (from ``--probe``, when given):
+
+1. per region and type, a bounded heap keeps the ``N`` best candidates by
+   RTT (input order without one), so nothing below that cut is ever sorted
+   and a crowded type cannot push a region's other types out;
+2. within a region the candidates are ranked round-robin over their types:
+   the best of each type first, then the second best of each type...;
+3. the ``N`` proxies with the lowest ``(region rank, RTT, input order)`` are
+   kept, so every region gets its first pick before any gets a second one.
+
+That is ``O(n log N)`` overall. The result depends only on the input order
+and the RTTs, and the kept proxies stay in input order, so an unchanged
+source produces an unchanged profile.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+from clashgroups import proxy_region
+from clashstore import ProxyStore
+
+Row = tuple[str, str, str]  # (region, type, name)
+
+
+@dataclass
+class SelectionReport:
+    limit: int
+    kept: list[Row] = field(default_factory=list)
+    dropped: list[Row] = field(default_factory=list)
+
+    def summary(self) -> str:
+        total = len(self.kept) + len(self.dropped)
+        regions = {region for region, _, _ in self.kept + self.dropped}
+        types = {kind for _, kind, _ in self.kept + self.dropped}
+        return (
+            f"Selected {len(self.kept)} of {total} proxies (limit {self.limit}): "
+            f"{len({row[0] for row in self.kept})}/{len(regions)} regions, "
+            f"{len({row[1] for row in self.kept})}/{len(types)} types kept."
+        )
+
+    def format(self) -> str:
+        lines = [self.summary()]
+        for label, index in (("region", 0), ("type", 1)):
+            kept = Counter(row[index] for row in self.kept)
+            total = kept + Counter(row[index] for row in self.dropped)
+            lines.extend(
+                f"{label} {value}: {kept[value]}/{count}"
+                for value, count in sorted(total.items())
+            )
+        lines.extend(f"kept: {name}" for _, _, name in self.kept)
+        lines.extend(f"dropped: {name}" for _, _, name in self.dropped)
+        return "\n".join(lines)
+
+
+def select_diverse(
+    proxies: Sequence[Any], limit: int, rtts: dict[str, float] | None = None
+) -> tuple[Sequence[Any], SelectionReport]:
+    """Keep at most ``limit`` proxies; see the module docstring.
+
+    ``rtts`` maps proxy names to a measured RTT in seconds. A
+    :class:`~clashstore.ProxyStore` comes back as a store.
+    """
+    rtts = rtts or {}
+    rows = [
+        (proxy_region(proxy["name"]), str(proxy.get("type", "")), proxy["name"])
+        for proxy in proxies
+    ]
+    report = SelectionReport(limit)
+    if limit <= 0 or len(proxies) <= limit:
+        report.kept = rows
+        return proxies, report
+
+    # 1. The `limit` best candidates per region and type, worst on top.
+    worst_first: dict[tuple[str, str], list[tuple[float, int]]] = {}
+    for index, (region, kind, name) in enumerate(rows):
+        rtt = rtts.get(name)
+        entry = (-(rtt if rtt is not None else math.inf), -index)
+        heap = worst_first.setdefault((region, kind), [])
+        if len(heap) < limit:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    by_region: dict[str, list[tuple[float, int]]] = {}
+    for (region, _), heap in worst_first.items():
+        by_region.setdefault(region, []).extend(heap)
+
+    # 2. Rank each region's candidates round-robin over their types.
+    keys: list[tuple[int, float, int]] = []
+    for heap in by_region.values():
+        candidates = sorted((-rtt, -index) for rtt, index in heap)
+        seen: Counter[str] = Counter()
+        interleaved = []
+        for rtt, index in candidates:
+            kind = rows[index][1]
+            interleaved.append((seen[kind], rtt, index))
+            seen[kind] += 1
+        interleaved.sort()
+        keys.extend(
+            (rank, rtt, index) for rank, (_, rtt, index) in enumerate(interleaved)
+        )
+
+    # 3. Every region's n-th pick before anyone's (n+1)-th.
+    chosen = {index for _, _, index in heapq.nsmallest(limit, keys)}
+    kept = [proxy for index, proxy in enumerate(proxies) if index in chosen]
+    for index, row in enumerate(rows):
+        (report.kept if index in chosen else report.dropped).append(row)
+    if isinstance(proxies, ProxyStore):
+        return proxies.subset(kept), report
+    return kept, report
@@ -0,0 +1,187 @@
+"""
+In-memory subscription server for rendered profiles.
+
+Every target is rendered once per source change and published as immutable
+bytes together with a gzip variant compressed up front and a strong ETag per
+variant. Requests are answered straight from memory by a small asyncio
+HTTP/1.1 server (GET/HEAD, keep-alive, ``If-None-Match`` -> 304), so a hit
+costs no disk access, rendering or compression.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import sys
+from dataclasses import dataclass
+from email.utils import formatdate
+from typing import Any
+
+from clashio import encode_text
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Content-Type per output format (see clashengine.OUTPUT_FORMATS).
+CONTENT_TYPES = {"yaml": "text/yaml; charset=utf-8", "json": "application/json"}
+MAX_HEADER_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class RenderedTarget:
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    gzip_etag: str
+    last_modified: str
+    content_type: str
+
+    @classmethod
+    def from_text(cls, text: str, fmt: str = "yaml") -> RenderedTarget:
+        body = encode_text(text)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return cls(
+            body,
+            gzip.compress(body, compresslevel=9, mtime=0),
+            f'"{digest}"',
+            f'"{digest}-gz"',
+            formatdate(usegmt=True),
+            CONTENT_TYPES[fmt],
+        )
+
+
+def parse_listen_address(value: str) -> tuple[str, int]:
+    """``[HOST:]PORT`` -> (host, port)."""
+    host, _, port = value.rpartition(":")
+    try:
+        number = int(port)
+    except ValueError as exc:
+        raise SystemExit(f"Invalid listen address: {value}") from exc
+    return host.strip("[]") or DEFAULT_HOST, number
+
+
+def _accepts_gzip(header: str) -> bool:
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison.
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class ProfileServer:
+    """Serves the latest published bytes of every route."""
+
+    def __init__(self) -> None:
+        self.routes: dict[str, RenderedTarget] = {}
+        self.requests = 0
+
+    def publish(self, route: str, text: str, fmt: str = "yaml") -> None:
+        """Make ``text`` in format ``fmt`` the content of ``/route`` (thread-safe)."""
+        self.routes = {**self.routes, route: RenderedTarget.from_text(text, fmt)}
+
+    def respond(self, method: str, path: str, headers: dict[str, str]) -> bytes:
+        route = path.split("?", 1)[0].lstrip("/")
+        rendered = self.routes.get(route)
+        if method not in ("GET", "HEAD"):
+            return _response(405, b"", {"Allow": "GET, HEAD"})
+        if rendered is None:
+            return _response(404, b"not found\n", {"Content-Type": "text/plain"})
+
+        compressed = _accepts_gzip(headers.get("accept-encoding", ""))
+        etag = rendered.gzip_etag if compressed else rendered.etag
+        extra = {
+            "ETag": etag,
+            "Last-Modified": rendered.last_modified,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if _etag_matches(headers.get("if-none-match", ""), etag):
+            return _response(304, b"", extra, head=True)
+        extra["Content-Type"] = rendered.content_type
+        if compressed:
+            extra["Content-Encoding"] = "gzip"
+        body = rendered.gzip_body if compressed else rendered.body
+        return _response(200, body, extra, head=method == "HEAD")
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    return
+                except asyncio.LimitOverrunError:
+                    writer.write(_response(431, b"", {"Connection": "close"}))
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(_response(400, b"", {"Connection": "close"}))
+                    return
+                headers: dict[str, str] = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                if headers.get("content-length", "0") != "0":
+                    writer.write(_response(413, b"", {"Connection": "close"}))
+                    return
+                self.requests += 1
+                writer.write(self.respond(method, path, headers))
+                await writer.drain()
+                connection = headers.get("connection", "").lower()
+                if connection == "close" or (
+                    version == "HTTP/1.0" and connection != "keep-alive"
+                ):
+                    return
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        server = await asyncio.start_server(
+            self.handle, host, port, limit=MAX_HEADER_BYTES, reuse_address=True
+        )
+        routes = ", ".join(f"/{route}" for route in sorted(self.routes))
+        print(f"Serving {routes} on http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+    431: "Request Header Fields Too Large",
+}
+
+
+def _response(
+    status: int, body: bytes, headers: dict[str, Any], head: bool = False
+) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS[status]}"]
+    if status != 304:
+        lines.append(f"Content-Length: {len(body)}")
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    data = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return data if head else data + body
@@ -0,0 +1,234 @@
+"""
+Compact in-memory store for very large proxy lists (``--compact``).
+
+PyYAML builds a fresh dict per proxy, with fresh key strings and fresh
+copies of every repeated value (``type``, ``cipher``, shared passwords and
+servers...). :class:`ProxyStore` packs each proxy into a :class:`Record`: a
+``__slots__`` object holding one shared key tuple per distinct key layout
+and a tuple of values. Keys, the values of :data:`INTERNED_FIELDS` and
+whole nested mappings (``ws-opts``, ``plugin-opts``...) are interned, so a
+million proxies cost a fraction of the equivalent dict list.
+
+Records are read-only :class:`~collections.abc.Mapping` views: lookups and
+iteration do not copy, nested mappings come back as records and lists as
+fresh lists. Dicts are only rebuilt when serializing, one proxy at a time
+(see :func:`clashemit.iter_block_document`); both YAML dumpers also know
+how to represent records and stores directly.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Any, Hashable, Iterable, Iterator
+
+import yaml
+
+from clashyaml import add_representer
+
+# Top-level fields whose values repeat across proxies. Values of nested
+# mappings are always interned.
+INTERNED_FIELDS = frozenset(
+    {
+        "type",
+        "server",
+        "port",
+        "cipher",
+        "password",
+        "uuid",
+        "alterId",
+        "sni",
+        "servername",
+        "client-fingerprint",
+        "network",
+        "flow",
+        "plugin",
+        "obfs",
+        "obfs-password",
+        "up",
+        "down",
+    }
+)
+
+
+def _unpack(value: Any) -> Any:
+    if type(value) is tuple:
+        return [_unpack(item) for item in value]
+    return value
+
+
+class Record(Mapping):
+    """Read-only mapping over a shared key tuple and a value tuple."""
+
+    __slots__ = ("_keys", "_values")
+
+    def __init__(self, keys: tuple[Any, ...], values: tuple[Any, ...]) -> None:
+        self._keys = keys
+        self._values = values
+
+    def __getitem__(self, key: Any) -> Any:
+        try:
+            index = self._keys.index(key)
+        except ValueError:
+            raise KeyError(key) from None
+        return _unpack(self._values[index])
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key in self._keys:
+            return _unpack(self._values[self._keys.index(key)])
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def items(self) -> Iterator[tuple[Any, Any]]:  # type: ignore[override]
+        return zip(self._keys, map(_unpack, self._values))
+
+    def to_dict(self) -> dict[str, Any]:
+        """A regular (deep) dict, as PyYAML would have built it."""
+        return {key: _materialize(value) for key, value in self.items()}
+
+    def __repr__(self) -> str:
+        return f"Record({self.to_dict()!r})"
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return Record, (self._keys, self._values)
+
+
+def _typed(values: tuple[Any, ...]) -> Hashable:
+    key: list[Hashable] = []
+    for value in values:
+        if type(value) is tuple:
+            key.append(_typed(value))
+        elif type(value) is Record:
+            # Nested records are interned and kept alive by the pool, so
+            # their identity is a stable key.
+            key.append((Record, id(value)))
+        else:
+            key.append((type(value), value))
+    return tuple(key)
+
+
+def _materialize(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_materialize(item) for item in value]
+    return value
+
+
+class ProxyStore(Sequence):
+    """Append-only, interned sequence of proxy :class:`Record` objects."""
+
+    def __init__(self, proxies: Iterable[Mapping[str, Any]] = ()) -> None:
+        self._records: list[Record] = []
+        self._shapes: dict[tuple[Any, ...], tuple[Any, ...]] = {}
+        self._scalars: dict[type, dict[Any, Any]] = {}
+        self._records_pool: dict[Hashable, Record] = {}
+        self.extend(proxies)
+
+    @classmethod
+    def _from_records(cls, records: list[Record]) -> ProxyStore:
+        store = cls()
+        store._records = records
+        return store
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # The pools only matter while appending; shared objects survive
+        # pickling through the memo anyway.
+        return ProxyStore._from_records, (self._records,)
+
+    def _scalar(self, value: Any) -> Any:
+        if value is None or isinstance(value, bool):
+            return value
+        pool = self._scalars.get(type(value))
+        if pool is None:
+            pool = self._scalars[type(value)] = {}
+        try:
+            return pool.setdefault(value, value)
+        except TypeError:  # unhashable oddities are kept as they are
+            return value
+
+    def _pack(self, value: Any, intern: bool) -> Any:
+        if isinstance(value, Mapping):
+            keys, values = self._pack_items(value, True)
+            # Typed key, so that {"tls": 1} never resolves to {"tls": True}.
+            key = (keys, _typed(values))
+            record = self._records_pool.get(key)
+            if record is None:
+                record = self._records_pool[key] = Record(keys, values)
+            return record
+        if isinstance(value, list):
+            return tuple(self._pack(item, intern) for item in value)
+        if intern:
+            return self._scalar(value)
+        return value
+
+    def _pack_items(
+        self, mapping: Mapping[str, Any], nested: bool
+    ) -> tuple[tuple[Any, ...], tuple[Any, ...]]:
+        keys = []
+        values = []
+        for key, value in mapping.items():
+            key = sys.intern(key) if type(key) is str else key
+            keys.append(key)
+            values.append(self._pack(value, nested or key in INTERNED_FIELDS))
+        shape = tuple(keys)
+        return self._shapes.setdefault(shape, shape), tuple(values)
+
+    def append(self, proxy: Mapping[str, Any]) -> None:
+        keys, values = self._pack_items(proxy, False)
+        self._records.append(Record(keys, values))
+
+    def extend(self, proxies: Iterable[Mapping[str, Any]]) -> None:
+        for proxy in proxies:
+            self.append(proxy)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return ProxyStore._from_records(self._records[index])
+        return self._records[index]
+
+    def __iter__(self) -> Iterator[Record]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def subset(self, records: Iterable[Record]) -> ProxyStore:
+        """A store over some of this store's records, sharing their values."""
+        return ProxyStore._from_records(list(records))
+
+    def names(self) -> list[str]:
+        # The strings are the records' own objects, not copies.
+        return [record["name"] for record in self._records]
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return [record.to_dict() for record in self._records]
+
+
+def compact(proxies: Iterable[Mapping[str, Any]]) -> ProxyStore:
+    """``proxies`` as a :class:`ProxyStore` (returned as is if it already is)."""
+    if isinstance(proxies, ProxyStore):
+        return proxies
+    return ProxyStore(proxies)
+
+
+def _represent_record(dumper: yaml.SafeDumper, record: Record) -> yaml.Node:
+    # Fresh dicts all the way down: interned nested records are shared
+    # objects and would otherwise be written as anchors and aliases.
+    return dumper.represent_dict(record.to_dict())
+
+
+def _represent_store(dumper: yaml.SafeDumper, store: ProxyStore) -> yaml.Node:
+    return dumper.represent_list(list(store))
+
+
+add_representer(Record, _represent_record)
+add_representer(ProxyStore, _represent_store)
@@ -0,0 +1,144 @@
+"""
+Streaming extraction of the ``proxies`` sequence from a Clash config.
+
+Instead of constructing the whole document, the top-level mapping is walked on
+the event layer: only the items of ``proxies`` are composed and constructed,
+one at a time, while every other section (``proxy-groups``, ``rule-providers``,
+``rules``, ...) is skipped event by event without building nodes or objects.
+Tag handling is the same as :class:`clashyaml.RelaxedLoader`.
+
+Anchors in the skipped sections are never recorded, so when a proxy aliases
+one, the rest of the proxies come from a regular full parse instead.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Iterator
+
+import yaml
+from yaml.composer import Composer, ComposerError
+from yaml.events import (
+    CollectionEndEvent,
+    CollectionStartEvent,
+    DocumentStartEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+)
+
+from clashyaml import HAS_LIBYAML, load_yaml, loader_for
+
+PROXIES_KEY = "proxies"
+
+if HAS_LIBYAML:
+    from clashyaml import CRelaxedLoader
+
+    class CStreamLoader(CRelaxedLoader, Composer):  # type: ignore[misc]
+        """libyaml events with the Python composer for per-item nodes."""
+
+
+def _stream_loader(backend: str | None) -> type:
+    loader = loader_for(backend)
+    if issubclass(loader, Composer):
+        return loader
+    return CStreamLoader
+
+
+def _skip_node(loader: Any) -> None:
+    depth = 0
+    while True:
+        event = loader.get_event()
+        if isinstance(event, CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, CollectionEndEvent):
+            depth -= 1
+        if depth == 0:
+            return
+
+
+def _is_undefined_alias(exc: ComposerError) -> bool:
+    return (exc.problem or "").startswith("found undefined alias")
+
+
+def _full_parse_proxies(raw: str, backend: str | None) -> list[Any]:
+    config = load_yaml(raw, backend)
+    if not isinstance(config, dict):
+        raise ValueError("top-level node is not a mapping")
+    entries = config.get(PROXIES_KEY)
+    if not isinstance(entries, list):
+        raise LookupError(f"'{PROXIES_KEY}' is not a sequence")
+    return entries
+
+
+def iter_proxies(raw: str, backend: str | None = None) -> Iterator[Any]:
+    """Yield the constructed entries of the top-level ``proxies`` sequence.
+
+    Raises ``yaml.YAMLError`` on malformed input, ``ValueError`` when the
+    document is not a mapping and ``LookupError`` when it has no ``proxies``
+    sequence.
+    """
+    loader = _stream_loader(backend)(raw)
+    # The libyaml parser does not run Composer.__init__; compose_node only
+    # needs the anchor table.
+    # Its check_event() also matches exact classes only, hence the
+    # isinstance() checks on peek_event() below.
+    loader.anchors = {}
+    try:
+        loader.get_event()  # StreamStart
+        if loader.check_event(StreamEndEvent):
+            raise ValueError("empty document")
+        if not isinstance(loader.get_event(), DocumentStartEvent):
+            raise ValueError("expected a document")
+        if not loader.check_event(MappingStartEvent):
+            raise ValueError("top-level node is not a mapping")
+        loader.get_event()
+
+        while not isinstance(loader.peek_event(), CollectionEndEvent):
+            key_event = loader.peek_event()
+            if not (
+                isinstance(key_event, ScalarEvent) and key_event.value == PROXIES_KEY
+            ):
+                _skip_node(loader)  # key
+                _skip_node(loader)  # value
+                continue
+
+            loader.get_event()
+            if not loader.check_event(SequenceStartEvent):
+                raise LookupError(f"'{PROXIES_KEY}' is not a sequence")
+            loader.get_event()
+            index = 0
+            while not isinstance(loader.peek_event(), CollectionEndEvent):
+                try:
+                    node = loader.compose_node(None, index)
+                except ComposerError as exc:
+                    if not _is_undefined_alias(exc):
+                        raise
+                    # Anchored in a skipped section (or nowhere, which the
+                    # full parse reports).
+                    yield from _full_parse_proxies(raw, backend)[index:]
+                    return
+                yield loader.construct_document(node)
+                index += 1
+            return
+        raise LookupError(f"no '{PROXIES_KEY}' key")
+    finally:
+        loader.dispose()
+
+
+def stream_proxies(path: Path, backend: str | None = None) -> Iterator[Any]:
+    """File-level wrapper around :func:`iter_proxies` with CLI error messages."""
+    try:
+        raw = path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        raw = path.read_text(encoding="utf-8", errors="ignore")
+
+    try:
+        yield from iter_proxies(raw, backend)
+    except yaml.YAMLError as exc:
+        raise SystemExit(f"Failed to parse {path}: {exc}") from exc
+    except ValueError as exc:
+        raise SystemExit(f"{path} does not contain a valid Clash mapping.") from exc
+    except LookupError as exc:
+        raise SystemExit("The source config must contain a 'proxies' list.") from exc
@@ -0,0 +1,366 @@
+"""
+Watch mode support: file watchers, warm parsing and warm rendering.
+
+* :func:`open_watcher` returns an inotify watcher on Linux (through ctypes,
+  watching the parent directories so editors that save by rename are seen)
+  and a stat-polling watcher everywhere else; :func:`watch` debounces bursts
+  of events into one callback.
+* :class:`WarmSource` re-reads a source file and re-parses only the
+  ``proxies`` entries whose text changed since the previous read. Anything
+  it cannot split safely (flow style, document markers, aliases between
+  entries...) falls back to a full parse. Other sections are not
+  re-validated between full parses.
+* :class:`WarmRenderer` keeps the rendered text of static target sections
+  and of every proxy, so a regeneration only renders what changed, and skips
+  targets whose inputs did not change at all. The text is identical to
+  :func:`clashyaml.dump_yaml` / :func:`clashemit.iter_flow_document`.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from clashemit import PROXIES_KEY, dump_json, render_flow
+from clashio import WriteResult, write_if_changed
+from clashyaml import dump_yaml, load_yaml
+
+DEFAULT_DEBOUNCE = 0.025
+DEFAULT_POLL_INTERVAL = 0.5
+
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detects changes by comparing ``stat`` results every ``interval``."""
+
+    def __init__(
+        self, paths: Iterable[Path], interval: float = DEFAULT_POLL_INTERVAL
+    ) -> None:
+        self.paths = [Path(path) for path in paths]
+        self.interval = max(0.01, interval)
+        self._state = {path: self._signature(path) for path in self.paths}
+
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, int, int] | None:
+        try:
+            info = path.stat()
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size, info.st_ino
+
+    def wait(self, timeout: float | None = None) -> set[Path]:
+        """Changed paths, or an empty set once ``timeout`` seconds passed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in self.paths:
+                signature = self._signature(path)
+                if signature != self._state[path]:
+                    self._state[path] = signature
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is None:
+                time.sleep(self.interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher on the directories holding ``paths``."""
+
+    def __init__(self, paths: Iterable[Path]) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._names: dict[int, dict[str, Path]] = {}
+        try:
+            by_dir: dict[Path, dict[str, Path]] = {}
+            for path in paths:
+                path = Path(path).resolve()
+                by_dir.setdefault(path.parent, {})[path.name] = path
+            for directory, names in by_dir.items():
+                wd = libc.inotify_add_watch(
+                    self._fd, os.fsencode(directory), _IN_MASK
+                )
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+                self._names[wd] = names
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def wait(self, timeout: float | None = None) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = self._read()
+            if changed:
+                return changed
+
+    def _read(self) -> set[Path]:
+        changed: set[Path] = set()
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            path = self._names.get(wd, {}).get(name)
+            if path is not None:
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher(
+    paths: Iterable[Path], poll_interval: float = DEFAULT_POLL_INTERVAL, poll: bool = False
+) -> PollingWatcher | InotifyWatcher:
+    """An inotify watcher where available, a polling watcher otherwise."""
+    paths = list(paths)
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, poll_interval)
+
+
+def watch(
+    watcher: PollingWatcher | InotifyWatcher,
+    callback: Callable[[set[Path]], None],
+    debounce: float = DEFAULT_DEBOUNCE,
+    stop: Callable[[], bool] | None = None,
+) -> None:
+    """Call ``callback`` once per burst of changes, until ``stop()`` is true."""
+    while stop is None or not stop():
+        changed = watcher.wait(1.0 if stop is not None else None)
+        if not changed:
+            continue
+        while True:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            changed |= more
+        callback(changed)
+
+
+_PROXIES_LINE = re.compile(r"^proxies:[ \t]*(?:#.*)?$", re.M)
+_TOP_LEVEL_KEY = re.compile(r"^[^\s#\-]", re.M)
+_MARKERS = re.compile(r"^(?:---|\.\.\.|%)", re.M)
+_FIRST_ITEM = re.compile(r"^( *)-(?:[ \t]|$)", re.M)
+
+
+class WarmSource:
+    """Re-reads ``path`` and re-parses only the proxy entries that changed.
+
+    Returned entries are shared with the cache and must not be mutated.
+    """
+
+    def __init__(self, path: Path, backend: str | None = None) -> None:
+        self.path = path
+        self.backend = backend
+        self._entries: dict[str, Any] = {}
+        self.reused = 0
+        self.parsed = 0
+        self.fell_back = False
+
+    def read(self) -> str:
+        try:
+            return self.path.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            return self.path.read_text(encoding="utf-8", errors="ignore")
+
+    def load(self, full_parse: Callable[[str], list[Any]]) -> list[Any]:
+        """Proxy entries of the current file.
+
+        ``full_parse`` is used when the proxies section cannot be split; it
+        receives the text and returns the raw entries.
+        """
+        raw = self.read()
+        chunks = self._split(raw)
+        if chunks is not None:
+            entries = self._load_chunks(chunks)
+            if entries is not None:
+                return entries
+        self._entries = {}
+        self.reused, self.parsed, self.fell_back = 0, 0, True
+        return full_parse(raw)
+
+    @staticmethod
+    def _split(raw: str) -> list[str] | None:
+        if _MARKERS.search(raw):
+            return None
+        starts = [match.end() for match in _PROXIES_LINE.finditer(raw)]
+        if len(starts) != 1:
+            return None
+        end = _TOP_LEVEL_KEY.search(raw, starts[0] + 1)
+        section = raw[starts[0] : end.start() if end else len(raw)]
+        first = _FIRST_ITEM.search(section)
+        if first is None:
+            return None
+        indent = len(first.group(1))
+        item = re.compile(rf"^ {{{indent}}}-(?:[ \t]|$)", re.M)
+        bounds = [match.start() for match in item.finditer(section)]
+        bounds.append(len(section))
+        return [section[start:stop] for start, stop in zip(bounds, bounds[1:])]
+
+    def _load_chunks(self, chunks: list[str]) -> list[Any] | None:
+        previous, current = self._entries, {}
+        entries: list[Any] = []
+        reused = parsed = 0
+        for chunk in chunks:
+            if chunk in current:
+                entry = current[chunk]
+                reused += 1
+            elif chunk in previous:
+                entry = current[chunk] = previous[chunk]
+                reused += 1
+            else:
+                try:
+                    value = load_yaml(chunk, self.backend)
+                except Exception:
+                    return None  # e.g. aliases to anchors in other entries
+                if not isinstance(value, list) or len(value) != 1:
+                    return None
+                entry = current[chunk] = value[0]
+                parsed += 1
+            entries.append(entry)
+        self._entries = current
+        self.reused, self.parsed, self.fell_back = reused, parsed, False
+        return entries
+
+
+class WarmRenderer:
+    """Renders targets from cached section and per-proxy text."""
+
+    def __init__(
+        self,
+        backend: str | None = None,
+        flow: bool = False,
+        formats: dict[str, str] | None = None,
+    ) -> None:
+        self.backend = backend
+        self.flow = flow
+        self.formats = formats or {}
+        self._sections: dict[str, str] = {}
+        self._proxies: dict[str, str] = {}
+        self._inputs: dict[str, tuple[Any, ...]] = {}
+
+    def _section(self, section: dict[str, Any], used: dict[str, str]) -> str:
+        if not section:
+            return ""
+        key = repr(section)
+        text = self._sections.get(key)
+        if text is None:
+            text = dump_yaml(section, None, self.backend)
+        used[key] = text
+        return text
+
+    def render(self, config: dict[str, Any]) -> str:
+        head: dict[str, Any] = {}
+        tail: dict[str, Any] = {}
+        proxies: list[Any] | None = None
+        for key, value in config.items():
+            if key == PROXIES_KEY:
+                proxies = value
+            elif proxies is not None:
+                tail[key] = value
+            else:
+                head[key] = value
+
+        sections: dict[str, str] = {}
+        parts = [self._section(head, sections)]
+        if proxies is not None:
+            if proxies:
+                parts.append(f"{PROXIES_KEY}:\n")
+            else:
+                parts.append(f"{PROXIES_KEY}: []\n")
+            for proxy in proxies:
+                key = repr(proxy)
+                text = self._proxies.get(key)
+                if text is None:
+                    if self.flow:
+                        text = f"- {render_flow(proxy)}\n"
+                    else:
+                        text = dump_yaml([proxy], None, self.backend)
+                    self._proxies[key] = text
+                parts.append(text)
+        parts.append(self._section(tail, sections))
+        self._sections.update(sections)
+        return "".join(parts)
+
+    def prune(self, proxies: list[Any]) -> None:
+        """Forget rendered proxies that are no longer in use."""
+        keep = {repr(proxy) for proxy in proxies}
+        self._proxies = {key: text for key, text in self._proxies.items() if key in keep}
+        if len(self._sections) > 64:
+            self._sections.clear()
+
+    def update(
+        self,
+        target: Any,
+        proxies: list[dict[str, Any]],
+        proxy_names: list[str],
+        options: dict[str, Any] | None = None,
+    ) -> str | None:
+        """Text of ``target``, or None when its inputs are unchanged."""
+        options = {
+            key: value
+            for key, value in (options or {}).items()
+            if key in target.options
+        }
+        inputs = (list(proxies), list(proxy_names) if target.with_names else None, options)
+        if self._inputs.get(target.name) == inputs:
+            return None
+        self._inputs.pop(target.name, None)
+        config = target.render(proxies, proxy_names, options)
+        if self.formats.get(target.name) == "json":
+            text = dump_json(config)  # fast enough not to need the caches
+        else:
+            text = self.render(config)
+        self._inputs[target.name] = inputs
+        return text
+
+    def write(
+        self,
+        target: Any,
+        path: Path,
+        proxies: list[dict[str, Any]],
+        proxy_names: list[str],
+        options: dict[str, Any] | None = None,
+    ) -> WriteResult | None:
+        """Regenerate ``target`` unless its inputs are unchanged (None)."""
+        text = self.update(target, proxies, proxy_names, options)
+        return None if text is None else write_if_changed(path, text)
@@ -10,14 +10,31 @@ from __future__ import annotations
 
 import argparse
 import os
-import sys
 from pathlib import Path
 from typing import Any
 
-try:
-    import yaml
-except ImportError as exc:  # pragma: no cover - makes intent explicit
-    raise SystemExit("PyYAML is required to run this script.") from exc
+from clashcache import ParseCache
+from clashengine import OUTPUT_FORMATS, load_proxies, write_document
+from clashengine import (  # noqa: F401 - re-exported for callers
+    collect_proxies,
+    read_clash_config,
+)
+from clashfilter import FilterSet, add_filter_arguments
+from clashgroups import (
+    DEFAULT_REGION_SIZE,
+    GROUP_ENCODINGS,
+    build_region_groups,
+    encode_member_lists,
+    format_encoding_report,
+    measure_group_encodings,
+    probes_per_interval,
+)
+from clashmerge import parse_source_spec
+from clashprobe import PROBE_MODES
+from clashprofile import add_profile_arguments, profiler_from_args
+from clashrules import RULE_OPTIMIZATIONS, compile_rules
+from clashyaml import RelaxedLoader  # noqa: F401 - re-exported for callers
+from clashyaml import BACKEND_CHOICES
 
 
 PRIMARY_GROUP = "\U0001F506 LIST"  # 🔆 LIST
@@ -27,27 +44,6 @@ FALLBACK_GROUP = "Auto-Fallback"
 TEST_URL = "http://www.gstatic.com/generate_204"
 
 
-class RelaxedLoader(yaml.SafeLoader):
-    """Safe loader that silently accepts unknown YAML tags."""
-
-
-def _construct_unknown(  # type: ignore[override]
-    loader: RelaxedLoader, node: yaml.Node
-) -> Any:
-    if isinstance(node, yaml.ScalarNode):
-        return loader.construct_scalar(node)
-    if isinstance(node, yaml.SequenceNode):
-        return loader.construct_sequence(node)
-    if isinstance(node, yaml.MappingNode):
-        return loader.construct_mapping(node)
-    raise yaml.constructor.ConstructorError(  # pragma: no cover - defensive
-        None, None, f"Cannot construct node type {type(node)}", node.start_mark
-    )
-
-
-RelaxedLoader.add_constructor(None, _construct_unknown)
-
-
 INVISIBLE_CHARS = {  # control characters often copied from browsers
     "\ufeff",  # BOM
     "\u202a",  # LRE
@@ -73,34 +69,212 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "source",
-        nargs="?",
-        help="Path to the source clash.yaml file (prompted if omitted)",
+        nargs="*",
+        help="Source clash.yaml file (prompted if omitted) or a .pickle written by "
+        "--dump-parsed; several sources are merged, PATH=PRIORITY[:PREFIX] sets "
+        "a source's priority and name prefix",
     )
     parser.add_argument(
         "-o",
         "--output",
         help="Destination file (defaults to Sub-Win.yml next to this script)",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Construct only the 'proxies' section and skip the rest of the source",
+    )
+    parser.add_argument(
+        "--parallel-parse",
+        nargs="?",
+        type=int,
+        const=0,
+        metavar="WORKERS",
+        help="Parse the 'proxies' list in chunks across WORKERS processes "
+        "(default: one per CPU), falling back to a normal parse when its item "
+        "boundaries are ambiguous; --stream takes precedence",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Merge functionally identical proxies and make names unique",
+    )
+    parser.add_argument(
+        "--dedup-report",
+        help="Write the list of merged and renamed proxies to this file",
+    )
+    parser.add_argument(
+        "--probe",
+        choices=PROBE_MODES,
+        help="Probe server:port of every proxy and drop or demote dead ones",
+    )
+    parser.add_argument(
+        "--probe-timeout",
+        type=float,
+        default=3.0,
+        help="Seconds to wait for each probe (default: 3)",
+    )
+    parser.add_argument(
+        "--probe-concurrency",
+        type=int,
+        default=64,
+        help="Maximum number of probes in flight (default: 64)",
+    )
+    parser.add_argument(
+        "--probe-rate",
+        type=float,
+        default=4.0,
+        help="Maximum probe attempts per second against one host (default: 4)",
+    )
+    parser.add_argument(
+        "--region-groups",
+        dest="region_size",
+        type=int,
+        nargs="?",
+        const=DEFAULT_REGION_SIZE,
+        metavar="SIZE",
+        help="Shard auto-testing into one url-test group per region with at most "
+        f"SIZE members (default SIZE: {DEFAULT_REGION_SIZE})",
+    )
+    parser.add_argument(
+        "--group-encoding",
+        choices=GROUP_ENCODINGS,
+        default="anchor",
+        help="How groups listing every proxy are written: one anchored list "
+        "(default), repeated lists, or include-all for Clash.Meta clients",
+    )
+    parser.add_argument(
+        "--group-report",
+        action="store_true",
+        help="Report output size and parse time for every group encoding",
+    )
+    parser.add_argument(
+        "--optimize-rules",
+        choices=RULE_OPTIMIZATIONS,
+        nargs="?",
+        const="strict",
+        help="Compile the rules: drop dead rules, collapse CIDRs and order "
+        "cheap rules first; match-last also moves MATCH to the end",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Hold proxies in a compact interned store instead of dicts "
+        "(for very large inputs; pair with --stream)",
+    )
+    parser.add_argument(
+        "--flow-proxies",
+        action="store_true",
+        help="Stream proxies one per line in flow style (smaller, constant memory)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=OUTPUT_FORMATS[0],
+        help="Output format; JSON is valid YAML for Clash cores and much faster "
+        "to write and load (default: yaml)",
+    )
+    parser.add_argument(
+        "--dump-parsed",
+        metavar="FILE",
+        help="Also save the validated proxies to FILE (.pickle) for later runs "
+        "to use as their source instead of parsing YAML",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the parse cache for this run",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove all cached parse results before running",
+    )
+    parser.add_argument(
+        "--yaml-backend",
+        choices=BACKEND_CHOICES,
+        help="YAML implementation to use (default: libyaml when available)",
+    )
+    add_filter_arguments(parser)
+    add_profile_arguments(parser)
     return parser.parse_args()
 
 
-def read_clash_config(path: Path) -> dict[str, Any]:
-    try:
-        raw = path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        raw = path.read_text(encoding="utf-8", errors="ignore")
+def build_proxy_groups(
+    proxy_names: list[str],
+    region_size: int | None = None,
+    group_encoding: str = "anchor",
+) -> list[dict[str, Any]]:
+    if region_size:
+        groups = build_region_proxy_groups(proxy_names, region_size)
+    else:
+        groups = build_flat_proxy_groups(proxy_names)
+    return encode_member_lists(groups, proxy_names, group_encoding)
+
+
+def build_flat_proxy_groups(proxy_names: list[str]) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": PRIMARY_GROUP,
+            "type": "select",
+            "proxies": [AUTO_GROUP, SELECT_GROUP],
+        },
+        {"name": SELECT_GROUP, "type": "select", "proxies": proxy_names},
+        {
+            "name": AUTO_GROUP,
+            "type": "url-test",
+            "proxies": proxy_names,
+            "url": TEST_URL,
+            "interval": 300,
+        },
+        {
+            "name": FALLBACK_GROUP,
+            "type": "fallback",
+            "proxies": proxy_names,
+            "url": TEST_URL,
+            "interval": 300,
+        },
+    ]
 
-    try:
-        data = yaml.load(raw, Loader=RelaxedLoader)
-    except yaml.YAMLError as exc:
-        raise SystemExit(f"Failed to parse {path}: {exc}") from exc
 
-    if not isinstance(data, dict):
-        raise SystemExit(f"{path} does not contain a valid Clash mapping.")
-    return data
+def build_region_proxy_groups(
+    proxy_names: list[str], region_size: int
+) -> list[dict[str, Any]]:
+    region_names, region_groups = build_region_groups(
+        proxy_names, region_size, TEST_URL, 300
+    )
+    return [
+        {
+            "name": PRIMARY_GROUP,
+            "type": "select",
+            "proxies": [AUTO_GROUP, *region_names, SELECT_GROUP],
+        },
+        {"name": SELECT_GROUP, "type": "select", "proxies": proxy_names},
+        {
+            "name": AUTO_GROUP,
+            "type": "url-test",
+            "proxies": region_names,
+            "url": TEST_URL,
+            "interval": 300,
+        },
+        {
+            "name": FALLBACK_GROUP,
+            "type": "fallback",
+            "proxies": region_names,
+            "url": TEST_URL,
+            "interval": 300,
+        },
+        *region_groups,
+    ]
 
 
-def build_output(proxies: list[dict[str, Any]], proxy_names: list[str]) -> dict[str, Any]:
+def build_output(
+    proxies: list[dict[str, Any]],
+    proxy_names: list[str],
+    region_size: int | None = None,
+    group_encoding: str = "anchor",
+    optimize_rules: str | None = None,
+) -> dict[str, Any]:
     return {
         "mixed-port": 7890,
         "allow-lan": False,
@@ -122,63 +296,56 @@ def build_output(proxies: list[dict[str, Any]], proxy_names: list[str]) -> dict[
             "fallback": ["94.140.14.14", "94.140.14.15"],
         },
         "proxies": proxies,
-        "proxy-groups": [
-            {
-                "name": PRIMARY_GROUP,
-                "type": "select",
-                "proxies": [AUTO_GROUP, SELECT_GROUP],
-            },
-            {"name": SELECT_GROUP, "type": "select", "proxies": proxy_names},
-            {
-                "name": AUTO_GROUP,
-                "type": "url-test",
-                "proxies": proxy_names,
-                "url": TEST_URL,
-                "interval": 300,
-            },
-            {
-                "name": FALLBACK_GROUP,
-                "type": "fallback",
-                "proxies": proxy_names,
-                "url": TEST_URL,
-                "interval": 300,
-            },
-        ],
-        "rules": [
-            "DOMAIN-SUFFIX,ad.com,REJECT",
-            "GEOIP,IR,DIRECT",
-            f"MATCH,{PRIMARY_GROUP}",
-            f"IP-CIDR,8.8.8.8/32,{PRIMARY_GROUP}",
-            f"IP-CIDR,8.8.4.4/32,{PRIMARY_GROUP}",
-            f"IP-CIDR,1.1.1.1/32,{PRIMARY_GROUP}",
-            f"IP-CIDR,1.0.0.1/32,{PRIMARY_GROUP}",
-            "SRC-IP-CIDR,192.168.1.201/32,DIRECT",
-            "IP-CIDR,10.0.0.0/8,DIRECT",
-            "IP-CIDR,172.16.0.0/12,DIRECT",
-            "IP-CIDR,127.0.0.0/8,DIRECT",
-            "IP-CIDR,192.168.0.0/16,DIRECT",
-        ],
+        "proxy-groups": build_proxy_groups(proxy_names, region_size, group_encoding),
+        "rules": build_rules(optimize_rules),
     }
 
 
+def build_rules(optimize_rules: str | None = None) -> list[str]:
+    rules = [
+        "DOMAIN-SUFFIX,ad.com,REJECT",
+        "GEOIP,IR,DIRECT",
+        f"MATCH,{PRIMARY_GROUP}",
+        f"IP-CIDR,8.8.8.8/32,{PRIMARY_GROUP}",
+        f"IP-CIDR,8.8.4.4/32,{PRIMARY_GROUP}",
+        f"IP-CIDR,1.1.1.1/32,{PRIMARY_GROUP}",
+        f"IP-CIDR,1.0.0.1/32,{PRIMARY_GROUP}",
+        "SRC-IP-CIDR,192.168.1.201/32,DIRECT",
+        "IP-CIDR,10.0.0.0/8,DIRECT",
+        "IP-CIDR,172.16.0.0/12,DIRECT",
+        "IP-CIDR,127.0.0.0/8,DIRECT",
+        "IP-CIDR,192.168.0.0/16,DIRECT",
+    ]
+    if optimize_rules:
+        rules, _ = compile_rules(rules, hoist_match=optimize_rules == "match-last")
+    return rules
+
+
 def main() -> None:
     args = parse_args()
-    source_str = args.source
-    if not source_str:
+    if args.clear_cache:
+        removed = ParseCache().clear()
+        print(f"Removed {removed} cached parse result(s).")
+        if not args.source:
+            return
+
+    source_values = args.source
+    if not source_values:
         try:
-            source_str = input("Enter path to clash YAML file: ")
+            source_values = [input("Enter path to clash YAML file: ")]
         except EOFError:
-            source_str = ""
-    if not source_str:
-        raise SystemExit("No source file path provided.")
-
-    source_clean = sanitize_path(source_str)
-    if not source_clean:
+            source_values = []
+    specs = [
+        parse_source_spec(cleaned)
+        for cleaned in map(sanitize_path, source_values)
+        if cleaned
+    ]
+    if not specs:
         raise SystemExit("No source file path provided.")
-
-    source = Path(source_clean).expanduser().resolve()
-    if not source.is_file():
-        raise SystemExit(f"Source file not found: {source}")
+    for spec in specs:
+        if not spec.path.is_file():
+            raise SystemExit(f"Source file not found: {spec.path}")
+    source_label = ", ".join(spec.path.name for spec in specs)
 
     output_path = (
         Path(args.output).expanduser().resolve()
@@ -187,47 +354,44 @@ def main() -> None:
     )
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    config = read_clash_config(source)
-    proxies_raw = config.get("proxies")
-    if not isinstance(proxies_raw, list):
-        raise SystemExit("The source config must contain a 'proxies' list.")
-
-    proxies: list[dict[str, Any]] = []
-    proxy_names: list[str] = []
-    skipped = 0
-    for entry in proxies_raw:
-        if not isinstance(entry, dict):
-            skipped += 1
-            continue
-        name = entry.get("name")
-        if not isinstance(name, str) or not name.strip():
-            skipped += 1
-            continue
-        proxies.append(entry)
-        proxy_names.append(name)
-
-    if not proxies:
-        raise SystemExit("No usable proxies were found in the source config.")
-
-    if skipped:
-        print(f"Skipped {skipped} malformed proxy entries.", file=sys.stderr)
-
-    result = build_output(proxies, proxy_names)
-
-    with output_path.open("w", encoding="utf-8") as handle:
-        yaml.dump(
-            result,
-            handle,
-            Dumper=yaml.SafeDumper,
-            allow_unicode=True,
-            sort_keys=False,
-            default_flow_style=False,
+    profiler = profiler_from_args(args, "clashwin")
+    filters = FilterSet.from_args(args.include, args.exclude, ["subwin"])
+    proxies, proxy_names, _ = load_proxies(args, specs, profiler, filters)
+
+    if args.optimize_rules:
+        hoist = args.optimize_rules == "match-last"
+        print(compile_rules(build_rules(), hoist)[1].format())
+
+    with profiler.phase("build"):
+        result = build_output(
+            proxies,
+            proxy_names,
+            args.region_size,
+            args.group_encoding,
+            args.optimize_rules,
+        )
+    if args.group_report:
+        stats = measure_group_encodings(
+            lambda encoding: build_output(
+                proxies, proxy_names, args.region_size, encoding, args.optimize_rules
+            ),
+            args.yaml_backend,
         )
+        print(format_encoding_report(output_path.name, stats))
+    if args.region_size:
+        before = probes_per_interval(build_proxy_groups(proxy_names))
+        after = probes_per_interval(result["proxy-groups"])
+        print(f"Health checks per interval: {before} -> {after}.")
+
+    written = write_document(
+        output_path, result, args.yaml_backend, args.flow_proxies, profiler, args.format
+    )
 
     print(
-        f"Generated {output_path} with {len(proxies)} proxies "
-        f"based on {source.name}."
+        f"{'Generated' if written.written else 'Unchanged'} {output_path} "
+        f"with {len(proxies)} proxies based on {source_label}."
     )
+    profiler.finish(args.profile_jsonl)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+"""
+YAML backend shared by the Clash conversion scripts.
+
+The libyaml-backed ``CSafeLoader``/``CSafeDumper`` are used when PyYAML was
+built against libyaml, with a clean fallback to the pure-Python classes.
+Both loaders accept unknown tags the same way (``!<str> 3135771619`` loads as
+the string ``"3135771619"``) and both dumpers produce byte-identical output.
+
+Set ``CLASH_YAML_BACKEND=python`` (or pass ``backend="python"``) to force the
+pure-Python implementation.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping, Sequence
+from typing import IO, Any
+
+try:
+    import yaml
+except ImportError as exc:  # pragma: no cover - intentional fail-fast
+    raise SystemExit("PyYAML is required to run this script.") from exc
+
+
+BACKEND_ENV = "CLASH_YAML_BACKEND"
+BACKEND_CHOICES = ("auto", "libyaml", "python")
+HAS_LIBYAML = bool(getattr(yaml, "__with_libyaml__", False))
+
+DUMP_OPTIONS: dict[str, Any] = {
+    "allow_unicode": True,
+    "sort_keys": False,
+    "default_flow_style": False,
+}
+
+
+class RelaxedLoader(yaml.SafeLoader):
+    """Safe loader that silently accepts unknown YAML tags."""
+
+
+def _construct_unknown(  # type: ignore[override]
+    loader: yaml.BaseLoader, node: yaml.Node
+) -> Any:
+    if isinstance(node, yaml.ScalarNode):
+        return loader.construct_scalar(node)
+    if isinstance(node, yaml.SequenceNode):
+        return loader.construct_sequence(node)
+    if isinstance(node, yaml.MappingNode):
+        return loader.construct_mapping(node)
+    raise yaml.constructor.ConstructorError(  # pragma: no cover - defensive
+        None, None, f"Cannot construct node type {type(node)}", node.start_mark
+    )
+
+
+RelaxedLoader.add_constructor(None, _construct_unknown)
+
+if HAS_LIBYAML:
+
+    class CRelaxedLoader(yaml.CSafeLoader):  # type: ignore[misc, name-defined]
+        """libyaml-backed twin of :class:`RelaxedLoader`."""
+
+    CRelaxedLoader.add_constructor(None, _construct_unknown)
+
+
+class ClashDumper(yaml.SafeDumper):
+    """Safe dumper that other modules may teach about their own types."""
+
+
+if HAS_LIBYAML:
+
+    class CClashDumper(yaml.CSafeDumper):  # type: ignore[misc, name-defined]
+        """libyaml-backed twin of :class:`ClashDumper`."""
+
+
+def add_representer(data_type: type, representer: Any) -> None:
+    """Register ``representer`` on the dumpers :func:`dump_yaml` uses only."""
+    ClashDumper.add_representer(data_type, representer)
+    if HAS_LIBYAML:
+        CClashDumper.add_representer(data_type, representer)
+
+
+def resolve_backend(backend: str | None = None) -> str:
+    """Return the concrete backend name ("libyaml" or "python")."""
+    choice = (backend or os.environ.get(BACKEND_ENV) or "auto").strip().lower()
+    if choice not in BACKEND_CHOICES:
+        raise SystemExit(
+            f"Unknown YAML backend {choice!r}; expected one of "
+            f"{', '.join(BACKEND_CHOICES)}."
+        )
+    if choice == "python":
+        return "python"
+    if not HAS_LIBYAML:
+        if choice == "libyaml":
+            raise SystemExit("The libyaml backend is not available in this PyYAML.")
+        return "python"
+    return "libyaml"
+
+
+def loader_for(backend: str | None = None) -> type:
+    if resolve_backend(backend) == "libyaml":
+        return CRelaxedLoader
+    return RelaxedLoader
+
+
+def load_yaml(raw: str, backend: str | None = None) -> Any:
+    """Parse ``raw`` with the selected backend. Raises ``yaml.YAMLError``."""
+    return yaml.load(raw, Loader=loader_for(backend))
+
+
+def _has_astral(value: Any) -> bool:
+    # libyaml treats characters outside the BMP (flag emoji and friends) as
+    # non-printable and escapes them, while the Python emitter writes them
+    # as-is. Documents containing them go through the Python dumper so the
+    # bytes on disk do not depend on how PyYAML was built.
+    if isinstance(value, str):
+        return not value.isascii() and max(value) > "\uffff"
+    if isinstance(value, dict):
+        return any(_has_astral(k) or _has_astral(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return any(_has_astral(item) for item in value)
+    # Compact records and stores (see clashstore).
+    if isinstance(value, Mapping):
+        return any(_has_astral(k) or _has_astral(v) for k, v in value.items())
+    if isinstance(value, Sequence) and not isinstance(value, bytes):
+        return any(_has_astral(item) for item in value)
+    return False
+
+
+def dumper_for(data: Any, backend: str | None = None) -> type:
+    if resolve_backend(backend) == "libyaml" and not _has_astral(data):
+        return CClashDumper
+    return ClashDumper
+
+
+def dump_yaml(
+    data: Any, handle: IO[str] | None = None, backend: str | None = None
+) -> str | None:
+    """Serialize ``data`` using the options every Clash target relies on.
+
+    Returns the document as a string when ``handle`` is omitted.
+    """
+    return yaml.dump(
+        data, handle, Dumper=dumper_for(data, backend), **DUMP_OPTIONS
+    )
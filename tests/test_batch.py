@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from clashbatch import output_dirs
+
+
+def test_sources_sharing_a_stem_keep_their_suffix() -> None:
+    base, root = Path("/subs"), Path("/profiles")
+    sources = [
+        base / "acme" / "main.yaml",
+        base / "acme" / "Main.yml",
+        base / "acme" / "other.yaml",
+    ]
+    assert output_dirs(base, sources, root) == {
+        sources[0]: root / "acme" / "main.yaml",
+        sources[1]: root / "acme" / "Main.yml",
+        sources[2]: root / "acme" / "other",
+    }
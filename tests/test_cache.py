@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+from clashcache import ParseCache
+
+
+def test_failed_put_leaves_no_temporary_file(tmp_path: Path, capsys) -> None:
+    cache = ParseCache(tmp_path)
+    cache.put("key", [{"name": "a", "lock": threading.Lock()}], ["a"])
+    assert "Could not write parse cache" in capsys.readouterr().err
+    assert list(tmp_path.iterdir()) == []
+    assert cache.get("key") is None
+
+
+def test_put_then_get(tmp_path: Path) -> None:
+    cache = ParseCache(tmp_path)
+    cache.put("key", [{"name": "a"}], ["a"])
+    assert cache.get("key") == ([{"name": "a"}], ["a"])
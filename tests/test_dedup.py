@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import time
+
+from clashdedup import dedupe_proxies
+
+
+def _proxies(count: int, name: str = "HK") -> list[dict]:
+    return [
+        {"name": name, "type": "ss", "server": f"s{index}.example.com", "port": 443}
+        for index in range(count)
+    ]
+
+
+def test_colliding_names_get_the_first_free_suffix() -> None:
+    proxies = _proxies(4) + [{**_proxies(1, "HK (3)")[0], "server": "other"}]
+    _, names, report = dedupe_proxies(proxies)
+    assert names == ["HK", "HK (2)", "HK (4)", "HK (5)", "HK (3)"]
+    assert len(report.renamed) == 3
+
+
+def test_renaming_many_same_named_proxies_is_linear() -> None:
+    started = time.perf_counter()
+    _, names, _ = dedupe_proxies(_proxies(20_000))
+    assert time.perf_counter() - started < 2
+    assert names[-1] == "HK (20000)"
+    assert len(set(names)) == len(names)
+
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+import yaml
+
+from clashemit import dump_json, iter_flow_document, render_flow
+
+
+@pytest.mark.parametrize(
+    ("value", "escape"),
+    [("a\x85b", "\\N"), ("a\u2028b", "\\L"), ("a\u2029b", "\\P")],
+)
+def test_unicode_line_breaks_are_escaped(value: str, escape: str) -> None:
+    text = render_flow(value)
+    assert text == f'"a{escape}b"'
+    assert text == yaml.dump(value, default_style='"', allow_unicode=True).strip()
+    assert yaml.safe_load(text) == value
+
+
+def test_unicode_line_breaks_round_trip_in_flow_proxies() -> None:
+    proxy = {"name": "HK\x85 1\u2028x\u2029", "type": "ss", "server": "a\u2028b"}
+    config = {"port": 7890, "proxies": [proxy], "rules": ["MATCH,DIRECT"]}
+    text = "".join(iter_flow_document(config))
+    assert not {"\x85", "\u2028", "\u2029"} & set(text)
+    assert yaml.safe_load(text) == config
+
+
+def test_json_floats_load_back_as_floats_in_yaml() -> None:
+    config = {
+        "values": [1e20, -1e-07, 1.5e20, 0.1, 3.0, 100],
+        "name": 'say "1e+20" \\ 2e-05',
+        "1e+20": 2e-05,
+    }
+    text = dump_json(config)
+    assert json.loads(text) == config
+    assert yaml.safe_load(text) == config
+    assert '"name":"say \\"1e+20\\" \\\\ 2e-05"' in text
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import gc
+import weakref
+
+from clash import collect_proxies
+from clashdedup import dedupe_proxies
+from clashfilter import FilterSet
+from clashstore import ProxyStore
+
+TARGETS = ["subz", "subwin"]
+
+
+class Proxy(dict):
+    """A dict that can be weakly referenced."""
+
+
+CREDENTIALS = {
+    "ss": {"cipher": "aes-128-gcm", "password": "p"},
+    "vmess": {"uuid": "u"},
+    "trojan": {"password": "p"},
+}
+
+
+def _proxy(name: str, kind: str, server: str) -> Proxy:
+    return Proxy(name=name, type=kind, server=server, port=443, **CREDENTIALS[kind])
+
+
+def _proxies() -> list[Proxy]:
+    return [
+        _proxy(f"香港 {index}", kind, f"s{index}")
+        for index, kind in enumerate(["ss", "vmess", "trojan", "ss"])
+    ]
+
+
+def _filters() -> FilterSet:
+    filters = FilterSet.from_args(
+        ["subz:type=ss|vmess"], ["subwin:name=3$"], TARGETS
+    )
+    assert filters is not None
+    return filters
+
+
+def test_select_uses_the_memberships_of_the_collect_pass() -> None:
+    filters = _filters()
+    proxies, _ = collect_proxies(_proxies(), filters=filters)
+    assert filters.select("subz", proxies)[1] == ["香港 0", "香港 1", "香港 3"]
+    assert filters.select("subwin", proxies)[1] == ["香港 0", "香港 1", "香港 2"]
+
+
+def test_select_recomputes_after_renames() -> None:
+    filters = _filters()
+    proxies, _ = collect_proxies(
+        [*_proxies(), _proxy("香港 2", "ss", "x")],
+        filters=filters,
+    )
+    deduped, _, _ = dedupe_proxies(proxies)
+    assert filters.select("subz", deduped)[1] == [
+        "香港 0",
+        "香港 1",
+        "香港 3",
+        "香港 2 (2)",
+    ]
+
+
+def test_compact_store_does_not_keep_the_parsed_dicts_alive() -> None:
+    filters = _filters()
+    entries = _proxies()
+    refs = [weakref.ref(entry) for entry in entries]
+    store, _ = collect_proxies(iter(entries), compact=True, filters=filters)
+    del entries
+    gc.collect()
+    assert isinstance(store, ProxyStore)
+    assert all(ref() is None for ref in refs)
+    selected, names = filters.select("subz", store)
+    assert isinstance(selected, ProxyStore)
+    assert names == ["香港 0", "香港 1", "香港 3"]
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from clashdedup import connection_key
+from clashmerge import SourceRun, SourceSpec, merge_runs
+
+
+def _run(source: int, count: int) -> SourceRun:
+    proxies = [
+        {"name": "HK", "type": "ss", "server": f"s{source}-{index}", "port": 443}
+        for index in range(count)
+    ]
+    return SourceRun(
+        SourceSpec(Path(f"source{source}.yaml")),
+        proxies,
+        [(False, "HK", "HK")] * count,
+        [connection_key(proxy) for proxy in proxies],
+    )
+
+
+def test_merged_sources_rename_same_named_proxies_linearly() -> None:
+    started = time.perf_counter()
+    _, names, report = merge_runs([_run(0, 10_000), _run(1, 10_000)])
+    assert time.perf_counter() - started < 2
+    assert len(set(names)) == len(names) == 20_000
+    assert names[:3] == ["HK", "HK (2)", "HK (3)"]
+    assert report.renamed == 19_999
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import asyncio
+
+from clashprobe import probe_proxies, prune_proxies
+
+
+async def _probe_with_listener(bad_server: str) -> list:
+    server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    proxies = [
+        {"name": "bad", "type": "ss", "server": bad_server, "port": 443},
+        {"name": "good", "type": "ss", "server": "127.0.0.1", "port": port},
+    ]
+    async with server:
+        return await probe_proxies(proxies, timeout=2)
+
+
+def test_bad_hostname_is_dead_without_aborting_the_run() -> None:
+    bad, good = asyncio.run(_probe_with_listener("a..b.com"))
+    assert not bad.alive
+    assert bad.rtt is None
+    assert "invalid server" in (bad.error or "")
+    assert good.alive
+    assert good.rtt is not None
+
+    kept, names = prune_proxies([bad, good])
+    assert names == ["good"]
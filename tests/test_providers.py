@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import ipaddress
+from pathlib import Path
+
+from clashproviders import (
+    compile_providers,
+    decode_provider,
+    encode_provider,
+    provider_order,
+    read_provider,
+)
+from clashyaml import load_yaml
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def compile_fixture():
+    config = load_yaml((FIXTURES / "providers.yaml").read_text(encoding="utf-8"))
+    order, independent = provider_order(config)
+    loaded = []
+    for name in order:
+        provider = config["rule-providers"][name]
+        entries = read_provider(
+            FIXTURES / provider["path"], provider["behavior"], provider.get("format")
+        )
+        loaded.append((name, entries))
+    return compile_providers(loaded, independent)
+
+
+def test_fixture_providers_are_minimized() -> None:
+    compiled, stats = compile_fixture()
+    reject, streaming, private = compiled
+    assert reject.suffixes == ["net.doubleclick", "test.tracker"]
+    assert reject.exact == ["org.example.ads", "org.example.pixel"]
+    # One duplicate spelling, two entries under a kept suffix.
+    assert (stats[0].duplicates, stats[0].covered) == (1, 2)
+    # ads.example.org is already rejected by the earlier provider.
+    assert (stats[1].covered, stats[1].shadowed, stats[1].merged) == (2, 1, 1)
+    assert streaming.networks == [ipaddress.ip_network("203.0.113.0/24")]
+    assert private.networks == [
+        ipaddress.ip_network("10.0.0.0/8"),
+        ipaddress.ip_network("192.168.0.0/16"),
+        ipaddress.ip_network("fd00::/8"),
+    ]
+    assert private.other == ["not-a-cidr"]
+    for stat, provider in zip(stats, compiled):
+        kept = (
+            len(provider.exact)
+            + len(provider.suffixes)
+            + len(provider.keywords)
+            + len(provider.networks)
+            + len(provider.other)
+        )
+        assert stat.entries - stat.removed == kept
+
+
+def test_front_coded_round_trip() -> None:
+    compiled, _ = compile_fixture()
+    for provider in compiled:
+        data = encode_provider(provider)
+        assert decode_provider(provider.name, data) == provider
+
+    reject = decode_provider("reject", encode_provider(compiled[0]))
+    assert reject.match_domain("a.b.doubleclick.net")
+    assert reject.match_domain("Pixel.Example.org.")
+    assert not reject.match_domain("example.org")
+    streaming = decode_provider("streaming", encode_provider(compiled[1]))
+    assert streaming.match_domain("livestream.test")
+    assert streaming.match_ip("203.0.113.200")
+    assert not streaming.match_ip("203.0.114.1")
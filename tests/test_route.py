@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import random
+
+from clashroute import NO_MATCH, IntervalTable
+
+
+def test_lookup_many_matches_lookup() -> None:
+    table = IntervalTable()
+    table.add(10, 20, 3)
+    table.add(15, 30, 1)
+    table.add(100, 100, 0)
+    table.add(2**100, 2**101, 2)  # past 64 bits: no numpy arrays either
+    table.build()
+    values = [0, 10, 14, 15, 30, 31, 100, 101, 2**100, 2**102]
+    values += random.Random(1).sample(range(200), 50)
+    expected = [table.lookup(value) for value in values]
+    assert table.lookup_many(values) == expected
+    assert expected[:10] == [NO_MATCH, 3, 3, 1, 1, NO_MATCH, 0, NO_MATCH, 2, NO_MATCH]
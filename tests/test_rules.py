@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import itertools
+from pathlib import Path
+
+from clashroute import Router
+from clashrules import compile_rules
+from clashyaml import load_yaml
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def fixture_rules() -> list[str]:
+    return load_yaml((FIXTURES / "rules.yaml").read_text(encoding="utf-8"))["rules"]
+
+
+def test_cidrs_are_collapsed() -> None:
+    rules = fixture_rules()
+    compiled, report = compile_rules(rules)
+    assert "IP-CIDR,10.0.0.0/23,DIRECT,no-resolve" in compiled
+    assert report.merged == [
+        (
+            [
+                "IP-CIDR,10.0.0.0/25,DIRECT,no-resolve",
+                "IP-CIDR,10.0.0.128/25,DIRECT,no-resolve",
+                "IP-CIDR,10.0.1.0/24,DIRECT,no-resolve",
+            ],
+            ["IP-CIDR,10.0.0.0/23,DIRECT,no-resolve"],
+        )
+    ]
+    # A Proxy range sits between them, so this one must not join the merge.
+    assert "IP-CIDR,10.0.3.0/24,DIRECT,no-resolve" in compiled
+
+
+def test_dead_rules_are_removed() -> None:
+    compiled, report = compile_rules(fixture_rules())
+    removed = dict(report.removed)
+    assert removed == {
+        "DOMAIN,www.example.com,Proxy": "shadowed by DOMAIN-SUFFIX,example.com,Proxy",
+        "DOMAIN,ads.example.com,REJECT": "shadowed by DOMAIN-SUFFIX,example.com,Proxy",
+        "IP-CIDR,10.0.0.64/26,DIRECT,no-resolve": (
+            "shadowed by IP-CIDR,10.0.0.0/25,DIRECT,no-resolve"
+        ),
+        "DOMAIN-SUFFIX,example.com,Proxy": "duplicate",
+        "DOMAIN,late.test,DIRECT": "unreachable after MATCH,Proxy",
+    }
+    assert compiled.count("DOMAIN-SUFFIX,example.com,Proxy") == 1
+    assert compiled[-1] == "MATCH,Proxy"
+    assert report.warnings == ["MATCH,Proxy shadows the 1 rule(s) after it"]
+
+
+def test_reorder_keeps_first_match() -> None:
+    rules = fixture_rules()
+    compiled, report = compile_rules(rules)
+    assert report.moved
+    assert compiled.index("DOMAIN-SUFFIX,lan,DIRECT") < compiled.index(
+        "IP-CIDR,172.16.0.0/12,DIRECT,no-resolve"
+    )
+
+    before = Router.from_config({"rules": rules}, FIXTURES)
+    after = Router.from_config({"rules": compiled}, FIXTURES)
+    domains = [
+        "",
+        "printer.lan",
+        "example.com",
+        "www.example.com",
+        "ads.example.com",
+        "ads.test",
+        "late.test",
+        "other.test",
+    ]
+    addresses = [
+        "",
+        "10.0.0.1",
+        "10.0.0.70",
+        "10.0.0.200",
+        "10.0.1.9",
+        "10.0.2.9",
+        "10.0.3.9",
+        "172.16.5.5",
+        "192.168.1.20",
+    ]
+    for domain, dst, src in itertools.product(domains, addresses, addresses):
+        assert before.policy(before.route(domain, dst, src)) == after.policy(
+            after.route(domain, dst, src)
+        ), (domain, dst, src)
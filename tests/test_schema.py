@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+
+from clashschema import validate_proxy
+
+
+@pytest.mark.parametrize("port", ["²", "1²", "", " ", "-1", "65536"])
+def test_bad_port_strings_are_rejected(port: str) -> None:
+    entry = {"name": "a", "type": "http", "server": "example.com", "port": port}
+    assert validate_proxy(entry) == "invalid port"
+
+
+def test_digit_port_string_is_coerced() -> None:
+    entry = {"name": "a", "type": "http", "server": "example.com", "port": " 443 "}
+    assert validate_proxy(entry) is None
+    assert entry["port"] == 443
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        {"name": "direct", "type": "direct"},
+        {"name": "dns", "type": "dns"},
+        {
+            "name": "wg",
+            "type": "wireguard",
+            "private-key": "key",
+            "peers": [{"server": "example.com", "port": 51820}],
+        },
+        {"name": "future", "type": "something-new"},
+    ],
+)
+def test_serverless_types_are_accepted(entry: dict) -> None:
+    assert validate_proxy(entry) is None
+
+
+def test_endpoint_types_still_require_server_and_port() -> None:
+    assert validate_proxy({"name": "a", "type": "http"}) == "missing server"
+    entry = {"name": "a", "type": "socks5", "server": "example.com"}
+    assert validate_proxy(entry) == "invalid port"
+    entry = {"name": "a", "type": "direct", "server": "example.com", "port": "x"}
+    assert validate_proxy(entry) == "invalid port"
+
+
+VMESS = {"name": "a", "type": "vmess", "server": "x", "port": 1, "uuid": "u"}
+SS = {"name": "a", "type": "ss", "server": "x", "port": 1, "password": "p"}
+
+
+@pytest.mark.parametrize(
+    ("entry", "reason"),
+    [
+        ({**VMESS, "cipher": ["auto"]}, "unknown cipher"),
+        ({**SS, "cipher": {"none": 1}}, "missing cipher"),
+        (
+            {**SS, "cipher": "none", "plugin": ["obfs"], "plugin-opts": {}},
+            "unknown plugin",
+        ),
+    ],
+)
+def test_unhashable_choices_are_rejected(entry: dict, reason: str) -> None:
+    assert validate_proxy(entry) == reason
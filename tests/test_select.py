@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from clashselect import select_diverse
+
+
+def _proxy(name: str, kind: str) -> dict[str, str]:
+    return {"name": name, "type": kind, "server": "example.com"}
+
+
+def test_crowded_type_does_not_hide_other_types_of_a_region() -> None:
+    proxies = [_proxy("香港 1", "ss"), _proxy("香港 2", "ss"), _proxy("香港 3", "vmess")]
+    kept, report = select_diverse(proxies, 2)
+    assert [proxy["name"] for proxy in kept] == ["香港 1", "香港 3"]
+    assert {proxy["type"] for proxy in kept} == {"ss", "vmess"}
+    assert [name for _, _, name in report.dropped] == ["香港 2"]
+
+
+def test_types_are_covered_when_one_region_exceeds_the_limit() -> None:
+    proxies = [_proxy(f"日本 {index}", "trojan") for index in range(10)]
+    proxies += [_proxy("日本 10", "ss"), _proxy("日本 11", "vmess")]
+    rtts = {f"日本 {index}": 0.01 * (index + 1) for index in range(10)}
+    rtts.update({"日本 10": 0.5, "日本 11": 0.6})
+    kept, _ = select_diverse(proxies, 3, rtts)
+    assert {proxy["type"] for proxy in kept} == {"trojan", "ss", "vmess"}
+    assert [proxy["name"] for proxy in kept] == ["日本 0", "日本 10", "日本 11"]
+
+
+def test_region_coverage_comes_first() -> None:
+    proxies = [_proxy("香港 1", "ss"), _proxy("香港 2", "vmess"), _proxy("日本 1", "ss")]
+    kept, _ = select_diverse(proxies, 2)
+    assert [proxy["name"] for proxy in kept] == ["香港 1", "日本 1"]
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from clashserve import ProfileServer
+
+
+def content_type(response: bytes) -> str:
+    head = response.split(b"\r\n\r\n", 1)[0].decode("latin-1")
+    for line in head.split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-type":
+            return value.strip()
+    raise AssertionError("no Content-Type header")
+
+
+def test_content_type_follows_target_format() -> None:
+    server = ProfileServer()
+    server.publish("SubZ.yml", "proxies: []\n")
+    server.publish("Sub-Win.yml", '{"proxies": []}\n', "json")
+    yaml_response = server.respond("GET", "/SubZ.yml", {})
+    json_response = server.respond("GET", "/Sub-Win.yml", {"accept-encoding": "gzip"})
+    assert yaml_response.startswith(b"HTTP/1.1 200 ")
+    assert content_type(yaml_response) == "text/yaml; charset=utf-8"
+    assert content_type(json_response) == "application/json"
+    assert content_type(server.respond("HEAD", "/Sub-Win.yml", {})) == (
+        "application/json"
+    )
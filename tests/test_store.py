@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+import yaml
+
+from clashstore import ProxyStore, compact
+from clashyaml import dump_yaml
+
+PROXIES = [{"name": "a", "type": "ss", "port": 1, "plugin-opts": {"mode": "tls"}}]
+
+
+@pytest.mark.parametrize("backend", ["python", "auto"])
+def test_stores_dump_like_lists(backend: str) -> None:
+    store = compact(PROXIES)
+    assert isinstance(store, ProxyStore)
+    assert dump_yaml({"proxies": store}, None, backend) == dump_yaml(
+        {"proxies": PROXIES}, None, backend
+    )
+
+
+def test_global_safe_dumpers_are_left_alone() -> None:
+    store = compact(PROXIES)
+    with pytest.raises(yaml.representer.RepresenterError):
+        yaml.safe_dump(store)
+    with pytest.raises(yaml.representer.RepresenterError):
+        yaml.safe_dump(store[0])
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+import yaml
+
+from clashstream import iter_proxies
+
+SOURCE = """\
+defaults: &ss
+  type: ss
+  cipher: aes-128-gcm
+  password: secret
+port: 7890
+proxies:
+  - {name: a, server: a.example.com, port: 443, type: trojan, password: x}
+  - <<: *ss
+    name: b
+    server: b.example.com
+    port: 8388
+  - &c {name: c, server: c.example.com, port: 443, type: http}
+  - *c
+rules:
+  - MATCH,DIRECT
+"""
+
+
+@pytest.mark.parametrize("backend", ["python", "auto"])
+def test_aliases_to_anchors_outside_proxies_fall_back(backend: str) -> None:
+    expected = yaml.safe_load(SOURCE)["proxies"]
+    assert list(iter_proxies(SOURCE, backend)) == expected
+    assert expected[1]["cipher"] == "aes-128-gcm"
+
+
+def test_aliases_within_proxies_are_streamed() -> None:
+    source = SOURCE.replace("<<: *ss", "<<: {type: ss}")
+    assert list(iter_proxies(source)) == yaml.safe_load(source)["proxies"]
+
+
+def test_undefined_alias_is_still_an_error() -> None:
+    with pytest.raises(yaml.YAMLError, match="undefined alias"):
+        list(iter_proxies(SOURCE.replace("*ss", "*missing")))